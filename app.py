@@ -1,19 +1,77 @@
+import time
+
+STARTED = time.perf_counter()
+
+import argparse
 import customtkinter as ctk
+from instrumentation import QueryStats, SLOW_QUERY_MS
 from view import MainView
 
+IMPORTED = time.perf_counter()
+
+
+class StartupProfile:
+    #Wall-clock time of each startup phase, measured from process start (before the imports above)
+    def __init__(self, on_complete=None, final_phase="dashboard data loaded"):
+        self.marks = [("imports", IMPORTED)]
+        self.on_complete = on_complete
+        self.final_phase = final_phase
+
+    def mark(self, phase):
+        self.marks.append((phase, time.perf_counter()))
+        if phase == self.final_phase and self.on_complete:
+            self.on_complete()
+
+    def report(self):
+        lines = []
+        previous = STARTED
+        for phase, at in self.marks:
+            lines.append(f"{phase:<24}{(at - previous) * 1000:9.1f} ms{(at - STARTED) * 1000:10.1f} ms")
+            previous = at
+        return "\n".join([f"{'phase':<24}{'step':>12}{'total':>13}"] + lines)
+
+
 class VersionaryApp(ctk.CTk):
-    def __init__(self):
+    def __init__(self, profile=None, instrumentation=None, reencode_format=None):
         super().__init__()
         self.title("Versionary - Version Control System")
         self.geometry("1000x600")
         self.minsize(800, 500)
+        if profile is not None:
+            profile.mark("window created")
 
-        self.main_view = MainView(self)
+        self.main_view = MainView(self, profile=profile, instrumentation=instrumentation, reencode_format=reencode_format)
         self.main_view.pack(expand=True, fill="both")
 
-if __name__ == "__main__":
+
+def main():
+    parser = argparse.ArgumentParser(description="Versionary - Version Control System")
+    parser.add_argument("--profile-startup", action="store_true", help="print how long each startup phase takes, then exit")
+    parser.add_argument("--diagnostics", metavar="PATH",
+                        help="record query statistics (shown in a Diagnostics view) and write them to PATH as JSON on exit")
+    parser.add_argument("--slow-ms", type=float, default=SLOW_QUERY_MS,
+                        help=f"log statements slower than this with their query plan (default {SLOW_QUERY_MS})")
+    parser.add_argument("--reencode-images", metavar="FORMAT",
+                        help="store attached images re-encoded losslessly as FORMAT (e.g. WEBP) when that is smaller; needs Pillow")
+    args = parser.parse_args()
+
     ctk.set_appearance_mode("Dark")
     ctk.set_default_color_theme("blue")
 
-    app = VersionaryApp()
-    app.mainloop()
+    profile = None
+    if args.profile_startup:
+        profile = StartupProfile(on_complete=lambda: app.after_idle(app.destroy))
+    instrumentation = QueryStats(slow_ms=args.slow_ms) if args.diagnostics else None
+    app = VersionaryApp(profile, instrumentation, args.reencode_images)
+    try:
+        app.mainloop()
+    finally:
+        if instrumentation is not None:
+            instrumentation.dump(args.diagnostics)
+
+    if profile is not None:
+        print(profile.report())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+import hashlib
+import io
+import mmap
+import os
+import tempfile
+from contextlib import contextmanager
+
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def attachment_dir(db_path):
+    #Kept next to the database so the database and its images move together
+    if db_path == ":memory:":
+        return os.path.abspath("attachments")
+    return os.path.join(os.path.dirname(os.path.abspath(db_path)), "attachments")
+
+
+class AttachmentStore:
+    #Content-addressed file store: every blob is saved once under root/<first two hex digits>/<sha256>.
+    #reencode_format (e.g. "WEBP") re-encodes images losslessly when that makes them smaller; it needs PIL.
+    def __init__(self, root, reencode_format=None):
+        self.root = root
+        self.reencode_format = reencode_format
+
+    def path_of(self, digest):
+        return os.path.join(self.root, digest[:2], digest)
+
+    def exists(self, digest):
+        return os.path.exists(self.path_of(digest))
+
+    def add(self, path):
+        #Returns the content hash of the stored file; adding the same content twice stores it once
+        data = self.reencode(path) if self.reencode_format else None
+        if data is not None:
+            return self.add_bytes(data)
+
+        with self.open_file(path) as source:
+            digest = hashlib.sha256(source).hexdigest()
+            if not self.exists(digest):
+                self.write(digest, source)
+        return digest
+
+    def add_bytes(self, data):
+        digest = hashlib.sha256(data).hexdigest()
+        if not self.exists(digest):
+            self.write(digest, data)
+        return digest
+
+    def write(self, digest, data):
+        #Written to a temp file and renamed so readers never see a partial blob
+        target = self.path_of(digest)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(target), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                view = memoryview(data)
+                for start in range(0, len(view), HASH_CHUNK_SIZE):
+                    f.write(view[start:start + HASH_CHUNK_SIZE])
+            os.replace(temp_path, target)
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+
+    def reencode(self, path):
+        try:
+            from PIL import Image
+        except ImportError:
+            return None
+        try:
+            with Image.open(path) as img:
+                buffer = io.BytesIO()
+                img.save(buffer, self.reencode_format, lossless=True)
+        except Exception:
+            return None
+        if buffer.tell() >= os.path.getsize(path):
+            return None
+        return buffer.getvalue()
+
+    @contextmanager
+    def open_file(self, path):
+        #Read-only memory map of path (bytes for empty files, which cannot be mapped)
+        with open(path, "rb") as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                yield b""
+                return
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                yield mapped
+
+    def open(self, digest):
+        return self.open_file(self.path_of(digest))
+
+    def digests(self):
+        if not os.path.isdir(self.root):
+            return
+        for prefix in os.listdir(self.root):
+            directory = os.path.join(self.root, prefix)
+            if len(prefix) == 2 and os.path.isdir(directory):
+                for name in os.listdir(directory):
+                    if not name.endswith(".tmp"):
+                        yield name
+
+    def remove(self, digest):
+        try:
+            os.unlink(self.path_of(digest))
+        except FileNotFoundError:
+            pass
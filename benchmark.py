@@ -0,0 +1,495 @@
+import argparse
+import datetime
+import json
+import multiprocessing
+import os
+import platform
+import random
+import sqlite3
+import statistics
+import tempfile
+import time
+import tracemalloc
+
+from db import (DEPLOYMENT_STATUSES, RESOLVED_STATUSES, SUCCESSFUL_DEPLOYMENT_STATUS, TIMELINE_LEVELS, TIMELINE_TILE, EntityCache,
+                VersionController, version_sort_key)
+from models import Bug, read_columns, row_factory
+
+
+def seed(controller, softwares, versions_per_software, bugs_per_version, rng):
+    conn = controller.conn
+    with conn:
+        conn.executemany("INSERT INTO Softwares (name) VALUES (?)",
+                         ((f"Software {i}",) for i in range(softwares)))
+        software_ids = [row[0] for row in conn.execute("SELECT software_id FROM Softwares")]
+
+        conn.executemany("""
+            INSERT INTO Software_Versions (software_id, version_number, release_date, status, notes, version_key)
+            VALUES (?, ?, ?, ?, ?, ?)
+        """, ((sid, f"1.{v}.0", f"2024-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}", "Stable", "", version_sort_key(f"1.{v}.0"))
+              for sid in software_ids for v in range(versions_per_software)))
+        version_ids = [row[0] for row in conn.execute("SELECT version_id FROM Software_Versions")]
+
+        conn.executemany("""
+            INSERT INTO Bugs (version_id, title, description, severity, status, assigned_to, date_reported)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        """, ((vid, f"Bug {vid}-{b}", "", rng.choice(["Critical", "Major", "Minor"]), "Open", "",
+               f"2024-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}")
+              for vid in version_ids for b in range(bugs_per_version)))
+        conn.executemany("""
+            INSERT INTO Deployments (version_id, environment, deployment_date, deployment_status)
+            VALUES (?, ?, ?, ?)
+        """, ((vid, "Production", "2024-06-01", SUCCESSFUL_DEPLOYMENT_STATUS) for vid in version_ids))
+        conn.executemany("""
+            INSERT INTO Patch_Notes (version_id, note_title, note_description)
+            VALUES (?, ?, ?)
+        """, ((vid, f"Patch {vid}", "") for vid in version_ids))
+    return software_ids
+
+
+def time_call(func, *args, repeat=50, before=None):
+    #before() runs ahead of every call but is not timed
+    total = 0.0
+    for _ in range(repeat):
+        if before:
+            before()
+        start = time.perf_counter()
+        func(*args)
+        total += time.perf_counter() - start
+    return total / repeat * 1000
+
+
+def run(scale, rng):
+    softwares, versions_per_software, bugs_per_version = scale
+    path = os.path.join(tempfile.mkdtemp(), "bench.db")
+    controller = VersionController(path)
+    software_ids = seed(controller, softwares, versions_per_software, bugs_per_version, rng)
+    sample = rng.sample(software_ids, min(20, len(software_ids)))
+
+    total_bugs = controller.conn.execute("SELECT COUNT(*) FROM Bugs").fetchone()[0]
+    results = {}
+    for name in ("get_versions", "get_bugs_by_software", "get_deployments", "get_patch_notes_by_software",
+                 "get_software_summary"):
+        method = getattr(controller, name)
+        #Cold calls clear the entity cache first so they measure SQLite, warm calls are served from the cache
+        results[name] = sum(time_call(method, sid, before=controller.cache.clear) for sid in sample) / len(sample)
+        results[f"{name}(cached)"] = sum(time_call(method, sid) for sid in sample) / len(sample)
+    controller.close()
+    os.remove(path)
+    return total_bugs, results
+
+
+def run_import(rows_count, rng):
+    #Compare per-row add_bug (one commit each) with add_bugs_many (one transaction)
+    path = os.path.join(tempfile.mkdtemp(), "import.db")
+    controller = VersionController(path)
+    software_id = controller.add_software("Import")
+    version_id = controller.add_version(software_id, "1.0.0", "2024-01-01", "Stable", "")
+    rows = [(version_id, f"Bug {i}", "", rng.choice(["Critical", "Major", "Minor"]), "Open", "", "2024-06-01")
+            for i in range(rows_count)]
+
+    #The per-row path is timed on a slice so the run stays short
+    sample = rows[:max(1, rows_count // 20)]
+    start = time.perf_counter()
+    for row in sample:
+        controller.add_bug(*row)
+    per_row = len(sample) / (time.perf_counter() - start)
+
+    start = time.perf_counter()
+    controller.add_bugs_many(rows)
+    batched = rows_count / (time.perf_counter() - start)
+    controller.close()
+
+    print(f"add_bug:       {per_row:>12.0f} rows/sec")
+    print(f"add_bugs_many: {batched:>12.0f} rows/sec  ({batched / per_row:.0f}x)")
+
+
+class SlottedBug:
+    __slots__ = Bug._fields
+
+    def __init__(self, *values):
+        for field, value in zip(self.__slots__, values):
+            setattr(self, field, value)
+
+
+def measure(build):
+    #Bytes allocated by the structure build() returns, which is kept alive until measured
+    tracemalloc.start()
+    value = build()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del value
+    return size
+
+
+def run_memory(rows_count):
+    #Compare bug row representations; every variant fetches the same rows so strings cost the same in each
+    conn = sqlite3.connect(":memory:")
+    conn.execute("CREATE TABLE Bugs (bug_id INTEGER PRIMARY KEY, title TEXT, description TEXT, severity TEXT, status TEXT, assigned_to TEXT, date_reported TEXT, version_number TEXT, version_id INTEGER)")
+    conn.execute("""
+        WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n WHERE i < ?)
+        INSERT INTO Bugs SELECT i, 'Bug ' || i, '', 'Minor', 'Open', '', '2024-06-01', '1.0.' || (i % 100), i % 100 FROM n
+    """, (rows_count,))
+    query = "SELECT * FROM Bugs"
+
+    def fetch(model=None):
+        cursor = conn.cursor()
+        if model:
+            cursor.row_factory = row_factory(model)
+        return cursor.execute(query).fetchall()
+
+    def columns():
+        return read_columns(conn.execute(query), Bug)
+
+    def cached():
+        #What the controller's EntityCache holds once the rows are read through it
+        cache = EntityCache(budget=rows_count)
+        cache.get("bugs", None, (), lambda: fetch(Bug))
+        return cache
+
+    variants = {
+        "tuple": fetch,
+        "namedtuple": lambda: fetch(Bug),
+        "__slots__": lambda: [SlottedBug(*row) for row in conn.execute(query)],
+        "columns": columns,
+        "cache": cached,
+    }
+    sizes = {}
+    for name, build in variants.items():
+        sizes[name] = size = measure(build)
+        print(f"{name:>10}: {size / 2 ** 20:>8.1f} MiB  {size / rows_count:>6.0f} bytes/row")
+    conn.close()
+    if sizes["cache"] >= sizes["namedtuple"] / 2:
+        raise SystemExit(f"cached rows take {sizes['cache'] / sizes['namedtuple']:.0%} of the rows they were read as, expected under half")
+
+
+def load_client(path, role, seconds, seed_value, results):
+    #One process of the shared-file load test: either pages through bugs or keeps adding them
+    rng = random.Random(seed_value)
+    controller = VersionController(path)
+    software_ids = [sid for sid, _ in controller.get_softwares()]
+    version_ids = [row[0] for row in controller.conn.execute("SELECT version_id FROM Software_Versions")]
+
+    ops = errors = 0
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        try:
+            if role == "read":
+                #The entity cache is per process and would hide the SQLite contention being measured
+                controller.cache.clear()
+                controller.get_bugs_page(rng.choice(software_ids))
+            else:
+                controller.add_bug(rng.choice(version_ids), "Load bug", "", "Minor", "Open", "", "2024-06-01")
+            ops += 1
+        except sqlite3.OperationalError:
+            errors += 1
+    controller.close()
+    results.put((role, ops, errors))
+
+
+def run_load(readers, writers, seconds, rng):
+    path = os.path.join(tempfile.mkdtemp(), "load.db")
+    controller = VersionController(path)
+    seed(controller, 200, 10, 10, rng)
+    controller.close()
+
+    results = multiprocessing.Queue()
+    roles = ["read"] * readers + ["write"] * writers
+    processes = [multiprocessing.Process(target=load_client, args=(path, role, seconds, i, results))
+                 for i, role in enumerate(roles)]
+    for process in processes:
+        process.start()
+    totals = {"read": [0, 0], "write": [0, 0]}
+    for _ in processes:
+        role, ops, errors = results.get()
+        totals[role][0] += ops
+        totals[role][1] += errors
+    for process in processes:
+        process.join()
+
+    for role, (ops, errors) in totals.items():
+        print(f"{role:>5}s/sec: {ops / seconds:>10.0f}   errors: {errors}")
+
+
+SEVERITIES = ("Critical", "Major", "Minor")
+BUG_STATUSES = ("Open", "Resolved", "Closed")
+VERSION_STATUSES = ("Stable", "Beta", "Deprecated")
+ENVIRONMENTS = ("Production", "Staging", "Testing")
+WORDS = ("crash", "login", "timeout", "memory", "leak", "button", "render", "sync", "export", "import", "cache",
+         "network", "upload", "search", "layout", "font", "scroll", "theme", "startup", "database")
+#Public controller methods the suite does not time; the query stats ones are no-ops without instrumentation, which the suite runs without
+SUITE_SKIPPED = {"add_listener", "remove_listener", "batch", "close", "get_query_stats", "reset_query_stats"}
+
+
+def random_date(rng):
+    return f"{rng.randint(2019, 2025)}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}"
+
+
+def random_text(rng, words):
+    return " ".join(rng.choice(WORDS) for _ in range(words))
+
+
+def generate(controller, rows, rng):
+    #Seeded synthetic data of about `rows` rows: one software per 2000 rows with 20 versions each,
+    #the rest split 60/20/20 between bugs, deployments and patch notes. Streams through insert_rows so 10M rows fit in memory.
+    softwares = max(1, rows // 2000)
+    remaining = max(0, rows - softwares * 21)
+    controller.insert_rows("Softwares", ((None, f"Software {i}", 0) for i in range(softwares)))
+    software_ids = [row[0] for row in controller.iter_rows("Softwares")]
+
+    def versions():
+        for sid in software_ids:
+            #Shuffled so insertion order differs from version order, with the odd prerelease
+            numbers = [f"{major}.{minor}.{rng.randint(0, 9)}" for major in range(1, 5) for minor in range(5)]
+            rng.shuffle(numbers)
+            for number in numbers:
+                if rng.random() < 0.1:
+                    number += f"-rc.{rng.randint(1, 3)}"
+                yield (None, sid, number, random_date(rng), rng.choice(VERSION_STATUSES), random_text(rng, 5))
+
+    controller.insert_rows("Software_Versions", versions())
+    version_ids = [row[0] for row in controller.iter_rows("Software_Versions")]
+
+    def bugs():
+        #Resolved bugs get a resolution date up to 90 days after the report
+        for _ in range(remaining * 6 // 10):
+            status = rng.choice(BUG_STATUSES)
+            reported = random_date(rng)
+            resolved = None
+            if status in RESOLVED_STATUSES:
+                resolved = (datetime.date.fromisoformat(reported) + datetime.timedelta(days=rng.randint(0, 90))).isoformat()
+            yield (None, rng.choice(version_ids), random_text(rng, 4), random_text(rng, 12), rng.choice(SEVERITIES),
+                   status, f"dev{rng.randint(1, 50)}", reported, resolved)
+
+    controller.insert_rows("Bugs", bugs())
+    controller.insert_rows("Deployments", ((None, rng.choice(version_ids), rng.choice(ENVIRONMENTS), random_date(rng),
+                                            rng.choice(DEPLOYMENT_STATUSES))
+                                           for _ in range(remaining * 2 // 10)))
+    controller.insert_rows("Patch_Notes", ((None, rng.choice(version_ids), random_text(rng, 4), random_text(rng, 20), None, None)
+                                           for _ in range(remaining * 2 // 10)))
+    return software_ids
+
+
+def time_samples(setup, func, repeat):
+    #setup() returns the call's arguments and is not timed
+    samples = []
+    for _ in range(repeat):
+        args = setup()
+        start = time.perf_counter()
+        func(*args)
+        samples.append((time.perf_counter() - start) * 1000)
+    return {"mean_ms": statistics.fmean(samples), "median_ms": statistics.median(samples),
+            "min_ms": min(samples), "max_ms": max(samples), "calls": repeat}
+
+
+def suite_calls(controller, rng, sid):
+    #name -> (setup returning args, function or None for the method itself, repeat)
+    vid = controller.get_versions(sid)[0].version_id
+    bug_id = controller.get_bugs_page(sid)[0][0].bug_id
+    deployment_id = controller.get_deployments_page(sid)[0][0].deployment_id
+    patch_id = controller.get_patch_notes_page(sid)[0][0].patch_id
+    word = rng.choice(WORDS)
+    first_day, last_day = controller.get_timeline_extent(sid)
+
+    def cold(*args):
+        #Reads are timed against SQLite, not the entity cache
+        def setup():
+            controller.cache.clear()
+            return args
+        return setup
+
+    def fresh_version():
+        return (controller.add_version(sid, "0.0.1", "2024-01-01", "Beta", ""),)
+
+    def fresh_software():
+        software_id = controller.add_software("Doomed")
+        version_id = controller.add_version(software_id, "1.0", "2024-01-01", "Stable", "")
+        controller.add_bugs_many([(version_id, "Doomed bug", "", "Minor", "Open", "", "2024-01-01")] * 100)
+        return (software_id,)
+
+    def timeline_tile():
+        #A random tile at a random level, as the timeline asks for them while panning and zooming
+        days = rng.choice(TIMELINE_LEVELS)
+        return cold(sid, days, rng.randint(first_day, last_day) // days // TIMELINE_TILE)()
+
+    bug_row = (vid, "Bench bug", "", "Minor", "Open", "", "2024-01-01")
+    return {
+        "get_schema_version": (cold(), None, 50),
+        "migrate": (cold(), None, 20),
+        "get_cache_stats": (cold(), None, 50),
+        "set_active_software": (lambda: (rng.choice([sid, None]),), None, 50),
+        "get_active_software": (cold(), None, 50),
+        "get_latest_version_id_for_active_software": (lambda: (controller.set_active_software(sid), controller.cache.clear(), ())[-1], None, 50),
+        "get_software_summary": (cold(sid), None, 50),
+        "get_stats": (cold(sid), None, 50),
+        "get_softwares": (cold(), None, 5),
+        "get_softwares_page": (cold(), None, 50),
+        "get_archived_softwares": (cold(), None, 20),
+        "get_software": (cold(sid), None, 50),
+        "get_versions": (cold(sid), None, 50),
+        "get_versions_page": (cold(sid), None, 50),
+        "get_versions_in_range": (cold(sid, ">=2.0 <3.0"), None, 50),
+        "get_version": (cold(vid), None, 50),
+        "get_bugs_by_software": (cold(sid), None, 10),
+        "get_bugs_by_software (one quarter)": (cold(sid, "2022-01-01", "2022-03-31"), controller.get_bugs_by_software, 20),
+        "get_bugs_page": (cold(sid), None, 50),
+        "get_bug": (cold(bug_id), None, 50),
+        "get_bug_columns": (cold(sid), None, 10),
+        "get_bug_lifecycle_columns": (cold(sid), None, 10),
+        "get_deployment_counts": (cold(sid), None, 10),
+        "get_timeline_extent": (cold(sid), None, 50),
+        "get_timeline_tile": (timeline_tile, None, 50),
+        "get_deployments": (cold(sid), None, 10),
+        "get_deployments (one quarter)": (cold(sid, ("2022-01-01", "2022-03-31")), controller.get_deployments, 20),
+        "get_deployments_page": (cold(sid), None, 50),
+        "get_deployment": (cold(deployment_id), None, 50),
+        "get_patch_notes_by_software": (cold(sid), None, 10),
+        "get_patch_notes_page": (cold(sid), None, 50),
+        "get_patch_note": (cold(patch_id), None, 50),
+        "search": (cold(word, sid), None, 20),
+        "iter_rows": (cold("Bugs"), lambda table: sum(1 for _ in controller.iter_rows(table)), 1),
+        "add_software": (lambda: ("Bench software",), None, 50),
+        "update_software": (lambda: (sid, f"Software {rng.random()}"), None, 50),
+        "archive_software": (lambda: (sid,), None, 20),
+        "restore_software": (lambda: (sid,), None, 20),
+        "add_softwares_many": (lambda: ([f"Bulk {i}" for i in range(100)],), None, 5),
+        "add_version": (lambda: (sid, "9.9.9", "2024-01-01", "Beta", ""), None, 50),
+        "add_versions_many": (lambda: ([(sid, f"8.{i}", "2024-01-01", "Beta", "") for i in range(100)],), None, 5),
+        "update_version": (lambda: (vid, f"{rng.randint(1, 5)}.0.0", "2024-01-01", "Stable", ""), None, 50),
+        "delete_version": (fresh_version, None, 20),
+        "delete_versions": (lambda: ([fresh_version()[0] for _ in range(10)],), None, 5),
+        "add_bug": (lambda: bug_row, None, 50),
+        "add_bugs_many": (lambda: ([bug_row] * 1000,), None, 5),
+        "update_bug": (lambda: (bug_id, "Bench bug", "", rng.choice(SEVERITIES), rng.choice(BUG_STATUSES), "", "2024-01-01"), None, 50),
+        "delete_bug": (lambda: (controller.add_bug(*bug_row),), None, 20),
+        "add_deployment": (lambda: (sid, "Staging", "2024-01-01", "Pending"), None, 50),
+        "add_deployments_many": (lambda: ([(vid, "Staging", "2024-01-01", "Pending")] * 1000,), None, 5),
+        "update_deployment": (lambda: (deployment_id, rng.choice(ENVIRONMENTS), "2024-01-01", rng.choice(DEPLOYMENT_STATUSES)), None, 50),
+        "delete_deployment": (lambda: (controller.add_deployment(sid, "Staging", "2024-01-01", "Pending"),), None, 20),
+        "add_patch_note": (lambda: (vid, "Bench note", ""), None, 50),
+        "add_patch_notes_many": (lambda: ([(vid, "Bench note", "", None)] * 1000,), None, 5),
+        "delete_patch_note": (lambda: (controller.add_patch_note(vid, "Doomed note", ""),), None, 20),
+        "insert_rows": (lambda: ("Bugs", [(None,) + bug_row + (None,)] * 1000), None, 5),
+        "adopt_legacy_images": (lambda: (), None, 5),
+        "prune_attachments": (lambda: (), None, 5),
+        "cleanup_orphans": (lambda: (), None, 3),
+        "refresh_version_keys": (lambda: (), None, 3),
+        "delete_software": (fresh_software, None, 5),
+        "vacuum": (lambda: (), None, 3),
+    }
+
+
+def time_views(controller, repeat=3):
+    #Builds every view class on a hidden root and pumps the event loop until its first pages arrived
+    try:
+        import customtkinter as ctk
+        import view
+        from worker import DatabaseWorker
+        root = ctk.CTk()
+    except Exception as e:
+        #No customtkinter/PIL, or no display to open a Tk root on
+        return {"skipped": f"{type(e).__name__}: {e}"}
+    root.withdraw()
+    worker = DatabaseWorker(root, controller)
+
+    results = {}
+    view_classes = [cls for cls in vars(view).values()
+                    if isinstance(cls, type) and issubclass(cls, ctk.CTkFrame) and hasattr(cls, "depends_on")]
+    for view_class in view_classes:
+        built, loaded = [], []
+        for _ in range(repeat):
+            controller.cache.clear()
+            start = time.perf_counter()
+            widget = view_class(root, controller, worker)
+            widget.pack(fill="both", expand=True)
+            root.update_idletasks()
+            built.append((time.perf_counter() - start) * 1000)
+            while worker.dispatcher.outstanding:
+                root.update()
+            root.update()
+            loaded.append((time.perf_counter() - start) * 1000)
+            widget.destroy()
+        results[view_class.__name__] = {"construct_ms": statistics.median(built), "loaded_ms": statistics.median(loaded)}
+
+    worker.close()
+    root.destroy()
+    return results
+
+
+def run_suite(rows, rng, include_views=True):
+    path = os.path.join(tempfile.mkdtemp(), "suite.db")
+    controller = VersionController(path)
+    start = time.perf_counter()
+    software_ids = generate(controller, rows, rng)
+    generate_seconds = time.perf_counter() - start
+    generated_rows = {table: controller.conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+                      for table in ("Softwares", "Software_Versions", "Bugs", "Deployments", "Patch_Notes")}
+    sid = software_ids[len(software_ids) // 2]
+
+    methods = {}
+    calls = suite_calls(controller, rng, sid)
+    for name, (setup, func, repeat) in calls.items():
+        methods[name] = time_samples(setup, func or getattr(controller, name), repeat)
+
+    public = {name for name in dir(VersionController) if not name.startswith("_") and callable(getattr(VersionController, name))}
+    report = {
+        "meta": {
+            "rows": rows,
+            "generated_rows": generated_rows,
+            "generate_seconds": generate_seconds,
+            "sqlite": sqlite3.sqlite_version,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "methods": methods,
+        "views": time_views(controller) if include_views else {"skipped": "--no-views"},
+        #Public methods nobody taught the suite about yet
+        "untimed": sorted(public - set(calls) - SUITE_SKIPPED),
+    }
+    controller.close()
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Versionary database benchmarks")
+    parser.add_argument("--quick", action="store_true", help="skip the largest scale")
+    parser.add_argument("--load", action="store_true", help="run the multi-process shared-file load test instead")
+    parser.add_argument("--import-rows", type=int, metavar="N", help="compare per-row and batched inserts of N bugs instead")
+    parser.add_argument("--memory-rows", type=int, metavar="N", help="compare the memory of N bug rows per row representation instead")
+    parser.add_argument("--suite", type=int, metavar="ROWS", help="time every controller method and view on ROWS generated rows (1000 to 10000000) instead")
+    parser.add_argument("--json", metavar="PATH", help="where --suite writes its JSON report (default: stdout)")
+    parser.add_argument("--no-views", action="store_true", help="skip timing view construction in --suite")
+    parser.add_argument("--readers", type=int, default=4)
+    parser.add_argument("--writers", type=int, default=2)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    args = parser.parse_args()
+
+    rng = random.Random(1234)
+    if args.suite:
+        report = run_suite(args.suite, rng, include_views=not args.no_views)
+        if args.json:
+            with open(args.json, "w", encoding="utf-8") as f:
+                json.dump(report, f, indent=2)
+        else:
+            print(json.dumps(report, indent=2))
+        raise SystemExit(0)
+
+    print(f"SQLite {sqlite3.sqlite_version}")
+
+    if args.load:
+        run_load(args.readers, args.writers, args.seconds, rng)
+    elif args.import_rows:
+        run_import(args.import_rows, rng)
+    elif args.memory_rows:
+        run_memory(args.memory_rows)
+    else:
+        #(softwares, versions per software, bugs per version)
+        scales = [(100, 10, 10), (1000, 10, 10), (5000, 10, 10)]
+        if args.quick:
+            scales = scales[:2]
+
+        for scale in scales:
+            total_bugs, results = run(scale, rng)
+            timings = "  ".join(f"{name}={ms:.3f}ms" for name, ms in results.items())
+            print(f"{scale[0]:>6} softwares {total_bugs:>8} bugs  {timings}")
@@ -0,0 +1,68 @@
+import argparse
+import json
+import sys
+
+from db import VersionController
+import transfer
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Versionary headless tools")
+    parser.add_argument("--db", default="versionary.db", help="database file (default: versionary.db)")
+    parser.add_argument("--reencode-images", metavar="FORMAT",
+                        help="store imported and adopted images re-encoded losslessly as FORMAT (e.g. WEBP) when that is smaller; needs Pillow")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    export_parser = commands.add_parser("export", help="export every table to a directory")
+    export_parser.add_argument("directory")
+    export_parser.add_argument("--format", choices=transfer.FORMATS, default="csv")
+
+    import_parser = commands.add_parser("import", help="import the table files found in a directory")
+    import_parser.add_argument("directory")
+
+    commands.add_parser("adopt-images", help="copy patch note images referenced by path into the attachment store")
+    commands.add_parser("prune-attachments", help="delete stored images no patch note refers to")
+
+    maintain_parser = commands.add_parser("maintain", help="delete orphaned rows, re-key versions written by other tools and return free pages to the OS")
+    maintain_parser.add_argument("--pages", type=int, help="free at most this many pages (default: all)")
+
+    commands.add_parser("archived", help="list archived software")
+    restore_parser = commands.add_parser("restore", help="bring an archived software back into the app")
+    restore_parser.add_argument("software_id", type=int)
+
+    metrics_parser = commands.add_parser("metrics", help="print MTTR, burndown, resolution percentiles and change failure rates as JSON (needs NumPy)")
+    metrics_parser.add_argument("software_id", type=int)
+
+    args = parser.parse_args(argv)
+    controller = VersionController(args.db, reencode_format=args.reencode_images)
+    try:
+        if args.command == "export":
+            counts = transfer.export_all(controller, args.directory, args.format)
+        elif args.command == "import":
+            counts = transfer.import_all(controller, args.directory)
+        elif args.command == "adopt-images":
+            counts = {"adopted": controller.adopt_legacy_images()}
+        elif args.command == "prune-attachments":
+            counts = {"pruned": controller.prune_attachments()}
+        elif args.command == "archived":
+            counts = {software.software_id: software.name for software in controller.get_archived_softwares()}
+        elif args.command == "restore":
+            counts = {"restored": controller.restore_software(args.software_id)}
+        elif args.command == "metrics":
+            import metrics
+            print(json.dumps(metrics.compute(controller, args.software_id), indent=2))
+            return 0
+        else:
+            counts = {f"orphaned {table}": count for table, count in controller.cleanup_orphans().items()}
+            counts["re-keyed versions"] = controller.refresh_version_keys()
+            counts["freed pages"] = controller.vacuum(args.pages)
+    finally:
+        controller.close()
+
+    for name, count in counts.items():
+        print(f"{name}: {count}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
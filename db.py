@@ -1,25 +1,137 @@
+import datetime
+import queue
+import re
 import sqlite3
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from itertools import islice
+from pathlib import Path
 
-class VersionController:
-    def __init__(self, db_path="versionary.db"):
-        self.conn = sqlite3.connect(db_path)
-        self.cursor = self.conn.cursor()
-        self.active_software_id = None
-        self.create_tables()
+from attachments import AttachmentStore, attachment_dir
+from instrumentation import InstrumentedConnection
+from models import (Bug, BugLifecycle, Deployment, DeploymentCounts, PackedRows, PatchNote, SearchHit, Software, Version,
+                    read_columns, row_factory)
+
+
+VERSION_PATTERN = re.compile(r"^\s*[vV]?(\d+)(?:\.(\d+))?(?:\.(\d+))?(?:\.(\d+))?(?:[-_ ]?([0-9A-Za-z][0-9A-Za-z.-]*))?(?:\+\S*)?\s*$")
+RANGE_PATTERN = re.compile(r"(>=|<=|>|<|=)?\s*([^\s<>=]+)")
+#Numeric dates, optionally followed by a time of day that is dropped: year first, or month first (day first when the month cannot be)
+YEAR_FIRST_DATE = re.compile(r"^(\d{4})[-/.](\d{1,2})[-/.](\d{1,2})(?:[T ]\d.*)?$")
+YEAR_LAST_DATE = re.compile(r"^(\d{1,2})[-/.](\d{1,2})[-/.](\d{4})(?:[T ]\d.*)?$")
+NAMED_MONTH_FORMATS = ("%B %d, %Y", "%b %d, %Y", "%B %d %Y", "%b %d %Y", "%d %B %Y", "%d %b %Y")
+#Bounds for half-open date ranges
+MIN_DATE = "0000-01-01"
+MAX_DATE = "9999-12-31"
+#Stored dates are ISO when they parsed; anything else is text kept as typed, which ranges and date ordering leave out
+ISO_DATE_GLOB = "[0-9][0-9][0-9][0-9]-[0-9][0-9]-[0-9][0-9]"
+ISO_DATE = re.compile(r"[0-9]{4}-[0-9]{2}-[0-9]{2}")
+
+
+def version_sort_key(version_number):
+    #Text key that sorts like semantic versions: four zero-padded numeric parts, then "~" for a release or "-" and the
+    #prerelease identifiers (numeric ones padded), so 1.10 > 1.9 and 2.0.0-rc.1 < 2.0.0. Unparsable numbers get "" and sort first.
+    match = VERSION_PATTERN.match(version_number or "")
+    if not match:
+        return ""
+    key = ".".join(f"{int(part or 0):010d}" for part in match.group(1, 2, 3, 4))
+    prerelease = match.group(5)
+    if not prerelease:
+        return key + "~"
+    return key + "-" + ".".join(f"{int(part):010d}" if part.isdigit() else part for part in prerelease.split("."))
+
+
+def _version_range(spec):
+    #">=2.0 <3.0" -> (SQL condition on version_key, params)
+    operators = {">=": ">=", "<=": "<=", ">": ">", "<": "<", "=": "=", None: "="}
+    conditions, params = [], []
+    for operator, version in RANGE_PATTERN.findall(spec):
+        key = version_sort_key(version)
+        if not key:
+            raise ValueError(f"Invalid version in range: {version}")
+        conditions.append(f"version_key {operators[operator or None]} ?")
+        params.append(key)
+    if not conditions:
+        raise ValueError(f"Empty version range: {spec!r}")
+    return " AND ".join(conditions), tuple(params)
 
+
+def parse_date(text):
+    #datetime.date for the date formats people type, None for anything else. Day and month are only told apart when one
+    #of them is over 12: 01/02/2024 could be either and is not guessed.
+    text = " ".join((text or "").split())
+    try:
+        match = YEAR_FIRST_DATE.match(text)
+        if match:
+            year, month, day = map(int, match.groups())
+            return datetime.date(year, month, day)
+        match = YEAR_LAST_DATE.match(text)
+        if match:
+            month, day, year = map(int, match.groups())
+            if month > 12:
+                month, day = day, month
+            elif day <= 12 and day != month:
+                return None
+            return datetime.date(year, month, day)
+    except ValueError:
+        return None
+    for date_format in NAMED_MONTH_FORMATS:
         try:
-            self.cursor.execute("ALTER TABLE Patch_Notes ADD COLUMN image_path TEXT;")
-            self.conn.commit()
-        except sqlite3.OperationalError:
+            return datetime.datetime.strptime(text, date_format).date()
+        except ValueError:
             pass
+    return None
+
+
+def canonical_date(text):
+    #Dates are stored as ISO 8601 (YYYY-MM-DD), which sorts and compares as text in date order. Missing and blank dates stay
+    #NULL and "", and text that is not a date is kept as typed rather than lost. Writer connections register this as a SQL function.
+    if text is None:
+        return None
+    text = str(text).strip()
+    date = parse_date(text)
+    return date.isoformat() if date else text
+
+
+def normalize_date(value):
+    #Strict form of canonical_date() for single writes and range bounds: also takes datetime.date, raises ValueError for non-dates
+    if isinstance(value, datetime.datetime):
+        value = value.date()
+    if isinstance(value, datetime.date):
+        return value.isoformat()
+    text = canonical_date(value)
+    if text and parse_date(text) is None:
+        raise ValueError(f"Invalid date: {value!r} (expected YYYY-MM-DD)")
+    return text
+
+
+def date_key(text):
+    #Sort key of a stored date, matching _date_key(): the date when it is ISO, "" (sorting with missing dates) otherwise
+    return text if text and ISO_DATE.fullmatch(text) else ""
 
-    def create_tables(self):
-        self.cursor.executescript("""
+
+def _date_key(column):
+    return f"CASE WHEN {column} GLOB '{ISO_DATE_GLOB}' THEN {column} ELSE '' END"
+
+
+def _date_range(column, since=None, until=None):
+    #(SQL condition, params) keeping since <= column <= until, both inclusive and either open; ("", ()) when unbounded.
+    #Text that never parsed as a date can still sort inside the bounds ("1/5/24"), so it is filtered out by shape.
+    if since is None and until is None:
+        return "", ()
+    return (f" AND {column} BETWEEN ? AND ? AND {column} GLOB '{ISO_DATE_GLOB}'",
+            (normalize_date(since) or MIN_DATE, normalize_date(until) or MAX_DATE))
+
+
+#Schema migrations, applied in order and tracked with PRAGMA user_version
+def _migration_base_schema(conn):
+    conn.execute("""
         CREATE TABLE IF NOT EXISTS Softwares (
             software_id INTEGER PRIMARY KEY AUTOINCREMENT,
             name TEXT NOT NULL
-        );
-                                  
+        )
+    """)
+    conn.execute("""
         CREATE TABLE IF NOT EXISTS Software_Versions (
             version_id INTEGER PRIMARY KEY AUTOINCREMENT,
             software_id INTEGER,
@@ -28,8 +140,9 @@ class VersionController:
             status TEXT,
             notes TEXT,
             FOREIGN KEY (software_id) REFERENCES Softwares(software_id)
-        );
-
+        )
+    """)
+    conn.execute("""
         CREATE TABLE IF NOT EXISTS Updates (
             update_id INTEGER PRIMARY KEY AUTOINCREMENT,
             version_id INTEGER,
@@ -37,8 +150,9 @@ class VersionController:
             update_description TEXT,
             date_applied TEXT,
             FOREIGN KEY (version_id) REFERENCES Software_Versions(version_id)
-        );
-
+        )
+    """)
+    conn.execute("""
         CREATE TABLE IF NOT EXISTS Bugs (
             bug_id INTEGER PRIMARY KEY AUTOINCREMENT,
             version_id INTEGER,
@@ -50,8 +164,9 @@ class VersionController:
             date_reported TEXT,
             date_resolved TEXT,
             FOREIGN KEY (version_id) REFERENCES Software_Versions(version_id)
-        );
-
+        )
+    """)
+    conn.execute("""
         CREATE TABLE IF NOT EXISTS Deployments (
             deployment_id INTEGER PRIMARY KEY AUTOINCREMENT,
             version_id INTEGER,
@@ -59,53 +174,1077 @@ class VersionController:
             deployment_date TEXT,
             deployment_status TEXT,
             FOREIGN KEY (version_id) REFERENCES Software_Versions(version_id)
-        );
-
+        )
+    """)
+    conn.execute("""
         CREATE TABLE IF NOT EXISTS Patch_Notes (
             patch_id INTEGER PRIMARY KEY AUTOINCREMENT,
             version_id INTEGER,
             note_title TEXT,
             note_description TEXT,
-            image_path TEXT,
             FOREIGN KEY (version_id) REFERENCES Software_Versions(version_id)
-        );
+        )
+    """)
+
+
+def _add_missing_column(conn, table, column, definition):
+    columns = [row[1] for row in conn.execute(f"PRAGMA table_info({table})")]
+    if column not in columns:
+        conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+
+
+def _migration_legacy_columns(conn):
+    #Older databases were created before multi-software support and patch note images
+    _add_missing_column(conn, "Software_Versions", "software_id", "INTEGER REFERENCES Softwares(software_id)")
+    _add_missing_column(conn, "Patch_Notes", "image_path", "TEXT")
+
+
+def _migration_lookup_indexes(conn):
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_versions_software ON Software_Versions (software_id, version_id DESC)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_updates_version ON Updates (version_id)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_bugs_version_reported ON Bugs (version_id, date_reported DESC)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_deployments_version ON Deployments (version_id, deployment_id DESC)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_patch_notes_version ON Patch_Notes (version_id, patch_id DESC)")
+
 
-                                  
+def _create_fts_index(conn, table, key, columns):
+    #External-content FTS5 index over table, kept in sync by triggers and backfilled with 'rebuild'
+    fts = f"{table}_FTS"
+    column_list = ", ".join(columns)
+    new_values = ", ".join(f"new.{column}" for column in columns)
+    old_values = ", ".join(f"old.{column}" for column in columns)
+
+    conn.execute(f"CREATE VIRTUAL TABLE {fts} USING fts5({column_list}, content='{table}', content_rowid='{key}')")
+    conn.execute(f"""
+        CREATE TRIGGER {fts}_insert AFTER INSERT ON {table} BEGIN
+            INSERT INTO {fts} (rowid, {column_list}) VALUES (new.{key}, {new_values});
+        END
+    """)
+    conn.execute(f"""
+        CREATE TRIGGER {fts}_delete AFTER DELETE ON {table} BEGIN
+            INSERT INTO {fts} ({fts}, rowid, {column_list}) VALUES ('delete', old.{key}, {old_values});
+        END
+    """)
+    conn.execute(f"""
+        CREATE TRIGGER {fts}_update AFTER UPDATE OF {column_list} ON {table} BEGIN
+            INSERT INTO {fts} ({fts}, rowid, {column_list}) VALUES ('delete', old.{key}, {old_values});
+            INSERT INTO {fts} (rowid, {column_list}) VALUES (new.{key}, {new_values});
+        END
+    """)
+    conn.execute(f"INSERT INTO {fts} ({fts}) VALUES ('rebuild')")
+
+
+def _migration_full_text_search(conn):
+    _create_fts_index(conn, "Bugs", "bug_id", ["title", "description"])
+    _create_fts_index(conn, "Patch_Notes", "patch_id", ["note_title", "note_description"])
+
+
+def _migration_attachment_hashes(conn):
+    #Images live in the attachment store and are referenced by content hash; image_path is only kept for legacy rows
+    _add_missing_column(conn, "Patch_Notes", "image_hash", "TEXT")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_patch_notes_image ON Patch_Notes (image_hash) WHERE image_hash IS NOT NULL")
+
+
+def _delete_orphans(conn):
+    #Rows whose parent is gone; returns {table: deleted rows}
+    counts = {}
+    for table in ("Updates", "Bugs", "Deployments", "Patch_Notes"):
+        counts[table] = conn.execute(f"""
+            DELETE FROM {table}
+            WHERE version_id IS NOT NULL AND version_id NOT IN (SELECT version_id FROM Software_Versions)
+        """).rowcount
+    counts["Software_Versions"] = conn.execute("""
+        DELETE FROM Software_Versions
+        WHERE software_id IS NOT NULL AND software_id NOT IN (SELECT software_id FROM Softwares)
+    """).rowcount
+    return counts
+
+
+def _rebuild_with_cascade(conn, table):
+    #SQLite cannot alter a foreign key, so the table is recreated from its own CREATE statement with ON DELETE CASCADE added.
+    #Indexes and triggers are dropped along with the old table and recreated afterwards; AUTOINCREMENT counters are carried over.
+    create_sql = conn.execute("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = ?", (table,)).fetchone()[0]
+    dependents = [row[0] for row in conn.execute(
+        "SELECT sql FROM sqlite_master WHERE tbl_name = ? AND type IN ('index', 'trigger') AND sql IS NOT NULL", (table,))]
+    sequence = conn.execute("SELECT seq FROM sqlite_sequence WHERE name = ?", (table,)).fetchone()
+
+    create_sql = re.sub(r"(REFERENCES\s+\w+\s*\(\s*\w+\s*\))(?!\s*ON DELETE)", r"\1 ON DELETE CASCADE", create_sql, flags=re.I)
+    create_sql = re.sub(r"^\s*CREATE TABLE\s+(IF NOT EXISTS\s+)?\"?\w+\"?", f"CREATE TABLE {table}_rebuild", create_sql, flags=re.I)
+    conn.execute(create_sql)
+    conn.execute(f"INSERT INTO {table}_rebuild SELECT * FROM {table}")
+    conn.execute(f"DROP TABLE {table}")
+    conn.execute(f"ALTER TABLE {table}_rebuild RENAME TO {table}")
+    for sql in dependents:
+        conn.execute(sql)
+    if sequence:
+        conn.execute("UPDATE sqlite_sequence SET seq = max(seq, ?) WHERE name = ?", (sequence[0], table))
+
+
+def _migration_cascading_deletes(conn):
+    #Runs with foreign_keys off (see migrate), so orphans left by the old delete_version are removed first
+    _delete_orphans(conn)
+    for table in ("Software_Versions", "Updates", "Bugs", "Deployments", "Patch_Notes"):
+        _rebuild_with_cascade(conn, table)
+
+
+def _migration_software_archive(conn):
+    #Archived softwares keep their data but are left out of the software lists
+    _add_missing_column(conn, "Softwares", "archived", "INTEGER NOT NULL DEFAULT 0")
+
+
+def _migration_version_sort_key(conn):
+    #version_key was first filled by triggers through the version_sort_key() SQL function (replaced in _migration_portable_version_key)
+    _add_missing_column(conn, "Software_Versions", "version_key", "TEXT NOT NULL DEFAULT ''")
+    conn.execute("UPDATE Software_Versions SET version_key = version_sort_key(version_number)")
+    conn.execute("""
+        CREATE TRIGGER Software_Versions_key_insert AFTER INSERT ON Software_Versions BEGIN
+            UPDATE Software_Versions SET version_key = version_sort_key(new.version_number) WHERE version_id = new.version_id;
+        END
+    """)
+    conn.execute("""
+        CREATE TRIGGER Software_Versions_key_update AFTER UPDATE OF version_number ON Software_Versions BEGIN
+            UPDATE Software_Versions SET version_key = version_sort_key(new.version_number) WHERE version_id = new.version_id;
+        END
+    """)
+    conn.execute("CREATE INDEX idx_versions_software_key ON Software_Versions (software_id, version_key DESC, version_id DESC)")
+    #The new index also serves plain software_id lookups
+    conn.execute("DROP INDEX IF EXISTS idx_versions_software")
+
+
+#(metric, bucket expression) counted per software; a deployment metric is "deployment:<environment>" bucketed by status
+STATS_BUCKETS = {
+    "Bugs": [("'bug_severity'", "COALESCE({row}.severity, '')"), ("'bug_status'", "COALESCE({row}.status, '')")],
+    "Deployments": [("'deployment:' || COALESCE({row}.environment, '')", "COALESCE({row}.deployment_status, '')")],
+}
+
+
+def _migration_software_stats(conn):
+    #Counters per (software, metric, bucket), adjusted by triggers so reading them never scans history
+    conn.execute("""
+        CREATE TABLE Software_Stats (
+            software_id INTEGER NOT NULL REFERENCES Softwares(software_id) ON DELETE CASCADE,
+            metric TEXT NOT NULL,
+            bucket TEXT NOT NULL,
+            count INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (software_id, metric, bucket)
+        ) WITHOUT ROWID
+    """)
+    for table, buckets in STATS_BUCKETS.items():
+        increments, decrements = [], []
+        for metric, bucket in buckets:
+            conn.execute(f"""
+                INSERT INTO Software_Stats (software_id, metric, bucket, count)
+                SELECT V.software_id, {metric.format(row="T")}, {bucket.format(row="T")}, COUNT(*)
+                FROM {table} T JOIN Software_Versions V ON T.version_id = V.version_id
+                WHERE V.software_id IS NOT NULL
+                GROUP BY 1, 2, 3
+            """)
+            increments.append(f"""
+                INSERT INTO Software_Stats (software_id, metric, bucket, count)
+                SELECT software_id, {metric.format(row="new")}, {bucket.format(row="new")}, 1
+                FROM Software_Versions WHERE version_id = new.version_id AND software_id IS NOT NULL
+                ON CONFLICT (software_id, metric, bucket) DO UPDATE SET count = count + 1;
+            """)
+            decrements.append(f"""
+                UPDATE Software_Stats SET count = count - 1
+                WHERE software_id = (SELECT software_id FROM Software_Versions WHERE version_id = old.version_id)
+                AND metric = {metric.format(row="old")} AND bucket = {bucket.format(row="old")};
+            """)
+        columns = {"Bugs": "version_id, severity, status", "Deployments": "version_id, environment, deployment_status"}[table]
+        conn.execute(f"CREATE TRIGGER {table}_stats_insert AFTER INSERT ON {table} BEGIN {''.join(increments)} END")
+        conn.execute(f"CREATE TRIGGER {table}_stats_delete AFTER DELETE ON {table} BEGIN {''.join(decrements)} END")
+        conn.execute(f"CREATE TRIGGER {table}_stats_update AFTER UPDATE OF {columns} ON {table} BEGIN {''.join(decrements + increments)} END")
+
+    #Rows removed through a version's ON DELETE CASCADE no longer find their version, so the version takes its counts with it first
+    version_decrements = []
+    for table, buckets in STATS_BUCKETS.items():
+        for metric, bucket in buckets:
+            version_decrements.append(f"""
+                UPDATE Software_Stats SET count = count - (
+                    SELECT COUNT(*) FROM {table} T
+                    WHERE T.version_id = old.version_id
+                    AND {metric.format(row="T")} = Software_Stats.metric AND {bucket.format(row="T")} = Software_Stats.bucket)
+                WHERE software_id = old.software_id;
+            """)
+    conn.execute(f"CREATE TRIGGER Software_Versions_stats_delete BEFORE DELETE ON Software_Versions BEGIN {''.join(version_decrements)} END")
+
+
+#Timeline bucket widths in days, finest first; each level is eight times coarser than the one before
+TIMELINE_LEVELS = (1, 8, 64, 512)
+#Buckets per timeline tile, the unit the timeline reads and caches
+TIMELINE_TILE = 256
+#Per table on the timeline: (kind, date column, owning software of {row})
+TIMELINE_EVENTS = {
+    "Software_Versions": ("version", "release_date", "{row}.software_id"),
+    "Deployments": ("deployment", "deployment_date", "(SELECT software_id FROM Software_Versions WHERE version_id = {row}.version_id)"),
+    "Bugs": ("bug", "date_reported", "(SELECT software_id FROM Software_Versions WHERE version_id = {row}.version_id)"),
+}
+
+
+def _timeline_day(row, column):
+    #Whole julian day number of a date; NULL for dates SQLite cannot parse
+    return f"CAST(julianday({row}.{column}) AS INTEGER)"
+
+
+def _migration_timeline_buckets(conn):
+    #Event counts per (software, level, bucket, kind) kept current by triggers, so any zoom level of the timeline
+    #is drawn from a few hundred pre-aggregated rows instead of the events themselves
+    conn.execute("CREATE TABLE Timeline_Levels (days INTEGER PRIMARY KEY)")
+    conn.executemany("INSERT INTO Timeline_Levels (days) VALUES (?)", [(days,) for days in TIMELINE_LEVELS])
+    conn.execute("""
+        CREATE TABLE Timeline_Buckets (
+            software_id INTEGER NOT NULL REFERENCES Softwares(software_id) ON DELETE CASCADE,
+            days INTEGER NOT NULL,
+            bucket INTEGER NOT NULL,
+            kind TEXT NOT NULL,
+            count INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (software_id, days, bucket, kind)
+        ) WITHOUT ROWID
+    """)
+
+    for table, (kind, column, software) in TIMELINE_EVENTS.items():
+        conn.execute(f"""
+            INSERT INTO Timeline_Buckets (software_id, days, bucket, kind, count)
+            SELECT E.software_id, L.days, E.day / L.days, '{kind}', COUNT(*)
+            FROM (SELECT {software.format(row="T")} AS software_id, {_timeline_day("T", column)} AS day FROM {table} T) E, Timeline_Levels L
+            WHERE E.software_id IS NOT NULL AND E.day IS NOT NULL
+            GROUP BY 1, 2, 3
         """)
-        self.conn.commit()
+        increment = f"""
+            INSERT INTO Timeline_Buckets (software_id, days, bucket, kind, count)
+            SELECT E.software_id, L.days, E.day / L.days, '{kind}', 1
+            FROM (SELECT {software.format(row="new")} AS software_id, {_timeline_day("new", column)} AS day) E, Timeline_Levels L
+            WHERE E.software_id IS NOT NULL AND E.day IS NOT NULL
+            ON CONFLICT (software_id, days, bucket, kind) DO UPDATE SET count = count + 1;
+        """
+        decrement = f"""
+            UPDATE Timeline_Buckets SET count = count - 1
+            WHERE software_id = {software.format(row="old")} AND kind = '{kind}'
+            AND (days, bucket) IN (SELECT days, {_timeline_day("old", column)} / days FROM Timeline_Levels);
+        """
+        owner = "software_id" if table == "Software_Versions" else "version_id"
+        conn.execute(f"CREATE TRIGGER {table}_timeline_insert AFTER INSERT ON {table} BEGIN {increment} END")
+        conn.execute(f"CREATE TRIGGER {table}_timeline_delete AFTER DELETE ON {table} BEGIN {decrement} END")
+        conn.execute(f"CREATE TRIGGER {table}_timeline_update AFTER UPDATE OF {owner}, {column} ON {table} BEGIN {decrement + increment} END")
+
+    #As with Software_Stats, rows removed through a version's ON DELETE CASCADE no longer find their software, so the version removes them first
+    version_decrements = []
+    for table, (kind, column, _) in TIMELINE_EVENTS.items():
+        if table == "Software_Versions":
+            continue
+        version_decrements.append(f"""
+            UPDATE Timeline_Buckets SET count = count - D.removed
+            FROM (
+                SELECT L.days AS days, {_timeline_day("T", column)} / L.days AS bucket, COUNT(*) AS removed
+                FROM {table} T, Timeline_Levels L
+                WHERE T.version_id = old.version_id AND {_timeline_day("T", column)} IS NOT NULL
+                GROUP BY 1, 2
+            ) D
+            WHERE Timeline_Buckets.software_id = old.software_id AND Timeline_Buckets.kind = '{kind}'
+            AND Timeline_Buckets.days = D.days AND Timeline_Buckets.bucket = D.bucket;
+        """)
+    conn.execute(f"CREATE TRIGGER Software_Versions_timeline_cascade BEFORE DELETE ON Software_Versions BEGIN {''.join(version_decrements)} END")
+
+
+#A bug in one of these statuses counts as resolved; date_resolved is stamped when a bug moves into them and cleared when it moves out
+RESOLVED_STATUSES = ("Resolved", "Closed")
+RESOLVED_TODAY = "date('now', 'localtime')"
+PENDING_DEPLOYMENT_STATUS = "Pending"
+SUCCESSFUL_DEPLOYMENT_STATUS = "Successful"
+FAILED_DEPLOYMENT_STATUS = "Failed"
+DEPLOYMENT_STATUSES = (PENDING_DEPLOYMENT_STATUS, SUCCESSFUL_DEPLOYMENT_STATUS, FAILED_DEPLOYMENT_STATUS)
+#julianday() of 1970-01-01, to turn SQLite dates into days since the Unix epoch
+UNIX_EPOCH_JULIAN_DAY = 2440587.5
+
+
+def _epoch_day(column):
+    #Whole days since 1970-01-01; NULL for missing or unparsable dates
+    return f"CAST(julianday({column}) - {UNIX_EPOCH_JULIAN_DAY} AS INTEGER)"
+
+
+def _resolved_sql(status):
+    return f"{status} IN ({', '.join(repr(value) for value in RESOLVED_STATUSES)})"
+
+
+def _migration_bug_lifecycle(conn):
+    #Status changes stamp or clear date_resolved (new bugs and imports keep the date they are given, if any).
+    #Existing resolved bugs keep a NULL date_resolved: when they were resolved is not known.
+    conn.execute(f"""
+        CREATE TRIGGER Bugs_resolved_update AFTER UPDATE OF status ON Bugs
+        WHEN ({_resolved_sql("new.status")}) IS NOT ({_resolved_sql("old.status")}) BEGIN
+            UPDATE Bugs SET date_resolved = CASE WHEN {_resolved_sql("new.status")} THEN {RESOLVED_TODAY} END
+            WHERE bug_id = new.bug_id;
+        END
+    """)
+    #The per-version indexes also carry the columns the reliability metrics read, so those reads never touch the table rows
+    conn.execute("CREATE INDEX idx_bugs_version_lifecycle ON Bugs (version_id, date_reported DESC, severity, status, date_resolved)")
+    conn.execute("DROP INDEX IF EXISTS idx_bugs_version_reported")
+    conn.execute("CREATE INDEX idx_deployments_version_status ON Deployments (version_id, deployment_id DESC, deployment_status)")
+    conn.execute("DROP INDEX IF EXISTS idx_deployments_version")
+
+
+#Date columns written through canonical_date()
+DATE_COLUMNS = {
+    "Software_Versions": ("release_date",),
+    "Bugs": ("date_reported", "date_resolved"),
+    "Deployments": ("deployment_date",),
+}
+
+
+def _migration_canonical_dates(conn):
+    #Rewrites existing dates in canonical form (the timeline triggers pick up dates that only now parse) and indexes them
+    #per owner so range queries seek instead of scanning. Bugs are already covered by idx_bugs_version_lifecycle.
+    for table, columns in DATE_COLUMNS.items():
+        for column in columns:
+            conn.execute(f"UPDATE {table} SET {column} = canonical_date({column}) WHERE {column} IS NOT canonical_date({column})")
+    conn.execute("CREATE INDEX idx_versions_software_release ON Software_Versions (software_id, release_date)")
+    conn.execute("CREATE INDEX idx_deployments_version_date ON Deployments (version_id, deployment_date, environment, deployment_status)")
+
+
+#software_id of the version of a row R in _insert_many()
+_OWNER_OF_ROW = "(SELECT software_id FROM Software_Versions V WHERE V.version_id = R.version_id)"
+#Child tables that carry their version's software_id, with the key their pages are ordered by
+SOFTWARE_OWNED = {
+    "Bugs": ("bug_id", "COALESCE(date_reported, ''), bug_id"),
+    "Deployments": ("deployment_id", "deployment_id"),
+    "Patch_Notes": ("patch_id", "patch_id"),
+}
+
+
+def _migration_software_owner(conn):
+    #A copy of the version's software_id on each child row, kept by triggers, so a software's pages are one index range
+    #in page order: the keyset cursor seeks instead of sorting every row of the software behind the version join
+    for table, (key, order) in SOFTWARE_OWNED.items():
+        _add_missing_column(conn, table, "software_id", "INTEGER")
+        conn.execute(f"UPDATE {table} SET software_id = (SELECT software_id FROM Software_Versions V WHERE V.version_id = {table}.version_id)")
+        owner = f"""
+            UPDATE {table} SET software_id = (SELECT software_id FROM Software_Versions WHERE version_id = new.version_id)
+            WHERE {key} = new.{key};
+        """
+        conn.execute(f"CREATE TRIGGER {table}_software_insert AFTER INSERT ON {table} BEGIN {owner} END")
+        conn.execute(f"CREATE TRIGGER {table}_software_update AFTER UPDATE OF version_id ON {table} BEGIN {owner} END")
+        conn.execute(f"CREATE INDEX idx_{table.lower()}_software_page ON {table} (software_id, {order})")
+    moves = "".join(f"UPDATE {table} SET software_id = new.software_id WHERE version_id = new.version_id;" for table in SOFTWARE_OWNED)
+    conn.execute(f"CREATE TRIGGER Software_Versions_software_update AFTER UPDATE OF software_id ON Software_Versions BEGIN {moves} END")
+
+
+#Prefix lengths FTS5 keeps a prefix index for; shorter words typed last only match whole words (see _fts_query)
+FTS_PREFIX_SIZES = (2, 3)
+FTS_TABLES = {
+    "Bugs": ("bug_id", ["title", "description"]),
+    "Patch_Notes": ("patch_id", ["note_title", "note_description"]),
+}
+
+
+def _migration_search_scope(conn):
+    #Rebuilds the FTS indexes with a prefix index and the row's software_id as an indexed term, so a search of one software
+    #is narrowed inside the index instead of ranking every match and dropping the other softwares' hits afterwards.
+    #The indexed software is always the software of the row's version: it is looked up from the version rather than taken
+    #from the software_id column, which the owner triggers only fill in after the row is indexed.
+    for table, (key, columns) in FTS_TABLES.items():
+        fts = f"{table}_FTS"
+        for suffix in ("insert", "delete", "update"):
+            conn.execute(f"DROP TRIGGER IF EXISTS {fts}_{suffix}")
+        conn.execute(f"DROP TABLE IF EXISTS {fts}")
+
+        column_list = ", ".join(columns + ["software_id"])
+        text_list = ", ".join(columns)
+        prefix = " ".join(str(size) for size in FTS_PREFIX_SIZES)
+
+        def values(row, software):
+            return ", ".join(f"{row}{column}" for column in columns) + f", {software}"
+
+        owner = "(SELECT software_id FROM Software_Versions WHERE version_id = new.version_id)"
+        conn.execute(f"CREATE VIRTUAL TABLE {fts} USING fts5({column_list}, content='{table}', content_rowid='{key}', prefix='{prefix}')")
+        conn.execute(f"""
+            CREATE TRIGGER {fts}_insert AFTER INSERT ON {table} BEGIN
+                INSERT INTO {fts} (rowid, {column_list}) VALUES (new.{key}, {values("new.", owner)});
+            END
+        """)
+        conn.execute(f"""
+            CREATE TRIGGER {fts}_delete AFTER DELETE ON {table} BEGIN
+                INSERT INTO {fts} ({fts}, rowid, {column_list}) VALUES ('delete', old.{key}, {values("old.", "old.software_id")});
+            END
+        """)
+        conn.execute(f"""
+            CREATE TRIGGER {fts}_update AFTER UPDATE OF {text_list}, version_id ON {table} BEGIN
+                INSERT INTO {fts} ({fts}, rowid, {column_list}) VALUES ('delete', old.{key}, {values("old.", "old.software_id")});
+                INSERT INTO {fts} (rowid, {column_list}) VALUES (new.{key}, {values("new.", owner)});
+            END
+        """)
+        conn.execute(f"""
+            CREATE TRIGGER {fts}_software_update AFTER UPDATE OF software_id ON Software_Versions
+            WHEN old.software_id IS NOT new.software_id BEGIN
+                INSERT INTO {fts} ({fts}, rowid, {column_list}) SELECT 'delete', {key}, {values("", "old.software_id")} FROM {table} WHERE version_id = new.version_id;
+                INSERT INTO {fts} (rowid, {column_list}) SELECT {key}, {values("", "new.software_id")} FROM {table} WHERE version_id = new.version_id;
+            END
+        """)
+        conn.execute(f"INSERT INTO {fts} ({fts}) VALUES ('rebuild')")
+
+
+def _migration_version_move(conn):
+    #A version moved to another software takes its bugs' and deployments' counts along. The app never moves versions,
+    #but other tools writing the file can, and the owner and search triggers already follow such a move.
+    moves = []
+    for table, buckets in STATS_BUCKETS.items():
+        for metric, bucket in buckets:
+            moved = f"""
+                SELECT {metric.format(row="T")} AS metric, {bucket.format(row="T")} AS bucket, COUNT(*) AS moved
+                FROM {table} T WHERE T.version_id = new.version_id GROUP BY 1, 2
+            """
+            moves.append(f"""
+                UPDATE Software_Stats SET count = count - M.moved FROM ({moved}) M
+                WHERE Software_Stats.software_id = old.software_id
+                AND Software_Stats.metric = M.metric AND Software_Stats.bucket = M.bucket;
+                INSERT INTO Software_Stats (software_id, metric, bucket, count)
+                SELECT new.software_id, metric, bucket, moved FROM ({moved}) WHERE new.software_id IS NOT NULL
+                ON CONFLICT (software_id, metric, bucket) DO UPDATE SET count = count + excluded.count;
+            """)
+    for table, (kind, column, _) in TIMELINE_EVENTS.items():
+        if table == "Software_Versions":
+            continue
+        moved = f"""
+            SELECT L.days AS days, {_timeline_day("T", column)} / L.days AS bucket, COUNT(*) AS moved
+            FROM {table} T, Timeline_Levels L
+            WHERE T.version_id = new.version_id AND {_timeline_day("T", column)} IS NOT NULL
+            GROUP BY 1, 2
+        """
+        moves.append(f"""
+            UPDATE Timeline_Buckets SET count = count - M.moved FROM ({moved}) M
+            WHERE Timeline_Buckets.software_id = old.software_id AND Timeline_Buckets.kind = '{kind}'
+            AND Timeline_Buckets.days = M.days AND Timeline_Buckets.bucket = M.bucket;
+            INSERT INTO Timeline_Buckets (software_id, days, bucket, kind, count)
+            SELECT new.software_id, days, bucket, '{kind}', moved FROM ({moved}) WHERE new.software_id IS NOT NULL
+            ON CONFLICT (software_id, days, bucket, kind) DO UPDATE SET count = count + excluded.count;
+        """)
+    conn.execute(f"""
+        CREATE TRIGGER Software_Versions_aggregates_move AFTER UPDATE OF software_id ON Software_Versions
+        WHEN old.software_id IS NOT new.software_id BEGIN {''.join(moves)} END
+    """)
+
+
+def _migration_portable_version_key(conn):
+    #version_key is now written by the controller (see _version_rows) instead of triggers calling the version_sort_key()
+    #Python function, so other SQLite clients can insert and rename versions; their rows are re-keyed by refresh_version_keys()
+    conn.execute("DROP TRIGGER IF EXISTS Software_Versions_key_insert")
+    conn.execute("DROP TRIGGER IF EXISTS Software_Versions_key_update")
+
+
+def _migration_direct_owner(conn):
+    #The controller now writes software_id in the INSERT itself, so the owner trigger only fills it in for rows other
+    #clients insert without one, instead of updating every row it just inserted
+    for table, (key, _) in SOFTWARE_OWNED.items():
+        conn.execute(f"DROP TRIGGER IF EXISTS {table}_software_insert")
+        conn.execute(f"""
+            CREATE TRIGGER {table}_software_insert AFTER INSERT ON {table} WHEN new.software_id IS NULL BEGIN
+                UPDATE {table} SET software_id = (SELECT software_id FROM Software_Versions WHERE version_id = new.version_id)
+                WHERE {key} = new.{key};
+            END
+        """)
+
+
+def _migration_bug_date_order(conn):
+    #Bug pages order by _date_key() so text that is not a date sorts with the undated bugs instead of ahead of every date
+    conn.execute("DROP INDEX IF EXISTS idx_bugs_software_page")
+    conn.execute(f"CREATE INDEX idx_bugs_software_page ON Bugs (software_id, {_date_key('date_reported')}, bug_id)")
+
+
+MIGRATIONS = [
+    _migration_base_schema,
+    _migration_legacy_columns,
+    _migration_lookup_indexes,
+    _migration_full_text_search,
+    _migration_attachment_hashes,
+    _migration_cascading_deletes,
+    _migration_software_archive,
+    _migration_version_sort_key,
+    _migration_software_stats,
+    _migration_timeline_buckets,
+    _migration_bug_lifecycle,
+    _migration_canonical_dates,
+    _migration_software_owner,
+    _migration_search_scope,
+    _migration_version_move,
+    _migration_bug_date_order,
+    _migration_portable_version_key,
+    _migration_direct_owner,
+]
+
+SCHEMA_VERSION = len(MIGRATIONS)
+
+PAGE_SIZE = 50
+
+#Columns moved by import/export, in dependency order; the first column is the primary key
+TABLE_COLUMNS = {
+    "Softwares": ["software_id", "name", "archived"],
+    "Software_Versions": ["version_id", "software_id", "version_number", "release_date", "status", "notes"],
+    "Bugs": ["bug_id", "version_id", "title", "description", "severity", "status", "assigned_to", "date_reported", "date_resolved"],
+    "Deployments": ["deployment_id", "version_id", "environment", "deployment_date", "deployment_status"],
+    "Patch_Notes": ["patch_id", "version_id", "note_title", "note_description", "image_path", "image_hash"],
+}
+#0/1 columns that fall back to 0 when an import leaves them blank or out (exports from before they existed)
+FLAG_COLUMNS = {
+    "Softwares": ("archived",),
+}
+#Columns insert_rows() fills from another column of the row: {column: (source column, function)}
+DERIVED_COLUMNS = {
+    "Software_Versions": {"version_key": ("version_number", version_sort_key)},
+}
+IMPORT_CHUNK_SIZE = 10000
+
+SEARCH_KINDS = ("bug", "patch_note")
+MIN_PREFIX_CHARS = FTS_PREFIX_SIZES[0]
+
+#Connection tuning; several app instances may share one database file
+BUSY_TIMEOUT_MS = 5000
+CACHE_SIZE_KB = 16 * 1024
+MMAP_SIZE = 256 * 1024 * 1024
+READ_POOL_SIZE = 3
+
+#Tables each cached read depends on; a write to one of them drops the matching entries
+CACHE_DEPENDENCIES = {
+    "softwares": {"Softwares"},
+    "versions": {"Software_Versions"},
+    "bugs": {"Bugs", "Software_Versions"},
+    "deployments": {"Deployments", "Software_Versions"},
+    "patch_notes": {"Patch_Notes", "Software_Versions"},
+    "summary": {"Software_Versions", "Bugs", "Deployments", "Patch_Notes"},
+    "stats": {"Software_Versions", "Bugs", "Deployments"},
+    "timeline": {"Software_Versions", "Bugs", "Deployments"},
+}
+#Budget counted in cached rows, a stand-in for memory that needs no per-object sizing
+CACHE_BUDGET_ROWS = 50000
+
+
+def _connect(db_path, read_only=False, instrumentation=None):
+    #With instrumentation (an instrumentation.QueryStats) every statement on the connection is timed and counted
+    factory = InstrumentedConnection if instrumentation else sqlite3.Connection
+    if read_only:
+        conn = sqlite3.connect(Path(db_path).resolve().as_uri() + "?mode=ro", uri=True, check_same_thread=False, factory=factory)
+    else:
+        #Writes may run on any one thread at a time (the app's DatabaseWorker, or the CLI's main thread)
+        conn = sqlite3.connect(db_path, check_same_thread=False, factory=factory)
+        conn.create_function("version_sort_key", 1, version_sort_key, deterministic=True)
+        conn.create_function("canonical_date", 1, canonical_date, deterministic=True)
+        #Only takes effect on a new database; existing ones switch over on their next full VACUUM (see vacuum())
+        conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+        conn.execute("PRAGMA foreign_keys = ON")
+        #WAL lets readers keep going while the writer commits, and NORMAL only syncs at checkpoints
+        conn.execute("PRAGMA journal_mode = WAL")
+        conn.execute("PRAGMA synchronous = NORMAL")
+    conn.execute(f"PRAGMA busy_timeout = {BUSY_TIMEOUT_MS}")
+    conn.execute(f"PRAGMA cache_size = -{CACHE_SIZE_KB}")
+    conn.execute(f"PRAGMA mmap_size = {MMAP_SIZE}")
+    if instrumentation:
+        conn.instrumentation = instrumentation
+    return conn
+
+
+def _fts_query(text, software_id=None):
+    #Quote every word so user input is never parsed as FTS syntax. The last word matches as a prefix while typing once it is
+    #MIN_PREFIX_CHARS long (a single letter would match most of the index). Words only match the text columns.
+    words = text.split()
+    if not words:
+        return ""
+    phrases = ['"' + word.replace('"', '""') + '"' for word in words]
+    if len(words[-1]) >= MIN_PREFIX_CHARS:
+        phrases[-1] += "*"
+    match = f"- {{software_id}} : ({' '.join(phrases)})"
+    if software_id:
+        match += f' AND software_id : "{int(software_id)}"'
+    return match
+
+
+def _cursor(conn, model=None):
+    cursor = conn.cursor()
+    if model:
+        cursor.row_factory = row_factory(model)
+    return cursor
+
+
+class ReadPool:
+    #Read-only connections handed out to one caller at a time, so background threads can query while the writer writes.
+    #Connections are opened on first demand, so startup does not pay for ones that are never used.
+    def __init__(self, db_path, size=READ_POOL_SIZE, instrumentation=None):
+        self.db_path = db_path
+        self.instrumentation = instrumentation
+        self.connections = queue.Queue()
+        self.size = size
+        self.opened = 0
+        self.lock = threading.Lock()
+
+    @contextmanager
+    def connection(self):
+        try:
+            conn = self.connections.get_nowait()
+        except queue.Empty:
+            with self.lock:
+                open_new = self.opened < self.size
+                if open_new:
+                    self.opened += 1
+            conn = _connect(self.db_path, read_only=True, instrumentation=self.instrumentation) if open_new else self.connections.get()
+        try:
+            yield conn
+        finally:
+            self.connections.put(conn)
+
+    def close(self):
+        for _ in range(self.opened):
+            self.connections.get().close()
+
+
+#Bound parameters per statement in SQLite builds before 3.32 (later ones allow 32766)
+MAX_VARIABLES = 999
+
+
+def _insert_many(cursor, table, fields, rows, expressions=None):
+    #Inserts row tuples whose values are named by fields, as many rows per statement as MAX_VARIABLES allows:
+    #WITH R(fields) AS (VALUES ...) INSERT INTO table SELECT ... FROM R. expressions maps columns to SQL over R's fields,
+    #replacing or adding to the fields. Rows share statements because SQLite opens a savepoint for every statement that
+    #fires triggers and FTS5 flushes its pending terms at each one, so one row per statement wrote an index segment per row.
+    expressions = expressions or {}
+    targets = list(fields) + [column for column in expressions if column not in fields]
+    select = ", ".join(expressions.get(column, column) for column in targets)
+    per_statement = max(1, MAX_VARIABLES // len(fields))
+    placeholders = "(" + ", ".join("?" * len(fields)) + ")"
+    rows = iter(rows)
+    count = 0
+    while True:
+        chunk = list(islice(rows, per_statement))
+        if not chunk:
+            return count
+        cursor.execute(f"""
+            WITH R ({', '.join(fields)}) AS (VALUES {', '.join([placeholders] * len(chunk))})
+            INSERT INTO {table} ({', '.join(targets)}) SELECT {select} FROM R
+        """, [value for row in chunk for value in row])
+        count += len(chunk)
+
+
+def _pack(value):
+    #Cached row lists are kept as PackedRows; page reads are (rows, next_cursor)
+    if isinstance(value, list) and value and hasattr(value[0], "_fields"):
+        return PackedRows(value)
+    if type(value) is tuple and value and isinstance(value[0], list) and value[0] and hasattr(value[0][0], "_fields"):
+        return (PackedRows(value[0]),) + value[1:]
+    return value
+
+
+def _unpack(stored):
+    #Every hit gets rows of its own, so callers never share (or mutate) what is cached
+    if isinstance(stored, PackedRows):
+        return stored.rows()
+    if type(stored) is tuple and stored and isinstance(stored[0], PackedRows):
+        return (stored[0].rows(),) + stored[1:]
+    return stored
+
+
+class EntityCache:
+    #Read-through LRU of query results keyed by (entity, software_id, args); software_id None means "not per software".
+    #Reads run on worker threads while writes may invalidate from another thread, so a result is only stored if nothing was invalidated while it loaded.
+    #data_version() returns a value that changes whenever another connection (e.g. another app instance) commits; everything is dropped when it does.
+    def __init__(self, budget=CACHE_BUDGET_ROWS, data_version=None):
+        self.budget = budget
+        self.data_version = data_version
+        self.seen_version = None
+        self.entries = OrderedDict()
+        self.size = 0
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    def get(self, entity, software_id, args, load):
+        key = (entity, software_id, args)
+        version = self.data_version() if self.data_version else None
+        with self.lock:
+            if version != self.seen_version:
+                self.seen_version = version
+                self._drop_all()
+            stored = self.entries.get(key)
+            if stored is not None:
+                self.entries.move_to_end(key)
+                self.hits += 1
+            else:
+                self.misses += 1
+                generation = self.generation
+        if stored is not None:
+            return _unpack(stored[0])
+
+        value = load()
+        #Page reads return (rows, next_cursor)
+        rows = value[0] if isinstance(value, tuple) else value
+        size = len(rows) if isinstance(rows, (list, dict)) else 1
+        packed = _pack(value)
+        with self.lock:
+            if generation == self.generation and key not in self.entries:
+                self.entries[key] = (packed, size)
+                self.size += size
+                while self.size > self.budget and self.entries:
+                    _, (_, evicted) = self.entries.popitem(last=False)
+                    self.size -= evicted
+        return value
+
+    def invalidate(self, table, software_id=None):
+        with self.lock:
+            self.generation += 1
+            for key in [key for key in self.entries if table in CACHE_DEPENDENCIES[key[0]]]:
+                if software_id is None or key[1] is None or key[1] == software_id:
+                    self.size -= self.entries.pop(key)[1]
+
+    def clear(self):
+        with self.lock:
+            self._drop_all()
+
+    def acknowledge(self, version):
+        #Our own commit moved data_version; invalidate() has already dropped what it changed
+        with self.lock:
+            self.seen_version = version
+
+    def _drop_all(self):
+        self.generation += 1
+        self.entries.clear()
+        self.size = 0
+
+    def stats(self):
+        with self.lock:
+            return {"hits": self.hits, "misses": self.misses, "entries": len(self.entries), "rows": self.size}
+
+
+class VersionController:
+    #instrumentation: an optional instrumentation.QueryStats that records every method call and statement (see get_query_stats)
+    def __init__(self, db_path="versionary.db", attachments_dir=None, instrumentation=None, reencode_format=None):
+        self.db_path = db_path
+        self.instrumentation = instrumentation
+        if instrumentation:
+            instrumentation.wrap(self)
+        self.attachments = AttachmentStore(attachments_dir or attachment_dir(db_path), reencode_format)
+        self.conn = _connect(db_path, instrumentation=instrumentation)
+        self.cursor = self.conn.cursor()
+        self.active_software_id = None
+        self.listeners = []
+        self.batch_depth = 0
+        self.batched_events = set()
+        self.migrate()
+
+        #In-memory databases are private to their connection, so reads stay on the writer there and nothing else can change them
+        if db_path == ":memory:":
+            self.read_pool = self.version_conn = None
+            self.cache = EntityCache()
+        else:
+            self.read_pool = ReadPool(db_path, instrumentation=instrumentation)
+            #The cache's data_version check has a connection of its own, so it never waits on (or runs inside) a write
+            self.version_conn = _connect(db_path, read_only=True, instrumentation=instrumentation)
+            self.data_version_lock = threading.Lock()
+            self.writer_version = self._pragma_data_version(self.conn)
+            self.cache = EntityCache(data_version=self._data_version)
+
+    @contextmanager
+    def _reader(self, model=None):
+        #Cursor on a pooled read connection; rows come back as model instances when a model is given
+        if self.read_pool is None:
+            yield _cursor(self.conn, model)
+            return
+        with self.read_pool.connection() as conn:
+            yield _cursor(conn, model)
+
+    def _read(self, query, params=(), model=None):
+        with self._reader(model) as cursor:
+            return cursor.execute(query, params).fetchall()
+
+    def _read_one(self, query, params=(), model=None):
+        with self._reader(model) as cursor:
+            return cursor.execute(query, params).fetchone()
+
+    def _read_columns(self, query, params, model, dedupe=True):
+        #Large results as one list per field instead of one object per row
+        with self._reader() as cursor:
+            return read_columns(cursor.execute(query, params), model, IMPORT_CHUNK_SIZE, dedupe)
+
+    @staticmethod
+    def _pragma_data_version(conn):
+        return conn.execute("PRAGMA data_version").fetchone()[0]
+
+    def _data_version(self):
+        with self.data_version_lock:
+            return self._pragma_data_version(self.version_conn)
+
+    def _committed(self):
+        #version_conn also sees this controller's own commits, whose changes _notify() invalidates precisely, so the cache is
+        #told to expect the new value. The writer's own data_version only moves for other connections' commits: if it moved,
+        #one of them may have landed just before ours and is hidden behind the acknowledged value, so everything is dropped.
+        if self.version_conn is None:
+            return
+        version = self._data_version()
+        writer_version = self._pragma_data_version(self.conn)
+        if writer_version != self.writer_version:
+            self.writer_version = writer_version
+            self.cache.clear()
+        self.cache.acknowledge(version)
+
+    def get_schema_version(self):
+        return self.conn.execute("PRAGMA user_version").fetchone()[0]
+
+    def migrate(self):
+        current = self.get_schema_version()
+        if current > SCHEMA_VERSION:
+            raise RuntimeError(f"Database schema v{current} is newer than this app supports (v{SCHEMA_VERSION})")
+        if current == SCHEMA_VERSION:
+            #Up to date: no DDL and no pragma changes on a normal launch
+            return
+
+        #Each step runs in its own transaction together with its version bump.
+        #Foreign keys are off meanwhile (the pragma is ignored inside a transaction) so table rebuilds do not cascade.
+        self.conn.execute("PRAGMA foreign_keys = OFF")
+        try:
+            for version in range(current + 1, SCHEMA_VERSION + 1):
+                self.conn.execute("BEGIN")
+                try:
+                    MIGRATIONS[version - 1](self.conn)
+                    self.conn.execute(f"PRAGMA user_version = {version}")
+                except Exception:
+                    self.conn.rollback()
+                    raise
+                self.conn.commit()
+        finally:
+            self.conn.execute("PRAGMA foreign_keys = ON")
+
+    #Change events: listeners are called with the name of the table that changed
+    #("active_software" when the selected software switches)
+    def add_listener(self, callback):
+        self.listeners.append(callback)
+
+    def remove_listener(self, callback):
+        if callback in self.listeners:
+            self.listeners.remove(callback)
+
+    def _notify(self, *tables, software_id=None):
+        #Inside batch() each table is reported once, after the commit
+        #software_id narrows cache invalidation to that software when the write only touched its rows
+        if self.batch_depth:
+            self.batched_events.update((table, software_id) for table in tables)
+            return
+        for table in tables:
+            self.cache.invalidate(table, software_id)
+        self._emit(tables)
+
+    def _emit(self, tables):
+        for table in tables:
+            for callback in list(self.listeners):
+                callback(table)
+
+    def _commit(self):
+        if not self.batch_depth:
+            self.conn.commit()
+            self._committed()
+
+    @contextmanager
+    def batch(self):
+        #Groups any sequence of writes into one transaction; rolled back if the block raises
+        self.batch_depth += 1
+        try:
+            yield self
+        except BaseException:
+            self.batch_depth -= 1
+            if not self.batch_depth:
+                self.conn.rollback()
+                self.batched_events.clear()
+            raise
+
+        self.batch_depth -= 1
+        if not self.batch_depth:
+            self.conn.commit()
+            self._committed()
+            events, self.batched_events = self.batched_events, set()
+            for table, software_id in events:
+                self.cache.invalidate(table, software_id)
+            self._emit(sorted({table for table, _ in events}))
+
+    def _software_of(self, table, key, row_id):
+        #Owning software of a row, read on the writer so uncommitted batch rows are visible
+        if table == "Software_Versions":
+            row = self.conn.execute("SELECT software_id FROM Software_Versions WHERE version_id = ?", (row_id,)).fetchone()
+        else:
+            row = self.conn.execute(f"""
+                SELECT V.software_id FROM {table} T
+                JOIN Software_Versions V ON T.version_id = V.version_id
+                WHERE T.{key} = ?
+            """, (row_id,)).fetchone()
+        return row[0] if row else None
+
+    def get_cache_stats(self):
+        return self.cache.stats()
+
+    def get_query_stats(self):
+        #None unless the controller was created with instrumentation
+        return self.instrumentation.snapshot() if self.instrumentation else None
+
+    def reset_query_stats(self):
+        if self.instrumentation:
+            self.instrumentation.reset()
+
+    def _fetch_page(self, query, params, limit, cursor_of, model=None):
+        #Keyset pagination: fetch one extra row to know whether another page exists
+        rows = self._read(query + " LIMIT ?", params + (limit + 1,), model)
+        if len(rows) > limit:
+            return rows[:limit], cursor_of(rows[limit - 1])
+        return rows, None
 
     def get_latest_version_id_for_active_software(self):
-        self.cursor.execute("""
+        row = self._read_one("""
             SELECT version_id FROM Software_Versions
             WHERE software_id = ?
-            ORDER BY version_id DESC LIMIT 1
+            ORDER BY version_key DESC, version_id DESC LIMIT 1
         """, (self.active_software_id,))
-        row = self.cursor.fetchone()
         return row[0] if row else None
 
+    def get_software_summary(self, software_id):
+        return self.cache.get("summary", software_id, (), lambda: self._load_software_summary(software_id))
+
+    def _load_software_summary(self, software_id):
+        #Latest version, patch note, bug and deployment, each picked through its index
+        rows = self._read(f"""
+            SELECT * FROM (
+                SELECT 'version', version_number, status, NULL FROM Software_Versions
+                WHERE software_id = :sid
+                ORDER BY version_key DESC, version_id DESC LIMIT 1)
+            UNION ALL
+            SELECT * FROM (
+                SELECT 'patch', P.note_title, V.version_number, NULL FROM Patch_Notes P
+                JOIN Software_Versions V ON P.version_id = V.version_id
+                WHERE V.software_id = :sid
+                ORDER BY P.patch_id DESC LIMIT 1)
+            UNION ALL
+            SELECT * FROM (
+                SELECT 'bug', B.title, B.severity, B.status FROM Bugs B
+                WHERE B.software_id = :sid
+                ORDER BY {_date_key("B.date_reported")} DESC, B.bug_id DESC LIMIT 1)
+            UNION ALL
+            SELECT * FROM (
+                SELECT 'deployment', D.environment, D.deployment_date, D.deployment_status FROM Deployments D
+                JOIN Software_Versions V ON D.version_id = V.version_id
+                WHERE V.software_id = :sid
+                ORDER BY D.deployment_id DESC LIMIT 1)
+        """, {"sid": software_id})
+        summary = dict.fromkeys(("version", "patch", "bug", "deployment"))
+        for kind, *fields in rows:
+            summary[kind] = tuple(fields)
+        return summary
+
+    def get_stats(self, software_id):
+        #Bug counts by severity and status and deployment counts and success rate by environment, read from Software_Stats
+        return self.cache.get("stats", software_id, (), lambda: self._load_stats(software_id))
+
+    def _load_stats(self, software_id):
+        stats = {"bugs_by_severity": {}, "bugs_by_status": {}, "deployments": {}, "deployment_success_rate": {}}
+        rows = self._read("SELECT metric, bucket, count FROM Software_Stats WHERE software_id = ? AND count > 0", (software_id,))
+        for metric, bucket, count in rows:
+            if metric == "bug_severity":
+                stats["bugs_by_severity"][bucket] = count
+            elif metric == "bug_status":
+                stats["bugs_by_status"][bucket] = count
+            else:
+                environment = metric.split(":", 1)[1]
+                stats["deployments"].setdefault(environment, {})[bucket] = count
+        #Success rate among completed deployments; environments with only pending ones have no rate yet
+        for environment, statuses in stats["deployments"].items():
+            completed = sum(statuses.values()) - statuses.get(PENDING_DEPLOYMENT_STATUS, 0)
+            if completed:
+                stats["deployment_success_rate"][environment] = statuses.get(SUCCESSFUL_DEPLOYMENT_STATUS, 0) / completed
+        return stats
+
+    def get_timeline_extent(self, software_id):
+        #(first_day, last_day) as julian day numbers of the software's dated events, or None when there are none
+        row = self._read_one("""
+            SELECT MIN(bucket), MAX(bucket) FROM Timeline_Buckets
+            WHERE software_id = ? AND days = ? AND count > 0
+        """, (software_id, TIMELINE_LEVELS[0]))
+        return (row[0], row[1]) if row[0] is not None else None
+
+    def get_timeline_tile(self, software_id, days, tile):
+        #Buckets tile * TIMELINE_TILE .. +TIMELINE_TILE of the level that is days wide, as (buckets, versions):
+        #buckets are (bucket, kind, count) rows; at the finest level versions lists (day, version_id, version_number, status) for labels
+        return self.cache.get("timeline", software_id, (days, tile), lambda: self._load_timeline_tile(software_id, days, tile))
+
+    def _load_timeline_tile(self, software_id, days, tile):
+        first = tile * TIMELINE_TILE
+        last = first + TIMELINE_TILE - 1
+        buckets = self._read("""
+            SELECT bucket, kind, count FROM Timeline_Buckets
+            WHERE software_id = ? AND days = ? AND bucket BETWEEN ? AND ? AND count > 0
+        """, (software_id, days, first, last))
+        versions = []
+        if days == TIMELINE_LEVELS[0] and buckets:
+            versions = self._read(f"""
+                SELECT {_timeline_day("V", "release_date")} AS day, version_id, version_number, status
+                FROM Software_Versions V
+                WHERE software_id = ? AND day BETWEEN ? AND ?
+                ORDER BY day, version_key
+            """, (software_id, first, last))
+        return buckets, versions
+
     #Software Manageme
     def add_software(self, name):
         self.cursor.execute("INSERT INTO Softwares (name) VALUES (?)", (name,))
-        self.conn.commit()
+        self._commit()
+        row_id = self.cursor.lastrowid
+        self._notify("Softwares")
+        return row_id
 
     def update_software(self, software_id, new_name):
-        with self.conn:
-            self.conn.execute("UPDATE Softwares SET name = ? WHERE software_id = ?", (new_name, software_id))
+        self.cursor.execute("UPDATE Softwares SET name = ? WHERE software_id = ?", (new_name, software_id))
+        self._commit()
+        self._notify("Softwares")
 
     def delete_software(self, software_id):
-        with self.conn:
-            self.conn.execute("DELETE FROM Patch_Notes WHERE version_id IN (SELECT version_id FROM Software_Versions WHERE software_id = ?)", (software_id,))
-            self.conn.execute("DELETE FROM Bugs WHERE version_id IN (SELECT version_id FROM Software_Versions WHERE software_id = ?)", (software_id,))
-            self.conn.execute("DELETE FROM Deployments WHERE version_id IN (SELECT version_id FROM Software_Versions WHERE software_id = ?)", (software_id,))
-            self.conn.execute("DELETE FROM Software_Versions WHERE software_id = ?", (software_id,))
+        #Versions and everything under them go through ON DELETE CASCADE
+        with self.batch():
             self.conn.execute("DELETE FROM Softwares WHERE software_id = ?", (software_id,))
+            self._notify("Softwares", "Software_Versions", "Updates", "Bugs", "Deployments", "Patch_Notes", software_id=software_id)
+
+    def add_softwares_many(self, names):
+        with self.batch():
+            self.cursor.executemany("INSERT INTO Softwares (name) VALUES (?)", ((name,) for name in names))
+            self._notify("Softwares")
+        return self.cursor.rowcount
 
     def get_softwares(self):
-        self.cursor.execute("SELECT software_id, name FROM Softwares ORDER BY software_id DESC")
-        return self.cursor.fetchall()
+        return self.cache.get("softwares", None, (), lambda: self._read(
+            "SELECT software_id, name FROM Softwares WHERE archived = 0 ORDER BY software_id DESC", model=Software))
+
+    def get_softwares_page(self, after=None, limit=PAGE_SIZE):
+        return self.cache.get("softwares", None, (after, limit), lambda: self._load_softwares_page(after, limit))
+
+    def _load_softwares_page(self, after, limit):
+        query = "SELECT software_id, name FROM Softwares WHERE archived = 0"
+        params = ()
+        if after is not None:
+            query += " AND software_id < ?"
+            params = (after,)
+        query += " ORDER BY software_id DESC"
+        return self._fetch_page(query, params, limit, lambda row: row[0], Software)
+
+    def get_archived_softwares(self):
+        return self._read("SELECT software_id, name FROM Softwares WHERE archived = 1 ORDER BY software_id DESC", model=Software)
+
+    def archive_software(self, software_id):
+        self.cursor.execute("UPDATE Softwares SET archived = 1 WHERE software_id = ?", (software_id,))
+        self._commit()
+        self._notify("Softwares")
+        return self.cursor.rowcount
+
+    def restore_software(self, software_id):
+        self.cursor.execute("UPDATE Softwares SET archived = 0 WHERE software_id = ?", (software_id,))
+        self._commit()
+        self._notify("Softwares")
+        return self.cursor.rowcount
+
+    def get_software(self, software_id):
+        return self._read_one("SELECT software_id, name FROM Softwares WHERE software_id = ?", (software_id,), Software)
 
     def set_active_software(self, software_id):
-        self.active_software_id = software_id
+        if software_id != self.active_software_id:
+            self.active_software_id = software_id
+            self._notify("active_software")
 
     
 
@@ -114,125 +1253,498 @@ class VersionController:
 
     def add_version(self, software_id, version_number, release_date, status, notes):
         self.cursor.execute("""
-            INSERT INTO Software_Versions (software_id, version_number, release_date, status, notes)
-            VALUES (?, ?, ?, ?, ?)
-        """, (software_id, version_number, release_date, status, notes))
-        self.conn.commit()
+            INSERT INTO Software_Versions (software_id, version_number, release_date, status, notes, version_key)
+            VALUES (?, ?, ?, ?, ?, ?)
+        """, (software_id, version_number, normalize_date(release_date), status, notes, version_sort_key(version_number)))
+        self._commit()
+        row_id = self.cursor.lastrowid
+        self._notify("Software_Versions", software_id=software_id)
+        return row_id
 
-    def get_versions(self, software_id):
-        self.cursor.execute("""
+    def add_versions_many(self, rows):
+        #rows: (software_id, version_number, release_date, status, notes); like imports, dates that do not parse are kept as given
+        with self.batch():
+            count = _insert_many(self.cursor, "Software_Versions",
+                                 ("software_id", "version_number", "release_date", "status", "notes", "version_key"),
+                                 (row + (version_sort_key(row[1]),) for row in rows), {"release_date": "canonical_date(release_date)"})
+            self._notify("Software_Versions")
+        return count
+
+    def get_versions(self, software_id, since=None, until=None):
+        #since/until (dates or date text, inclusive) keep versions released in that range, via the (software_id, release_date) index
+        condition, params = _date_range("release_date", since, until)
+        return self.cache.get("versions", software_id, ("dates", params), lambda: self._load_versions(software_id, condition, params))
+
+    def _load_versions(self, software_id, condition="", params=()):
+        return self._read(f"""
+            SELECT version_id, version_number, release_date, status, notes
+            FROM Software_Versions
+            WHERE software_id = ?{condition}
+            ORDER BY version_key DESC, version_id DESC
+        """, (software_id,) + params, Version)
+
+    def get_versions_page(self, software_id, after=None, limit=PAGE_SIZE):
+        return self.cache.get("versions", software_id, (after, limit), lambda: self._load_versions_page(software_id, after, limit))
+
+    def _load_versions_page(self, software_id, after, limit):
+        query = """
             SELECT version_id, version_number, release_date, status, notes
             FROM Software_Versions
             WHERE software_id = ?
-            ORDER BY version_id DESC
-        """, (software_id,))
-        return self.cursor.fetchall()
+        """
+        params = (software_id,)
+        #Cursor is (version_key, version_id) of the last row, in semantic version order
+        if after is not None:
+            query += " AND (version_key, version_id) < (?, ?)"
+            params += tuple(after)
+        query += " ORDER BY version_key DESC, version_id DESC"
+        return self._fetch_page(query, params, limit, lambda row: (version_sort_key(row.version_number), row.version_id), Version)
 
+    def get_versions_in_range(self, software_id, spec):
+        #spec like ">=2.0 <3.0"; bare versions mean "=". Served by the (software_id, version_key) index
+        condition, params = _version_range(spec)
+        return self.cache.get("versions", software_id, ("range", spec), lambda: self._read(f"""
+            SELECT version_id, version_number, release_date, status, notes
+            FROM Software_Versions
+            WHERE software_id = ? AND {condition}
+            ORDER BY version_key DESC, version_id DESC
+        """, (software_id,) + params, Version))
 
+    def get_version(self, version_id):
+        return self._read_one("""
+            SELECT version_id, version_number, release_date, status, notes
+            FROM Software_Versions
+            WHERE version_id = ?
+        """, (version_id,), Version)
 
     def update_version(self, version_id, version_number, release_date, status, notes):
+        software_id = self._software_of("Software_Versions", "version_id", version_id)
         self.cursor.execute("""
             UPDATE Software_Versions
-            SET version_number = ?, release_date = ?, status = ?, notes = ?
+            SET version_number = ?, release_date = ?, status = ?, notes = ?, version_key = ?
             WHERE version_id = ?
-        """, (version_number, release_date, status, notes, version_id))
-        self.conn.commit()
+        """, (version_number, normalize_date(release_date), status, notes, version_sort_key(version_number), version_id))
+        self._commit()
+        self._notify("Software_Versions", software_id=software_id)
 
     def delete_version(self, version_id):
+        #Its bugs, deployments and patch notes go with it (ON DELETE CASCADE)
+        software_id = self._software_of("Software_Versions", "version_id", version_id)
         self.cursor.execute("DELETE FROM Software_Versions WHERE version_id = ?", (version_id,))
-        self.conn.commit()
+        self._commit()
+        self._notify("Software_Versions", "Updates", "Bugs", "Deployments", "Patch_Notes", software_id=software_id)
+
+    def delete_versions(self, version_ids):
+        with self.batch():
+            self.cursor.executemany("DELETE FROM Software_Versions WHERE version_id = ?", ((version_id,) for version_id in version_ids))
+            self._notify("Software_Versions", "Updates", "Bugs", "Deployments", "Patch_Notes")
+        return self.cursor.rowcount
 
     #Bug Manage
 
-    def add_bug(self, version_id, title, description, severity, status, assigned_to, date_reported):
-        self.cursor.execute("""
-            INSERT INTO Bugs (version_id, title, description, severity, status, assigned_to, date_reported)
-            VALUES (?, ?, ?, ?, ?, ?, ?)
-        """, (version_id, title, description, severity, status, assigned_to, date_reported))
-        self.conn.commit()
+    def add_bug(self, version_id, title, description, severity, status, assigned_to, date_reported, date_resolved=None):
+        #date_resolved is only kept for a resolved status; a bug added as resolved without one has an unknown resolution date
+        software_id = self._software_of("Software_Versions", "version_id", version_id)
+        self.cursor.execute(f"""
+            INSERT INTO Bugs (version_id, title, description, severity, status, assigned_to, date_reported, date_resolved, software_id)
+            VALUES (?, ?, ?, ?, ?5, ?, ?, CASE WHEN {_resolved_sql("?5")} THEN ? END, ?)
+        """, (version_id, title, description, severity, status, assigned_to, normalize_date(date_reported),
+              normalize_date(date_resolved), software_id))
+        self._commit()
+        row_id = self.cursor.lastrowid
+        self._notify("Bugs", software_id=software_id)
+        return row_id
+
+    def add_bugs_many(self, rows):
+        #rows: (version_id, title, description, severity, status, assigned_to, date_reported[, date_resolved]); as in add_bug
+        #a resolved bug without date_resolved keeps it NULL, so backfilled history is never stamped with today
+        fields = ("version_id", "title", "description", "severity", "status", "assigned_to", "date_reported", "date_resolved")
+        with self.batch():
+            count = _insert_many(self.cursor, "Bugs", fields, (tuple(row) + (None,) * (len(fields) - len(row)) for row in rows), {
+                "date_reported": "canonical_date(date_reported)",
+                "date_resolved": f"CASE WHEN {_resolved_sql('status')} THEN canonical_date(date_resolved) END",
+                "software_id": _OWNER_OF_ROW,
+            })
+            self._notify("Bugs")
+        return count
 
     def update_bug(self, bug_id, title, description, severity, status, assigned_to, date_reported):
+        software_id = self._software_of("Bugs", "bug_id", bug_id)
         self.cursor.execute("""
             UPDATE Bugs
             SET title = ?, description = ?, severity = ?, status = ?, assigned_to = ?, date_reported = ?
             WHERE bug_id = ?
-        """, (title, description, severity, status, assigned_to, date_reported, bug_id))
-        self.conn.commit()
+        """, (title, description, severity, status, assigned_to, normalize_date(date_reported), bug_id))
+        self._commit()
+        self._notify("Bugs", software_id=software_id)
 
     def delete_bug(self, bug_id):
+        software_id = self._software_of("Bugs", "bug_id", bug_id)
         self.cursor.execute("DELETE FROM Bugs WHERE bug_id = ?", (bug_id,))
-        self.conn.commit()
+        self._commit()
+        self._notify("Bugs", software_id=software_id)
 
-    def get_bugs_by_software(self, software_id):
-        self.cursor.execute("""
-            SELECT B.bug_id, B.title, B.description, B.severity, B.status, B.assigned_to, B.date_reported, V.version_number
+    def get_bugs_by_software(self, software_id, since=None, until=None):
+        #since/until (dates or date text, inclusive) keep bugs reported in that range; each version's bugs are a range of idx_bugs_version_lifecycle
+        condition, params = _date_range("B.date_reported", since, until)
+        return self.cache.get("bugs", software_id, ("dates", params), lambda: self._load_bugs_by_software(software_id, condition, params))
+
+    def _load_bugs_by_software(self, software_id, condition="", params=()):
+        return self._read(f"""
+            SELECT B.bug_id, B.title, B.description, B.severity, B.status, B.assigned_to, B.date_reported, V.version_number, B.version_id
+            FROM Bugs B
+            JOIN Software_Versions V ON B.version_id = V.version_id
+            WHERE V.software_id = ?{condition}
+            ORDER BY {_date_key("B.date_reported")} DESC, B.bug_id DESC
+        """, (software_id,) + params, Bug)
+
+    def get_bugs_page(self, software_id, after=None, limit=PAGE_SIZE):
+        return self.cache.get("bugs", software_id, (after, limit), lambda: self._load_bugs_page(software_id, after, limit))
+
+    def _load_bugs_page(self, software_id, after, limit):
+        #Cursor is (date_key(date_reported), bug_id) of the last row; bug_id breaks ties on equal dates.
+        #Written as a range on the date plus a tie filter, since SQLite only seeks an expression index on a plain comparison.
+        key = _date_key("B.date_reported")
+        query = """
+            SELECT B.bug_id, B.title, B.description, B.severity, B.status, B.assigned_to, B.date_reported, V.version_number, B.version_id
+            FROM Bugs B
+            JOIN Software_Versions V ON B.version_id = V.version_id
+            WHERE B.software_id = ?
+        """
+        params = (software_id,)
+        if after is not None:
+            date, bug_id = after
+            query += f" AND {key} <= ? AND ({key} < ? OR B.bug_id < ?)"
+            params += (date, date, bug_id)
+        query += f" ORDER BY {key} DESC, B.bug_id DESC"
+        return self._fetch_page(query, params, limit, lambda row: (date_key(row.date_reported), row.bug_id), Bug)
+
+    def get_bug(self, bug_id):
+        return self._read_one("""
+            SELECT B.bug_id, B.title, B.description, B.severity, B.status, B.assigned_to, B.date_reported, V.version_number, B.version_id
+            FROM Bugs B
+            JOIN Software_Versions V ON B.version_id = V.version_id
+            WHERE B.bug_id = ?
+        """, (bug_id,), Bug)
+
+    def get_bug_columns(self, software_id):
+        #Every bug of a software as a Bug of column lists, for statistics over lists too large for per-row objects
+        return self._read_columns("""
+            SELECT B.bug_id, B.title, B.description, B.severity, B.status, B.assigned_to, B.date_reported, V.version_number, B.version_id
+            FROM Bugs B
+            JOIN Software_Versions V ON B.version_id = V.version_id
+            WHERE V.software_id = ?
+            ORDER BY B.bug_id
+        """, (software_id,), Bug)
+
+    def get_bug_lifecycle_columns(self, software_id):
+        #Severity, resolved flag and report and resolution days (see _epoch_day) of every bug, one list per field, for metrics.load()
+        return self._read_columns(f"""
+            SELECT COALESCE(B.severity, ''), {_resolved_sql("B.status")},
+                   {_epoch_day("B.date_reported")}, {_epoch_day("B.date_resolved")}
             FROM Bugs B
             JOIN Software_Versions V ON B.version_id = V.version_id
             WHERE V.software_id = ?
-            ORDER BY B.date_reported DESC
-        """, (software_id,))
-        return self.cursor.fetchall()
+        """, (software_id,), BugLifecycle, dedupe=False)
 
     #Dep Managem
 
     def add_deployment(self, software_id, environment, deployment_date, deployment_status):
         self.cursor.execute("""
-            INSERT INTO Deployments (version_id, environment, deployment_date, deployment_status)
+            INSERT INTO Deployments (version_id, environment, deployment_date, deployment_status, software_id)
             VALUES (
-                (SELECT version_id FROM Software_Versions 
-                WHERE software_id = ? 
-                ORDER BY version_id DESC LIMIT 1),
-                ?, ?, ?
+                (SELECT version_id FROM Software_Versions
+                WHERE software_id = ?1
+                ORDER BY version_key DESC, version_id DESC LIMIT 1),
+                ?, ?, ?, ?1
             )
-        """, (software_id, environment, deployment_date, deployment_status))
-        self.conn.commit()
+        """, (software_id, environment, normalize_date(deployment_date), deployment_status))
+        self._commit()
+        row_id = self.cursor.lastrowid
+        self._notify("Deployments", software_id=software_id)
+        return row_id
 
-    def get_deployments(self, software_id):
-        self.cursor.execute("""
+    def add_deployments_many(self, rows):
+        #rows: (version_id, environment, deployment_date, deployment_status); unlike add_deployment the version is explicit
+        with self.batch():
+            count = _insert_many(self.cursor, "Deployments", ("version_id", "environment", "deployment_date", "deployment_status"), rows,
+                                 {"deployment_date": "canonical_date(deployment_date)", "software_id": _OWNER_OF_ROW})
+            self._notify("Deployments")
+        return count
+
+    def get_deployments(self, software_id, between=None):
+        #between=(start, end), dates or date text, inclusive and either may be None; served by idx_deployments_version_date
+        condition, params = _date_range("d.deployment_date", *(between or (None, None)))
+        return self.cache.get("deployments", software_id, ("dates", params), lambda: self._load_deployments(software_id, condition, params))
+
+    def _load_deployments(self, software_id, condition="", params=()):
+        return self._read(f"""
             SELECT d.deployment_id, d.environment, d.deployment_date, d.deployment_status
             FROM Deployments d
             JOIN Software_Versions v ON d.version_id = v.version_id
-            WHERE v.software_id = ?
+            WHERE v.software_id = ?{condition}
             ORDER BY d.deployment_id DESC
-        """, (software_id,))
-        return self.cursor.fetchall()
+        """, (software_id,) + params, Deployment)
+
+    def get_deployment_counts(self, software_id):
+        #Completed (not pending) and failed deployments per version, for the change failure rate in metrics.load().
+        #Grouped in index order, so no sort and no per-deployment rows.
+        return self._read("""
+            SELECT v.version_id, v.version_number,
+                   SUM(COALESCE(d.deployment_status, '') != ?), SUM(COALESCE(d.deployment_status, '') = ?)
+            FROM Software_Versions v
+            JOIN Deployments d ON d.version_id = v.version_id
+            WHERE v.software_id = ?
+            GROUP BY v.version_key, v.version_id
+        """, (PENDING_DEPLOYMENT_STATUS, FAILED_DEPLOYMENT_STATUS, software_id), DeploymentCounts)
+
+    def get_deployments_page(self, software_id, after=None, limit=PAGE_SIZE):
+        return self.cache.get("deployments", software_id, (after, limit), lambda: self._load_deployments_page(software_id, after, limit))
+
+    def _load_deployments_page(self, software_id, after, limit):
+        query = """
+            SELECT d.deployment_id, d.environment, d.deployment_date, d.deployment_status
+            FROM Deployments d
+            WHERE d.software_id = ?
+        """
+        params = (software_id,)
+        if after is not None:
+            query += " AND d.deployment_id < ?"
+            params += (after,)
+        query += " ORDER BY d.deployment_id DESC"
+        return self._fetch_page(query, params, limit, lambda row: row[0], Deployment)
+
+    def get_deployment(self, deployment_id):
+        return self._read_one("""
+            SELECT d.deployment_id, d.environment, d.deployment_date, d.deployment_status
+            FROM Deployments d
+            JOIN Software_Versions v ON d.version_id = v.version_id
+            WHERE d.deployment_id = ?
+        """, (deployment_id,), Deployment)
 
     def update_deployment(self, deployment_id, environment, deployment_date, deployment_status):
+        software_id = self._software_of("Deployments", "deployment_id", deployment_id)
         self.cursor.execute("""
             UPDATE Deployments
             SET environment = ?, deployment_date = ?, deployment_status = ?
             WHERE deployment_id = ?
-        """, (environment, deployment_date, deployment_status, deployment_id))
-        self.conn.commit()
+        """, (environment, normalize_date(deployment_date), deployment_status, deployment_id))
+        self._commit()
+        self._notify("Deployments", software_id=software_id)
 
     def delete_deployment(self, deployment_id):
+        software_id = self._software_of("Deployments", "deployment_id", deployment_id)
         self.cursor.execute("DELETE FROM Deployments WHERE deployment_id = ?", (deployment_id,))
-        self.conn.commit()
+        self._commit()
+        self._notify("Deployments", software_id=software_id)
 
     #Patch Management
 
+    def _image_location(self, image_hash, image_path):
+        #Hashed images resolve into the attachment store, legacy rows keep their original path
+        return self.attachments.path_of(image_hash) if image_hash else image_path
+
+    def _with_image_locations(self, rows):
+        #rows: (patch_id, note_title, note_description, image_hash, image_path, version_number)
+        return [PatchNote(row[0], row[1], row[2], self._image_location(row[3], row[4]), row[5]) for row in rows]
+
     def add_patch_note(self, version_id, note_title, note_description, image_path=None):
+        image_hash = self.attachments.add(image_path) if image_path else None
+        software_id = self._software_of("Software_Versions", "version_id", version_id)
         self.cursor.execute("""
-            INSERT INTO Patch_Notes (version_id, note_title, note_description, image_path)
-            VALUES (?, ?, ?, ?)
-        """, (version_id, note_title, note_description, image_path))
-        self.conn.commit()
+            INSERT INTO Patch_Notes (version_id, note_title, note_description, image_hash, software_id)
+            VALUES (?, ?, ?, ?, ?)
+        """, (version_id, note_title, note_description, image_hash, software_id))
+        self._commit()
+        row_id = self.cursor.lastrowid
+        self._notify("Patch_Notes", software_id=software_id)
+        return row_id
+
+    def add_patch_notes_many(self, rows):
+        #rows: (version_id, note_title, note_description, image_path)
+        rows = [(version_id, title, description, self.attachments.add(image_path) if image_path else None)
+                for version_id, title, description, image_path in rows]
+        with self.batch():
+            count = _insert_many(self.cursor, "Patch_Notes", ("version_id", "note_title", "note_description", "image_hash"), rows,
+                                 {"software_id": _OWNER_OF_ROW})
+            self._notify("Patch_Notes")
+        return count
 
     def get_patch_notes_by_software(self, software_id):
-        self.cursor.execute("""
-            SELECT P.patch_id, P.note_title, P.note_description, P.image_path, V.version_number
+        return self.cache.get("patch_notes", software_id, (), lambda: self._load_patch_notes_by_software(software_id))
+
+    def _load_patch_notes_by_software(self, software_id):
+        return self._with_image_locations(self._read("""
+            SELECT P.patch_id, P.note_title, P.note_description, P.image_hash, P.image_path, V.version_number
             FROM Patch_Notes P
             JOIN Software_Versions V ON P.version_id = V.version_id
             WHERE V.software_id = ?
             ORDER BY P.patch_id DESC
-        """, (software_id,))
-        return self.cursor.fetchall()
+        """, (software_id,)))
+
+    def get_patch_notes_page(self, software_id, after=None, limit=PAGE_SIZE):
+        return self.cache.get("patch_notes", software_id, (after, limit), lambda: self._load_patch_notes_page(software_id, after, limit))
+
+    def _load_patch_notes_page(self, software_id, after, limit):
+        query = """
+            SELECT P.patch_id, P.note_title, P.note_description, P.image_hash, P.image_path, V.version_number
+            FROM Patch_Notes P
+            JOIN Software_Versions V ON P.version_id = V.version_id
+            WHERE P.software_id = ?
+        """
+        params = (software_id,)
+        if after is not None:
+            query += " AND P.patch_id < ?"
+            params += (after,)
+        query += " ORDER BY P.patch_id DESC"
+        rows, next_cursor = self._fetch_page(query, params, limit, lambda row: row[0])
+        return self._with_image_locations(rows), next_cursor
+
+    def get_patch_note(self, patch_id):
+        row = self._read_one("""
+            SELECT P.patch_id, P.note_title, P.note_description, P.image_hash, P.image_path, V.version_number
+            FROM Patch_Notes P
+            JOIN Software_Versions V ON P.version_id = V.version_id
+            WHERE P.patch_id = ?
+        """, (patch_id,))
+        return self._with_image_locations([row])[0] if row else None
 
     def delete_patch_note(self, patch_id):
+        software_id = self._software_of("Patch_Notes", "patch_id", patch_id)
         self.cursor.execute("DELETE FROM Patch_Notes WHERE patch_id = ?", (patch_id,))
-        self.conn.commit()
+        self._commit()
+        self._notify("Patch_Notes", software_id=software_id)
+
+    def adopt_legacy_images(self):
+        #Copies images still referenced by absolute path into the attachment store; files that are gone are left as they are
+        rows = self._read("SELECT patch_id, image_path FROM Patch_Notes WHERE image_hash IS NULL AND image_path IS NOT NULL")
+        adopted = []
+        for patch_id, image_path in rows:
+            try:
+                adopted.append((self.attachments.add(image_path), patch_id))
+            except OSError:
+                continue
+        with self.batch():
+            self.cursor.executemany("UPDATE Patch_Notes SET image_hash = ?, image_path = NULL WHERE patch_id = ?", adopted)
+            if adopted:
+                self._notify("Patch_Notes")
+        return len(adopted)
+
+    def prune_attachments(self):
+        #Deletes stored images no patch note refers to any more
+        referenced = {row[0] for row in self._read("SELECT DISTINCT image_hash FROM Patch_Notes WHERE image_hash IS NOT NULL")}
+        unreferenced = [digest for digest in self.attachments.digests() if digest not in referenced]
+        for digest in unreferenced:
+            self.attachments.remove(digest)
+        return len(unreferenced)
+
+
+    #Search
+
+    def search(self, query, software_id=None, kinds=SEARCH_KINDS, limit=PAGE_SIZE, newest=None):
+        #Ranked full-text hits as (kind, row_id, title, snippet, version_number), best match first, ranked over every match.
+        #newest=N ranks only the N most recent matches of each kind instead, bounding the cost of very common words.
+        match = _fts_query(query, software_id)
+        if not match or not kinds:
+            return []
+
+        parts = []
+        sources = {
+            "bug": ("Bugs", "bug_id", "title", "B"),
+            "patch_note": ("Patch_Notes", "patch_id", "note_title", "P"),
+        }
+        for kind in SEARCH_KINDS:
+            if kind not in kinds:
+                continue
+            table, key, title, alias = sources[kind]
+            #FTS5 sorts by rank itself; with newest the candidates come straight off the index in rowid order
+            candidates = "rowid DESC" if newest else "rank"
+            parts.append(f"""
+                SELECT * FROM (
+                    SELECT '{kind}', {alias}.{key}, {alias}.{title}, F.snippet, V.version_number, F.rank
+                    FROM (
+                        SELECT rowid AS row_id, snippet({table}_FTS, -1, '[', ']', '…', 12) AS snippet, rank
+                        FROM {table}_FTS
+                        WHERE {table}_FTS MATCH ?
+                        ORDER BY {candidates} LIMIT ?
+                    ) F
+                    JOIN {table} {alias} ON {alias}.{key} = F.row_id
+                    JOIN Software_Versions V ON {alias}.version_id = V.version_id
+                    ORDER BY F.rank LIMIT ?
+                )
+            """)
+
+        rows = self._read(" UNION ALL ".join(parts) + " ORDER BY 6 LIMIT ?", (match, newest or limit, limit) * len(parts) + (limit,))
+        return [SearchHit._make(row[:5]) for row in rows]
+
+    #Import / Export
+
+    def iter_rows(self, table):
+        #Streams a whole table in primary key order without materializing it
+        columns = TABLE_COLUMNS[table]
+        query = f"SELECT {', '.join(columns)} FROM {table} ORDER BY {columns[0]}"
+        with self._reader() as cursor:
+            yield from cursor.execute(query)
+
+    def insert_rows(self, table, rows, chunk_size=IMPORT_CHUNK_SIZE):
+        #Inserts an iterable of row tuples (in TABLE_COLUMNS order) one chunk per transaction; a None key is auto-assigned
+        columns = TABLE_COLUMNS[table]
+        expressions = {column: f"canonical_date({column})" for column in DATE_COLUMNS.get(table, ())}
+        expressions.update({column: f"COALESCE(NULLIF({column}, ''), 0)" for column in FLAG_COLUMNS.get(table, ())})
+        derived = DERIVED_COLUMNS.get(table, {})
+        if derived:
+            sources = [(columns.index(source), compute) for source, compute in derived.values()]
+            rows = (row + tuple(compute(row[index]) for index, compute in sources) for row in rows)
+            columns = columns + list(derived)
+        if table in SOFTWARE_OWNED:
+            expressions["software_id"] = _OWNER_OF_ROW
+        rows = iter(rows)
+        count = 0
+        while True:
+            chunk = list(islice(rows, chunk_size))
+            if not chunk:
+                return count
+            with self.batch():
+                count += _insert_many(self.cursor, table, columns, chunk, expressions)
+                self._notify(table)
+
+    #Maintenance
+
+    def refresh_version_keys(self):
+        #Re-keys versions written by other SQLite clients, which leave version_key blank or stale; returns how many changed
+        with self.batch():
+            self.cursor.execute("""
+                UPDATE Software_Versions SET version_key = version_sort_key(version_number)
+                WHERE version_key IS NOT version_sort_key(version_number)
+            """)
+            count = self.cursor.rowcount
+            if count:
+                self._notify("Software_Versions")
+        return count
+
+    def cleanup_orphans(self):
+        #Foreign keys keep new orphans out; this catches rows written with enforcement off (older builds, other tools)
+        with self.batch():
+            counts = _delete_orphans(self.conn)
+            self._notify(*(table for table, count in counts.items() if count))
+        return counts
 
+    def vacuum(self, pages=None):
+        #Returns freed pages to the OS a few at a time; databases created before incremental auto_vacuum get one full VACUUM first
+        if self.conn.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+            self.conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+            self.conn.execute("VACUUM")
+        freelist = self.conn.execute("PRAGMA freelist_count").fetchone()[0]
+        #execute() stops the pragma after its first freed page; executescript() runs it to completion
+        self.conn.executescript(f"PRAGMA incremental_vacuum({int(pages) if pages else 0})")
+        self.conn.execute("PRAGMA optimize")
+        #The file only shrinks once the WAL is checkpointed into it
+        self.conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        return freelist - self.conn.execute("PRAGMA freelist_count").fetchone()[0]
 
     #Close connection
     def close(self):
+        if self.read_pool:
+            self.read_pool.close()
+            self.version_conn.close()
         self.conn.close()
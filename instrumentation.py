@@ -0,0 +1,269 @@
+import inspect
+import json
+import re
+import sqlite3
+import threading
+import time
+from bisect import bisect_left
+from collections import deque
+from contextlib import contextmanager
+from functools import wraps
+
+#Upper bounds of the latency buckets in milliseconds; the last bucket catches everything slower
+HISTOGRAM_BOUNDS_MS = (0.1, 0.5, 1, 5, 10, 50, 100, 500, 1000)
+SLOW_QUERY_MS = 50.0
+SLOW_LOG_SIZE = 200
+#Statements run outside any VersionController method (e.g. by a connection's setup)
+UNATTRIBUTED = "<other>"
+WHITESPACE = re.compile(r"\s+")
+
+
+def _histogram_labels():
+    labels = [f"<={bound}ms" for bound in HISTOGRAM_BOUNDS_MS]
+    return labels + [f">{HISTOGRAM_BOUNDS_MS[-1]}ms"]
+
+
+class MethodStats:
+    __slots__ = ("calls", "errors", "total_ms", "max_ms", "histogram", "statements", "statement_ms", "rows")
+
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.histogram = [0] * (len(HISTOGRAM_BOUNDS_MS) + 1)
+        self.statements = 0
+        self.statement_ms = 0.0
+        self.rows = 0
+
+    def as_dict(self):
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "total_ms": round(self.total_ms, 3),
+            "mean_ms": round(self.total_ms / self.calls, 3) if self.calls else 0.0,
+            "max_ms": round(self.max_ms, 3),
+            "histogram": dict(zip(_histogram_labels(), self.histogram)),
+            "statements": self.statements,
+            "statement_ms": round(self.statement_ms, 3),
+            "rows": self.rows,
+        }
+
+
+class QueryStats:
+    #Opt-in record of what the controller does with SQLite: per method call counts, a latency histogram,
+    #the statements it ran and the rows they returned or changed, plus a log of statements slower than slow_ms with their query plan.
+    #Statements are attributed to the innermost instrumented method running on the same thread.
+    def __init__(self, slow_ms=SLOW_QUERY_MS, slow_log_size=SLOW_LOG_SIZE):
+        self.slow_ms = slow_ms
+        self.methods = {}
+        self.slow_queries = deque(maxlen=slow_log_size)
+        self.started = time.time()
+        self.lock = threading.Lock()
+        self.local = threading.local()
+
+    def current_method(self):
+        stack = getattr(self.local, "stack", None)
+        return stack[-1] if stack else UNATTRIBUTED
+
+    def _stats(self, method):
+        stats = self.methods.get(method)
+        if stats is None:
+            stats = self.methods[method] = MethodStats()
+        return stats
+
+    @contextmanager
+    def method(self, name):
+        stack = getattr(self.local, "stack", None)
+        if stack is None:
+            stack = self.local.stack = []
+        stack.append(name)
+        start = time.perf_counter()
+        failed = False
+        try:
+            yield
+        except BaseException:
+            failed = True
+            raise
+        finally:
+            elapsed = (time.perf_counter() - start) * 1000
+            stack.pop()
+            with self.lock:
+                stats = self._stats(name)
+                stats.calls += 1
+                stats.errors += failed
+                stats.total_ms += elapsed
+                stats.max_ms = max(stats.max_ms, elapsed)
+                stats.histogram[bisect_left(HISTOGRAM_BOUNDS_MS, elapsed)] += 1
+
+    def wrap(self, obj):
+        #Instruments every public method of obj by shadowing it with a timed wrapper on the instance.
+        #Generators and context managers are left alone (they return before doing any work); their statements count toward the calling method.
+        for name in dir(type(obj)):
+            func = getattr(type(obj), name)
+            if name.startswith("_") or not callable(func):
+                continue
+            if inspect.isgeneratorfunction(inspect.unwrap(func)):
+                continue
+            setattr(obj, name, self._timed(name, getattr(obj, name)))
+
+    def _timed(self, name, func):
+        @wraps(func)
+        def timed(*args, **kwargs):
+            with self.method(name):
+                return func(*args, **kwargs)
+        return timed
+
+    def statement(self, conn, sql, params, elapsed_ms, rows):
+        method = self.current_method()
+        with self.lock:
+            stats = self._stats(method)
+            stats.statements += 1
+            stats.statement_ms += elapsed_ms
+            stats.rows += rows
+        if elapsed_ms >= self.slow_ms:
+            entry = {
+                "at": time.time(),
+                "method": method,
+                "ms": round(elapsed_ms, 3),
+                "rows": rows,
+                "sql": WHITESPACE.sub(" ", sql).strip(),
+                "plan": _query_plan(conn, sql, params),
+            }
+            with self.lock:
+                self.slow_queries.append(entry)
+
+    def snapshot(self):
+        with self.lock:
+            methods = {name: stats.as_dict() for name, stats in self.methods.items()}
+            slow_queries = list(self.slow_queries)
+        return {
+            "started": self.started,
+            "taken": time.time(),
+            "slow_ms": self.slow_ms,
+            "methods": methods,
+            "slow_queries": slow_queries,
+        }
+
+    def reset(self):
+        with self.lock:
+            self.methods.clear()
+            self.slow_queries.clear()
+            self.started = time.time()
+
+    def dump(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.snapshot(), f, indent=2)
+
+
+def _query_plan(conn, sql, params):
+    #EXPLAIN QUERY PLAN lines, indented by depth; None for statements that cannot be explained (executemany, scripts, pragmas)
+    if params is None:
+        return None
+    try:
+        cursor = sqlite3.Cursor(conn)
+        plan = cursor.execute("EXPLAIN QUERY PLAN " + sql, params).fetchall()
+    except sqlite3.Error:
+        return None
+    depth = {0: 0}
+    lines = []
+    for node, parent, _, detail in plan:
+        depth[node] = depth.get(parent, 0) + 1
+        lines.append("  " * (depth[node] - 1) + detail)
+    return lines or None
+
+
+class InstrumentedCursor(sqlite3.Cursor):
+    #A statement is timed from execute() until its last row has been fetched (or until a single fetchone()),
+    #since SQLite does most of the work of a query while stepping through its rows
+    pending = None
+
+    def execute(self, sql, parameters=()):
+        self.finish()
+        start = time.perf_counter()
+        super().execute(sql, parameters)
+        self.pending = [sql, parameters, time.perf_counter() - start, 0]
+        if self.description is None:
+            self.finish(max(self.rowcount, 0))
+        return self
+
+    def executemany(self, sql, seq_of_parameters):
+        self.finish()
+        start = time.perf_counter()
+        super().executemany(sql, seq_of_parameters)
+        self.pending = [sql, None, time.perf_counter() - start, 0]
+        self.finish(max(self.rowcount, 0))
+        return self
+
+    def executescript(self, sql_script):
+        self.finish()
+        start = time.perf_counter()
+        super().executescript(sql_script)
+        self.pending = [sql_script, None, time.perf_counter() - start, 0]
+        self.finish()
+        return self
+
+    def fetchone(self):
+        start = time.perf_counter()
+        row = super().fetchone()
+        self.fetched(start, row is not None)
+        self.finish()
+        return row
+
+    def fetchmany(self, size=None):
+        size = self.arraysize if size is None else size
+        start = time.perf_counter()
+        rows = super().fetchmany(size)
+        self.fetched(start, len(rows))
+        if len(rows) < size:
+            self.finish()
+        return rows
+
+    def fetchall(self):
+        start = time.perf_counter()
+        rows = super().fetchall()
+        self.fetched(start, len(rows))
+        self.finish()
+        return rows
+
+    def __next__(self):
+        start = time.perf_counter()
+        try:
+            row = super().__next__()
+        except StopIteration:
+            self.fetched(start, 0)
+            self.finish()
+            raise
+        self.fetched(start, 1)
+        return row
+
+    def fetched(self, start, rows):
+        if self.pending is not None:
+            self.pending[2] += time.perf_counter() - start
+            self.pending[3] += rows
+
+    def finish(self, rows=0):
+        if self.pending is None:
+            return
+        sql, params, elapsed, fetched = self.pending
+        self.pending = None
+        instrumentation = self.connection.instrumentation
+        if instrumentation is not None:
+            instrumentation.statement(self.connection, sql, params, elapsed * 1000, fetched + rows)
+
+
+class InstrumentedConnection(sqlite3.Connection):
+    #Connection factory for sqlite3.connect(); every cursor it hands out (including those behind execute()) is an InstrumentedCursor
+    instrumentation = None
+
+    def cursor(self, factory=InstrumentedCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+    def executescript(self, sql_script):
+        return self.cursor().executescript(sql_script)
@@ -0,0 +1,107 @@
+from collections import namedtuple
+
+import numpy as np
+
+PERCENTILES = (50, 90, 99)
+
+#Whole columns as arrays; dates are days since 1970-01-01 as floats, NaN where a date is missing
+BugArrays = namedtuple("BugArrays", "severity is_resolved reported resolved")
+#One entry per version with deployments; version_number is only a label, as numbers can repeat within a software
+DeploymentArrays = namedtuple("DeploymentArrays", "version_id version_number completed failed")
+
+
+def load(controller, software_id):
+    #Two bulk reads; everything after this works on arrays
+    bugs = controller.get_bug_lifecycle_columns(software_id)
+    counts = controller.get_deployment_counts(software_id)
+    return (
+        BugArrays(
+            severity=np.asarray(bugs.severity, dtype=str),
+            is_resolved=np.asarray(bugs.is_resolved, dtype=bool),
+            reported=np.asarray(bugs.reported, dtype=float),
+            resolved=np.asarray(bugs.resolved, dtype=float),
+        ),
+        DeploymentArrays(
+            version_id=np.asarray([count.version_id for count in counts], dtype=np.int64),
+            version_number=np.asarray([count.version_number for count in counts], dtype=object),
+            completed=np.asarray([count.completed for count in counts], dtype=np.int64),
+            failed=np.asarray([count.failed for count in counts], dtype=np.int64),
+        ),
+    )
+
+
+def resolution_days(bugs):
+    #Days from report to resolution per bug, and a mask of the bugs where both dates are known and in order
+    days = bugs.resolved - bugs.reported
+    valid = np.isfinite(days)
+    valid[valid] = days[valid] >= 0
+    return days, valid
+
+
+def mttr(bugs):
+    #Mean time to resolve in days, None when no bug has both dates
+    days, valid = resolution_days(bugs)
+    return float(days[valid].mean()) if valid.any() else None
+
+
+def resolution_percentiles(bugs, percentiles=PERCENTILES):
+    #{severity: {"count": n, "p50": days, ...}} over the bugs with both dates
+    days, valid = resolution_days(bugs)
+    severities, groups = np.unique(bugs.severity[valid], return_inverse=True)
+    days = days[valid]
+    #One sort by (severity, days) puts each severity's durations in a contiguous, ordered run
+    order = np.lexsort((days, groups))
+    days, groups = days[order], groups[order]
+    bounds = np.searchsorted(groups, np.arange(len(severities) + 1))
+    result = {}
+    for index, severity in enumerate(severities):
+        run = days[bounds[index]:bounds[index + 1]]
+        values = np.percentile(run, percentiles)
+        result[str(severity)] = {"count": len(run), **{f"p{p}": float(v) for p, v in zip(percentiles, values)}}
+    return result
+
+
+def burndown(bugs):
+    #(dates, open_counts): bugs open at the end of each day from the first report to the last report or resolution.
+    #Bugs resolved before resolution dates were recorded have no known resolution day and are left out.
+    counted = np.isfinite(bugs.reported) & ~(bugs.is_resolved & np.isnan(bugs.resolved))
+    opened = np.sort(bugs.reported[counted])
+    closed = bugs.resolved[counted]
+    closed = np.sort(closed[np.isfinite(closed)])
+    if not len(opened):
+        return np.array([], dtype="datetime64[D]"), np.array([], dtype=np.int64)
+
+    last = max(opened[-1], closed[-1]) if len(closed) else opened[-1]
+    days = np.arange(opened[0], last + 1)
+    open_counts = np.searchsorted(opened, days, "right") - np.searchsorted(closed, days, "right")
+    return days.astype(np.int64).astype("datetime64[D]"), open_counts
+
+
+def change_failure_rate(deployments):
+    #(overall, {version_id: {"version_number": label, "rate": rate}}): failed over completed (not pending) deployments;
+    #versions with none completed are left out
+    has_completed = deployments.completed > 0
+    if not has_completed.any():
+        return None, {}
+    rates = deployments.failed[has_completed] / deployments.completed[has_completed]
+    overall = float(deployments.failed.sum() / deployments.completed.sum())
+    return overall, {version_id: {"version_number": number, "rate": rate} for version_id, number, rate in zip(
+        deployments.version_id[has_completed].tolist(), deployments.version_number[has_completed].tolist(), rates.tolist())}
+
+
+def compute(controller, software_id):
+    #Every metric for one software, as plain Python values (JSON serializable)
+    bugs, deployments = load(controller, software_id)
+    dates, open_counts = burndown(bugs)
+    overall, by_version = change_failure_rate(deployments)
+    return {
+        "bugs": len(bugs.reported),
+        "resolved": int(bugs.is_resolved.sum()),
+        "resolved_without_date": int((bugs.is_resolved & np.isnan(bugs.resolved)).sum()),
+        "mttr_days": mttr(bugs),
+        "resolution_percentiles": resolution_percentiles(bugs),
+        "burndown": {"dates": dates.astype(str).tolist(), "open": open_counts.tolist()},
+        "completed_deployments": int(deployments.completed.sum()),
+        "change_failure_rate": overall,
+        "change_failure_rate_by_version": by_version,
+    }
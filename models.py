@@ -0,0 +1,54 @@
+from collections import namedtuple
+
+#Row types returned by VersionController. They are tuples underneath (no per-row __dict__),
+#so positional unpacking keeps working while fields can also be read by name.
+Software = namedtuple("Software", "software_id name")
+Version = namedtuple("Version", "version_id version_number release_date status notes")
+Bug = namedtuple("Bug", "bug_id title description severity status assigned_to date_reported version_number version_id")
+Deployment = namedtuple("Deployment", "deployment_id environment deployment_date deployment_status")
+PatchNote = namedtuple("PatchNote", "patch_id note_title note_description image_path version_number")
+SearchHit = namedtuple("SearchHit", "kind row_id title snippet version_number")
+#Inputs of the reliability metrics; BugLifecycle is read as columns with dates as whole days since 1970-01-01
+BugLifecycle = namedtuple("BugLifecycle", "severity is_resolved reported resolved")
+DeploymentCounts = namedtuple("DeploymentCounts", "version_id version_number completed failed")
+
+
+def row_factory(model):
+    #sqlite3 row_factory that builds model instances straight from the fetched tuple (what _make does, minus the call overhead)
+    new = tuple.__new__
+    return lambda cursor, row: new(model, row)
+
+
+def read_columns(cursor, model, chunk_size=10000, dedupe=True):
+    #Columnar batch: the model's fields each holding a list, e.g. columns.severity[i] instead of rows[i].severity.
+    #With dedupe, repeated values (statuses, severities, dates, version numbers) are stored once per column instead of once per row;
+    #without it the batch is built faster, for callers that convert it straight into something else.
+    columns = model._make([] for _ in model._fields)
+    seen = [{} for _ in model._fields]
+    while True:
+        chunk = cursor.fetchmany(chunk_size)
+        if not chunk:
+            return columns
+        for column, values, known in zip(columns, zip(*chunk), seen):
+            column.extend([known.setdefault(value, value) for value in values] if dedupe else values)
+
+
+class PackedRows:
+    #A list of model rows stored as columns, repeated values once per column: what EntityCache keeps instead of the rows.
+    #A namedtuple row costs about as much as a plain tuple (~440 bytes per bug row with its strings); packed, about 170.
+    __slots__ = ("model", "columns")
+
+    def __init__(self, rows):
+        self.model = type(rows[0])
+        self.columns = []
+        for values in zip(*rows):
+            known = {}
+            self.columns.append([known.setdefault(value, value) for value in values])
+
+    def __len__(self):
+        return len(self.columns[0])
+
+    def rows(self):
+        new = tuple.__new__
+        model = self.model
+        return [new(model, row) for row in zip(*self.columns)]
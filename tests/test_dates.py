@@ -0,0 +1,115 @@
+import datetime
+import unittest
+
+from db import canonical_date, normalize_date, parse_date, version_sort_key
+
+#(typed text, parsed date or None); None means the text is not read as a date
+DATES = [
+    ("2024-01-02", datetime.date(2024, 1, 2)),
+    (" 2024-01-02 ", datetime.date(2024, 1, 2)),
+    ("2024-1-2", datetime.date(2024, 1, 2)),
+    ("2024/01/02", datetime.date(2024, 1, 2)),
+    ("2024.01.02", datetime.date(2024, 1, 2)),
+    ("2024-01-02T10:30", datetime.date(2024, 1, 2)),
+    ("2024-01-02 10:30:00", datetime.date(2024, 1, 2)),
+    #Month first, or day first when the first number cannot be a month
+    ("02/13/2024", datetime.date(2024, 2, 13)),
+    ("13/02/2024", datetime.date(2024, 2, 13)),
+    ("31.12.2024", datetime.date(2024, 12, 31)),
+    ("05/05/2024", datetime.date(2024, 5, 5)),
+    #Ambiguous: either number could be the month
+    ("01/02/2024", None),
+    ("12/11/2024", None),
+    ("Jan 2, 2024", datetime.date(2024, 1, 2)),
+    ("January 2 2024", datetime.date(2024, 1, 2)),
+    ("2 January 2024", datetime.date(2024, 1, 2)),
+    ("2 Jan 2024", datetime.date(2024, 1, 2)),
+    #Not dates
+    ("2024-02-30", None),
+    ("2024-13-01", None),
+    ("13/13/2024", None),
+    ("last spring", None),
+    ("24-01-02", None),
+    ("", None),
+    (None, None),
+]
+
+
+class ParseDateTest(unittest.TestCase):
+    def test_parse_date(self):
+        for text, expected in DATES:
+            with self.subTest(text=text):
+                self.assertEqual(parse_date(text), expected)
+
+    def test_canonical_date_keeps_what_it_cannot_read(self):
+        for text, expected in DATES:
+            with self.subTest(text=text):
+                if expected:
+                    self.assertEqual(canonical_date(text), expected.isoformat())
+                elif text is None:
+                    self.assertIsNone(canonical_date(text))
+                else:
+                    self.assertEqual(canonical_date(text), text.strip())
+
+    def test_normalize_date_rejects_what_it_cannot_read(self):
+        for text, expected in DATES:
+            with self.subTest(text=text):
+                if expected:
+                    self.assertEqual(normalize_date(text), expected.isoformat())
+                elif not text:
+                    self.assertEqual(normalize_date(text), text)
+                else:
+                    with self.assertRaises(ValueError):
+                        normalize_date(text)
+
+    def test_normalize_date_takes_dates(self):
+        self.assertEqual(normalize_date(datetime.date(2024, 1, 2)), "2024-01-02")
+        self.assertEqual(normalize_date(datetime.datetime(2024, 1, 2, 23, 59)), "2024-01-02")
+
+
+#Version numbers in ascending order; each row sorts after the one before it
+ASCENDING_VERSIONS = [
+    "1.0.0-alpha",
+    "1.0.0-alpha.2",
+    "1.0.0-alpha.10",
+    "1.0.0-beta",
+    "1.0.0-rc.1",
+    "1.0.0",
+    "1.0.1",
+    "1.2",
+    "1.9.0",
+    "1.10.0",
+    "1.10.0.1",
+    "2.0.0-rc.1",
+    "2.0.0",
+    "10.0",
+]
+#Spellings of the same version
+EQUAL_VERSIONS = [
+    ("1", "1.0", "1.0.0", "1.0.0.0", "v1.0.0", "V1", " 1.0 ", "1.0.0+build.7"),
+    ("2.0.0-rc.1", "v2.0.0-rc.1", "2.0.0rc.1", "2.0.0_rc.1"),
+]
+UNPARSABLE_VERSIONS = ["", None, "abc", "v", "one.two", "1.0 final release"]
+
+
+class VersionSortKeyTest(unittest.TestCase):
+    def test_order(self):
+        for lower, higher in zip(ASCENDING_VERSIONS, ASCENDING_VERSIONS[1:]):
+            with self.subTest(lower=lower, higher=higher):
+                self.assertLess(version_sort_key(lower), version_sort_key(higher))
+
+    def test_equal_spellings(self):
+        for spellings in EQUAL_VERSIONS:
+            for spelling in spellings:
+                with self.subTest(spelling=spelling):
+                    self.assertEqual(version_sort_key(spelling), version_sort_key(spellings[0]))
+
+    def test_unparsable_sorts_first(self):
+        for version in UNPARSABLE_VERSIONS:
+            with self.subTest(version=version):
+                self.assertEqual(version_sort_key(version), "")
+                self.assertLess(version_sort_key(version), version_sort_key("0.0.0-alpha"))
+
+
+if __name__ == "__main__":
+    unittest.main()
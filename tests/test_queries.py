@@ -0,0 +1,168 @@
+import os
+import random
+import sqlite3
+import tempfile
+import unittest
+
+from db import VersionController, date_key, version_sort_key
+
+WORDS = ("crash", "login", "timeout", "memory", "leak", "button", "render", "sync")
+DATES = ("2024-01-05", "2024-01-05", "2024-02-10", "2023-12-31", "2024-03-01", "", None, "last spring")
+PAGE = 7
+
+
+def all_pages(fetch):
+    #Follows next_cursor from the first page to the last, as the views do
+    rows, after = fetch(None)
+    while after is not None:
+        page, after = fetch(after)
+        rows += page
+    return rows
+
+
+class QueryTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "versionary.db")
+        self.controller = VersionController(self.path)
+        self.conn = self.controller.conn
+        self.fill(random.Random(7))
+
+    def tearDown(self):
+        self.controller.close()
+        self.directory.cleanup()
+
+    def text(self, rng):
+        return " ".join(rng.choice(WORDS) for _ in range(rng.randrange(1, 4)))
+
+    def fill(self, rng):
+        c = self.controller
+        self.softwares = [c.add_software(f"Software {i}") for i in range(4)]
+        c.archive_software(self.softwares[-1])
+        for software_id in self.softwares:
+            for _ in range(rng.randrange(15, 30)):
+                number = rng.choice(("1.0", "1.2", "1.10", "2.0.0-rc.1", "2.0.0", "v3", "nightly"))
+                c.add_version(software_id, number, rng.choice(DATES[:5]), "Stable", "")
+        versions = [row[0] for row in self.conn.execute("SELECT version_id FROM Software_Versions")]
+        rows = [(rng.choice(versions), self.text(rng), self.text(rng), "Minor", "Open", "", rng.choice(DATES)) for _ in range(400)]
+        #Bugs typed with dates the app would reject still come in through imports
+        c.insert_rows("Bugs", [(None,) + row[:6] + (row[6], None) for row in rows])
+        for software_id in self.softwares:
+            for _ in range(rng.randrange(10, 25)):
+                c.add_deployment(software_id, "Production", rng.choice(DATES[:5]), "Successful")
+        c.add_patch_notes_many([(rng.choice(versions), self.text(rng), self.text(rng), None) for _ in range(120)])
+
+    def ids(self, query, params=()):
+        return [row[0] for row in self.conn.execute(query, params)]
+
+    def test_softwares_pages(self):
+        rows = all_pages(lambda after: self.controller.get_softwares_page(after, PAGE))
+        self.assertEqual([row.software_id for row in rows], self.ids("SELECT software_id FROM Softwares WHERE archived = 0 ORDER BY software_id DESC"))
+
+    def test_versions_pages(self):
+        for software_id in self.softwares:
+            rows = all_pages(lambda after: self.controller.get_versions_page(software_id, after, PAGE))
+            expected = sorted(self.conn.execute("SELECT version_id, version_number FROM Software_Versions WHERE software_id = ?", (software_id,)),
+                              key=lambda row: (version_sort_key(row[1]), row[0]), reverse=True)
+            self.assertEqual([row.version_id for row in rows], [row[0] for row in expected])
+
+    def test_bugs_pages(self):
+        for software_id in self.softwares:
+            rows = all_pages(lambda after: self.controller.get_bugs_page(software_id, after, PAGE))
+            expected = sorted(self.conn.execute("""
+                SELECT B.bug_id, B.date_reported FROM Bugs B JOIN Software_Versions V ON B.version_id = V.version_id
+                WHERE V.software_id = ?
+            """, (software_id,)), key=lambda row: (date_key(row[1]), row[0]), reverse=True)
+            self.assertEqual([row.bug_id for row in rows], [row[0] for row in expected])
+
+    def test_deployments_pages(self):
+        for software_id in self.softwares:
+            rows = all_pages(lambda after: self.controller.get_deployments_page(software_id, after, PAGE))
+            self.assertEqual([row.deployment_id for row in rows], self.ids("""
+                SELECT D.deployment_id FROM Deployments D JOIN Software_Versions V ON D.version_id = V.version_id
+                WHERE V.software_id = ? ORDER BY D.deployment_id DESC
+            """, (software_id,)))
+
+    def test_patch_notes_pages(self):
+        for software_id in self.softwares:
+            rows = all_pages(lambda after: self.controller.get_patch_notes_page(software_id, after, PAGE))
+            self.assertEqual([row.patch_id for row in rows], self.ids("""
+                SELECT P.patch_id FROM Patch_Notes P JOIN Software_Versions V ON P.version_id = V.version_id
+                WHERE V.software_id = ? ORDER BY P.patch_id DESC
+            """, (software_id,)))
+
+    def matching(self, table, key, columns, word, software_id=None):
+        #Rows with word among the words of their text columns, found without the index
+        query = f"SELECT T.{key}, {', '.join('T.' + column for column in columns)} FROM {table} T JOIN Software_Versions V ON T.version_id = V.version_id"
+        params = ()
+        if software_id:
+            query += " WHERE V.software_id = ?"
+            params = (software_id,)
+        return {row[0] for row in self.conn.execute(query, params) if any(word in (text or "").split() for text in row[1:])}
+
+    def test_search_finds_every_match(self):
+        sources = {"bug": ("Bugs", "bug_id", ("title", "description")),
+                   "patch_note": ("Patch_Notes", "patch_id", ("note_title", "note_description"))}
+        for word in WORDS:
+            for software_id in (None,) + tuple(self.softwares):
+                for kind, (table, key, columns) in sources.items():
+                    with self.subTest(word=word, software_id=software_id, kind=kind):
+                        hits = self.controller.search(word, software_id, (kind,), limit=1000)
+                        self.assertEqual({hit.row_id for hit in hits}, self.matching(table, key, columns, word, software_id))
+                        self.assertTrue(all(hit.kind == kind for hit in hits))
+
+    def test_search_limit_keeps_best_ranked(self):
+        #The limit applies after ranking every match, so a short list is the head of the full one
+        for word in WORDS:
+            with self.subTest(word=word):
+                ranked = self.controller.search(word, limit=1000)
+                self.assertEqual(self.controller.search(word, limit=5), ranked[:5])
+
+    def test_search_newest(self):
+        for word in WORDS:
+            with self.subTest(word=word):
+                newest = sorted(self.matching("Bugs", "bug_id", ("title", "description"), word), reverse=True)[:10]
+                hits = self.controller.search(word, kinds=("bug",), limit=1000, newest=10)
+                self.assertEqual({hit.row_id for hit in hits}, set(newest))
+
+    def test_cache_follows_own_writes(self):
+        c = self.controller
+        software_id = self.softwares[0]
+        first, after = c.get_bugs_page(software_id, None, PAGE)
+        other = c.get_bugs_page(self.softwares[1], None, PAGE)
+        version_id = c.get_versions(software_id)[0].version_id
+        bug_id = c.add_bug(version_id, "Newest", "", "Minor", "Open", "", "2099-01-01")
+        self.assertEqual(c.get_bugs_page(software_id, None, PAGE)[0][0].bug_id, bug_id)
+        c.update_bug(bug_id, "Renamed", "", "Minor", "Open", "", "2099-01-01")
+        self.assertEqual(c.get_bugs_page(software_id, None, PAGE)[0][0].title, "Renamed")
+        c.delete_bug(bug_id)
+        self.assertEqual(c.get_bugs_page(software_id, None, PAGE), (first, after))
+        #Writes to one software leave the others' entries cached
+        hits = c.cache.stats()["hits"]
+        self.assertEqual(c.get_bugs_page(self.softwares[1], None, PAGE), other)
+        self.assertEqual(c.cache.stats()["hits"], hits + 1)
+
+    def test_cache_follows_other_connections(self):
+        c = self.controller
+        software_id = self.softwares[0]
+        versions = c.get_versions(software_id)
+        other = sqlite3.connect(self.path)
+        other.execute("UPDATE Software_Versions SET notes = 'from elsewhere' WHERE version_id = ?", (versions[0].version_id,))
+        other.commit()
+        self.assertEqual(c.get_versions(software_id)[0].notes, "from elsewhere")
+        #A commit by another connection just before one of ours is not hidden by ours
+        other.execute("UPDATE Software_Versions SET notes = 'again' WHERE version_id = ?", (versions[0].version_id,))
+        other.commit()
+        other.close()
+        c.add_software("Unrelated")
+        self.assertEqual(c.get_versions(software_id)[0].notes, "again")
+
+    def test_cached_rows_are_copies(self):
+        c = self.controller
+        rows, _ = c.get_bugs_page(self.softwares[0], None, PAGE)
+        rows.clear()
+        self.assertEqual(len(c.get_bugs_page(self.softwares[0], None, PAGE)[0]), PAGE)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,120 @@
+import random
+import unittest
+
+from db import DEPLOYMENT_STATUSES, PENDING_DEPLOYMENT_STATUS, SUCCESSFUL_DEPLOYMENT_STATUS, VersionController
+
+SEVERITIES = ("Critical", "Major", "Minor", None)
+BUG_STATUSES = ("Open", "Resolved", "Closed", None)
+ENVIRONMENTS = ("Production", "Staging", None)
+OPERATIONS = 3000
+
+
+def recomputed_stats(conn):
+    #What the Software_Stats triggers should hold, counted from scratch
+    return set(conn.execute("""
+        SELECT V.software_id, 'bug_severity', COALESCE(B.severity, ''), COUNT(*)
+        FROM Bugs B JOIN Software_Versions V ON B.version_id = V.version_id GROUP BY 1, 2, 3
+        UNION ALL
+        SELECT V.software_id, 'bug_status', COALESCE(B.status, ''), COUNT(*)
+        FROM Bugs B JOIN Software_Versions V ON B.version_id = V.version_id GROUP BY 1, 2, 3
+        UNION ALL
+        SELECT V.software_id, 'deployment:' || COALESCE(D.environment, ''), COALESCE(D.deployment_status, ''), COUNT(*)
+        FROM Deployments D JOIN Software_Versions V ON D.version_id = V.version_id GROUP BY 1, 2, 3
+    """))
+
+
+def stored_stats(conn):
+    return set(conn.execute("SELECT software_id, metric, bucket, count FROM Software_Stats WHERE count != 0"))
+
+
+def recomputed_timeline(conn):
+    return set(conn.execute("""
+        SELECT E.software_id, L.days, E.day / L.days, E.kind, COUNT(*)
+        FROM (
+            SELECT software_id, CAST(julianday(release_date) AS INTEGER) AS day, 'version' AS kind FROM Software_Versions
+            UNION ALL
+            SELECT V.software_id, CAST(julianday(B.date_reported) AS INTEGER), 'bug'
+            FROM Bugs B JOIN Software_Versions V ON B.version_id = V.version_id
+            UNION ALL
+            SELECT V.software_id, CAST(julianday(D.deployment_date) AS INTEGER), 'deployment'
+            FROM Deployments D JOIN Software_Versions V ON D.version_id = V.version_id
+        ) E, Timeline_Levels L
+        WHERE E.day IS NOT NULL
+        GROUP BY 1, 2, 3, 4
+    """))
+
+
+def stored_timeline(conn):
+    return set(conn.execute("SELECT software_id, days, bucket, kind, count FROM Timeline_Buckets WHERE count != 0"))
+
+
+class SoftwareStatsTest(unittest.TestCase):
+    def setUp(self):
+        self.controller = VersionController(":memory:")
+        self.conn = self.controller.conn
+
+    def tearDown(self):
+        self.controller.close()
+
+    def ids(self, query):
+        return [row[0] for row in self.conn.execute(query)]
+
+    def random_operation(self, rng):
+        c = self.controller
+        softwares = self.ids("SELECT software_id FROM Softwares")
+        versions = self.ids("SELECT version_id FROM Software_Versions")
+        bugs = self.ids("SELECT bug_id FROM Bugs")
+        deployments = self.ids("SELECT deployment_id FROM Deployments")
+        op = rng.randrange(12)
+        if op == 0 or not softwares:
+            c.add_software(f"Software {rng.random()}")
+        elif op == 1 or not versions:
+            c.add_version(rng.choice(softwares), f"{rng.randrange(5)}.{rng.randrange(5)}", f"2024-01-{rng.randrange(1, 29):02}", "Stable", "")
+        elif op == 2:
+            c.add_bug(rng.choice(versions), "Bug", "", rng.choice(SEVERITIES), rng.choice(BUG_STATUSES), "", f"2024-02-{rng.randrange(1, 29):02}")
+        elif op == 3:
+            c.add_deployment(rng.choice(softwares), rng.choice(ENVIRONMENTS), "2024-03-01", rng.choice(DEPLOYMENT_STATUSES))
+        elif op == 4 and bugs:
+            c.update_bug(rng.choice(bugs), "Bug", "", rng.choice(SEVERITIES), rng.choice(BUG_STATUSES), "", "2024-02-02")
+        elif op == 5 and deployments:
+            c.update_deployment(rng.choice(deployments), rng.choice(ENVIRONMENTS), "2024-03-02", rng.choice(DEPLOYMENT_STATUSES))
+        elif op == 6 and bugs:
+            c.delete_bug(rng.choice(bugs))
+        elif op == 7 and deployments:
+            c.delete_deployment(rng.choice(deployments))
+        elif op == 8 and rng.random() < 0.2:
+            c.delete_version(rng.choice(versions))
+        elif op == 9 and rng.random() < 0.05:
+            c.delete_software(rng.choice(softwares))
+        elif op == 10:
+            #Moves the triggers must follow but the controller never makes
+            table, key = rng.choice([("Bugs", "bug_id"), ("Deployments", "deployment_id")])
+            rows = bugs if table == "Bugs" else deployments
+            if rows:
+                self.conn.execute(f"UPDATE {table} SET version_id = ? WHERE {key} = ?", (rng.choice(versions), rng.choice(rows)))
+                self.conn.commit()
+        elif op == 11:
+            self.conn.execute("UPDATE Software_Versions SET software_id = ? WHERE version_id = ?",
+                              (rng.choice(softwares), rng.choice(versions)))
+            self.conn.commit()
+
+    def test_triggers_match_recomputation(self):
+        rng = random.Random(42)
+        for step in range(1, OPERATIONS + 1):
+            self.random_operation(rng)
+            if step % 100 == 0:
+                self.assertEqual(stored_stats(self.conn), recomputed_stats(self.conn), f"stats after operation {step}")
+                self.assertEqual(stored_timeline(self.conn), recomputed_timeline(self.conn), f"timeline after operation {step}")
+
+    def test_success_rate_ignores_pending(self):
+        c = self.controller
+        software_id = c.add_software("App")
+        c.add_version(software_id, "1.0", "2024-01-01", "Stable", "")
+        for status in (SUCCESSFUL_DEPLOYMENT_STATUS, SUCCESSFUL_DEPLOYMENT_STATUS, "Failed", PENDING_DEPLOYMENT_STATUS):
+            c.add_deployment(software_id, "Production", "2024-03-01", status)
+        c.add_deployment(software_id, "Staging", "2024-03-01", PENDING_DEPLOYMENT_STATUS)
+        self.assertEqual(c.get_stats(software_id)["deployment_success_rate"], {"Production": 2 / 3})
+
+
+if __name__ == "__main__":
+    unittest.main()
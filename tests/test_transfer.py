@@ -0,0 +1,77 @@
+import os
+import tempfile
+import unittest
+
+import transfer
+from db import TABLE_COLUMNS, VersionController
+
+
+def snapshot(controller):
+    #Every exported table plus the columns and tables the database derives from them
+    tables = {table: list(controller.iter_rows(table)) for table in TABLE_COLUMNS}
+    for table, columns in (("Software_Versions", "version_id, version_key"), ("Bugs", "bug_id, software_id"),
+                           ("Deployments", "deployment_id, software_id"), ("Patch_Notes", "patch_id, software_id")):
+        tables[table + " derived"] = controller.conn.execute(f"SELECT {columns} FROM {table} ORDER BY 1").fetchall()
+    tables["Software_Stats"] = controller.conn.execute("SELECT * FROM Software_Stats WHERE count != 0 ORDER BY 1, 2, 3").fetchall()
+    tables["Timeline_Buckets"] = controller.conn.execute("SELECT * FROM Timeline_Buckets WHERE count != 0 ORDER BY 1, 2, 3, 4").fetchall()
+    return tables
+
+
+class RoundTripTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.source = VersionController(os.path.join(self.directory.name, "source.db"))
+        self.fill(self.source)
+
+    def tearDown(self):
+        self.source.close()
+        self.directory.cleanup()
+
+    def fill(self, controller):
+        app = controller.add_software("App")
+        tool = controller.add_software("Tool, \"quoted\"")
+        controller.archive_software(tool)
+        first = controller.add_version(app, "1.0.0", "2024-01-01", "Stable", "")
+        second = controller.add_version(app, "v1.10.0-rc1", None, None, None)
+        controller.add_version(tool, "2.0", "2024-02-01", "Beta", "line one\nline two")
+        controller.add_bug(first, "Crash", "", "Critical", "Open", None, "2024-01-02")
+        controller.add_bug(first, "Leak", None, "Minor", "Resolved", "", "2024-01-03", "2024-01-10")
+        controller.add_bug(second, "Hang", "\\N in a description", None, "Resolved", "sam", "2024-01-04")
+        controller.add_bug(second, "", None, None, None, None, None)
+        controller.add_deployment(app, "Production", "2024-01-05", "Successful")
+        controller.add_deployment(app, None, None, None)
+        controller.add_patch_note(first, "Fixes", "")
+        controller.add_patch_note(second, None, None)
+        #A stored date that is not a date keeps its text
+        controller.insert_rows("Bugs", [(None, first, "Old", None, None, "Open", None, "last spring", None)])
+
+    def round_trip(self, fmt):
+        export = os.path.join(self.directory.name, fmt)
+        transfer.export_all(self.source, export, fmt)
+        target = VersionController(os.path.join(self.directory.name, f"{fmt}.db"))
+        try:
+            transfer.import_all(target, export)
+            self.assertEqual(snapshot(target), snapshot(self.source))
+        finally:
+            target.close()
+
+    def test_csv(self):
+        self.round_trip("csv")
+
+    def test_jsonl(self):
+        self.round_trip("jsonl")
+
+    def test_csv_blank_ids_are_assigned(self):
+        path = os.path.join(self.directory.name, "softwares.csv")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write("software_id,name,archived\n,Imported,\n")
+        target = VersionController(os.path.join(self.directory.name, "blank.db"))
+        try:
+            transfer.import_table(target, "Softwares", path)
+            self.assertEqual(list(target.iter_rows("Softwares")), [(1, "Imported", 0)])
+        finally:
+            target.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,53 @@
+import os
+import sqlite3
+import tempfile
+import unittest
+
+from db import VersionController, version_sort_key
+
+
+class OtherClientTest(unittest.TestCase):
+    #Another SQLite client (the sqlite3 shell, DB Browser, a script) has none of the app's SQL functions
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "versionary.db")
+        controller = VersionController(self.path)
+        self.software_id = controller.add_software("App")
+        controller.close()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_bare_connection_writes_versions(self):
+        conn = sqlite3.connect(self.path)
+        conn.execute("PRAGMA foreign_keys = ON")
+        version_id = conn.execute("""
+            INSERT INTO Software_Versions (software_id, version_number, release_date, status, notes)
+            VALUES (?, '1.10.0', '2024-01-01', 'Stable', '')
+        """, (self.software_id,)).lastrowid
+        conn.execute("INSERT INTO Bugs (version_id, title, severity, status, date_reported) VALUES (?, 'Crash', 'Major', 'Open', '2024-01-02')",
+                     (version_id,))
+        conn.execute("UPDATE Software_Versions SET version_number = '1.9.0' WHERE version_id = ?", (version_id,))
+        conn.commit()
+        conn.close()
+
+        controller = VersionController(self.path)
+        try:
+            self.assertEqual(controller.refresh_version_keys(), 1)
+            key = controller.conn.execute("SELECT version_key FROM Software_Versions WHERE version_id = ?", (version_id,)).fetchone()[0]
+            self.assertEqual(key, version_sort_key("1.9.0"))
+            self.assertEqual(controller.refresh_version_keys(), 0)
+        finally:
+            controller.close()
+
+    def test_no_trigger_needs_app_functions(self):
+        conn = sqlite3.connect(self.path)
+        triggers = conn.execute("SELECT name, sql FROM sqlite_master WHERE type = 'trigger'").fetchall()
+        conn.close()
+        for name, sql in triggers:
+            for function in ("version_sort_key(", "canonical_date("):
+                self.assertNotIn(function, sql, name)
+
+
+if __name__ == "__main__":
+    unittest.main()
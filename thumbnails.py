@@ -0,0 +1,109 @@
+import hashlib
+import os
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from widgets import build_pyramid
+from worker import TkDispatcher
+
+THUMBNAIL_SIZE = (64, 64)
+MEMORY_CACHE_SIZE = 256
+DECODE_THREADS = 2
+
+
+class ThumbnailService:
+    #Decodes and downscales patch note images on a thread pool.
+    #Finished thumbnails are kept on disk (keyed by path + mtime + size) and as PhotoImages in an in-memory LRU.
+    def __init__(self, tk_widget, cache_dir):
+        self.cache_dir = cache_dir
+        self.dispatcher = TkDispatcher(tk_widget)
+        self.pool = ThreadPoolExecutor(max_workers=DECODE_THREADS, thread_name_prefix="versionary-thumb")
+        self.photos = OrderedDict()
+        self.waiting = {}
+        self.placeholder_photo = None
+
+    def placeholder(self):
+        if self.placeholder_photo is None:
+            from PIL import Image, ImageTk
+            self.placeholder_photo = ImageTk.PhotoImage(Image.new("RGB", THUMBNAIL_SIZE, "#3a3a3a"))
+        return self.placeholder_photo
+
+    def cached(self, path):
+        #Returns (hit, photo); photo is None for images that could not be read
+        if path in self.photos:
+            self.photos.move_to_end(path)
+            return True, self.photos[path]
+        return False, None
+
+    def request(self, path, callback):
+        #callback(photo or None) runs on the Tk thread; concurrent requests for one path share a single decode
+        if path in self.waiting:
+            self.waiting[path].append(callback)
+            return
+        self.waiting[path] = [callback]
+        self.dispatcher.dispatch(self.pool.submit(self.load, path), lambda img: self.loaded(path, img))
+
+    def loaded(self, path, img):
+        from PIL import ImageTk
+        photo = ImageTk.PhotoImage(img) if img is not None else None
+        self.photos[path] = photo
+        while len(self.photos) > MEMORY_CACHE_SIZE:
+            self.photos.popitem(last=False)
+        for callback in self.waiting.pop(path, []):
+            callback(photo)
+
+    def load(self, path):
+        #Runs on the pool: all filesystem access and decoding stays off the Tk thread
+        from PIL import Image
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+
+        key = hashlib.sha1(f"{path}|{stat.st_mtime_ns}|{stat.st_size}|{THUMBNAIL_SIZE}".encode("utf-8")).hexdigest()
+        cache_path = os.path.join(self.cache_dir, f"{key}.png")
+        try:
+            with Image.open(cache_path) as cached:
+                cached.load()
+                return cached.copy()
+        except OSError:
+            pass
+
+        try:
+            with Image.open(path) as img:
+                #draft() lets JPEG decode straight at a reduced scale
+                img.draft("RGB", THUMBNAIL_SIZE)
+                img.thumbnail(THUMBNAIL_SIZE)
+                thumbnail = img.convert("RGBA") if img.mode not in ("RGB", "RGBA") else img.copy()
+        except Exception:
+            return None
+
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            thumbnail.save(cache_path, "PNG")
+        except OSError:
+            pass
+        return thumbnail
+
+    def run(self, func, *args, callback):
+        #Runs other image work (e.g. building a zoom pyramid) on the decode pool
+        return self.dispatcher.dispatch(self.pool.submit(func, *args), callback)
+
+    def close(self):
+        self.pool.shutdown(wait=False, cancel_futures=True)
+
+
+def load_pyramid(path):
+    from PIL import Image
+    try:
+        with Image.open(path) as img:
+            return build_pyramid(img)
+    except Exception:
+        return None
+
+
+def thumbnail_cache_dir(db_path):
+    #Kept next to the database so each database has its own cache
+    if db_path == ":memory:":
+        return os.path.join(os.path.expanduser("~"), ".versionary-thumbnails")
+    return os.path.join(os.path.dirname(os.path.abspath(db_path)), ".thumbnails")
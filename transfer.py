@@ -0,0 +1,134 @@
+import csv
+import json
+import os
+
+from attachments import AttachmentStore
+from db import TABLE_COLUMNS
+
+#File name (without extension) used for each table in an export directory
+ENTITY_FILES = {
+    "Softwares": "softwares",
+    "Software_Versions": "versions",
+    "Bugs": "bugs",
+    "Deployments": "deployments",
+    "Patch_Notes": "patch_notes",
+}
+FORMATS = ("csv", "jsonl")
+#Patch note images go into this subdirectory of an export, in the attachment store's own layout
+ATTACHMENTS_DIR = "attachments"
+#CSV has no NULL, and "" is a value of its own in text columns, so NULL is written as this marker (as MySQL and PostgreSQL do)
+CSV_NULL = "\\N"
+
+
+def _format_of(path):
+    extension = os.path.splitext(path)[1].lower()
+    if extension == ".csv":
+        return "csv"
+    if extension in (".jsonl", ".json"):
+        return "jsonl"
+    raise ValueError(f"Unsupported file type: {path}")
+
+
+def _write_csv(path, columns, rows):
+    count = 0
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(columns)
+        for row in rows:
+            writer.writerow(CSV_NULL if value is None else value for value in row)
+            count += 1
+    return count
+
+
+def _write_jsonl(path, columns, rows):
+    count = 0
+    with open(path, "w", encoding="utf-8") as f:
+        for row in rows:
+            f.write(json.dumps(dict(zip(columns, row)), ensure_ascii=False))
+            f.write("\n")
+            count += 1
+    return count
+
+
+def _read_csv(path, columns):
+    with open(path, newline="", encoding="utf-8") as f:
+        for record in csv.DictReader(f):
+            #Blank ids (hand-written files and exports from before CSV_NULL) mean "assign a new one"
+            yield tuple(None if record.get(column) == CSV_NULL or (column.endswith("_id") and not record.get(column))
+                        else record.get(column) for column in columns)
+
+
+def _read_jsonl(path, columns):
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                record = json.loads(line)
+                yield tuple(record.get(column) for column in columns)
+
+
+def export_table(controller, table, path):
+    columns = TABLE_COLUMNS[table]
+    writer = _write_csv if _format_of(path) == "csv" else _write_jsonl
+    return writer(path, columns, controller.iter_rows(table))
+
+
+def import_table(controller, table, path, transform=None):
+    #transform(row) -> row, if given, is applied to every row on its way in
+    columns = TABLE_COLUMNS[table]
+    reader = _read_csv if _format_of(path) == "csv" else _read_jsonl
+    rows = reader(path, columns)
+    return controller.insert_rows(table, map(transform, rows) if transform else rows)
+
+
+def export_attachments(controller, directory):
+    #Copies every stored image a patch note refers to; returns (copied, missing from the store)
+    store = AttachmentStore(os.path.join(directory, ATTACHMENTS_DIR))
+    hash_index = TABLE_COLUMNS["Patch_Notes"].index("image_hash")
+    digests = {row[hash_index] for row in controller.iter_rows("Patch_Notes") if row[hash_index]}
+    copied = missing = 0
+    for digest in digests:
+        if store.exists(digest):
+            continue
+        try:
+            with controller.attachments.open(digest) as data:
+                store.write(digest, data)
+            copied += 1
+        except FileNotFoundError:
+            missing += 1
+    return copied, missing
+
+
+def import_attachments(controller, directory):
+    #Adds every exported image to the controller's store; returns {exported hash: stored hash}, which differ if the store re-encodes
+    store = AttachmentStore(os.path.join(directory, ATTACHMENTS_DIR))
+    return {digest: controller.attachments.add(store.path_of(digest)) for digest in store.digests()}
+
+
+def export_all(controller, directory, fmt="csv"):
+    os.makedirs(directory, exist_ok=True)
+    counts = {}
+    for table, name in ENTITY_FILES.items():
+        counts[table] = export_table(controller, table, os.path.join(directory, f"{name}.{fmt}"))
+    counts["attachments"], counts["missing attachments"] = export_attachments(controller, directory)
+    return counts
+
+
+def import_all(controller, directory):
+    #Tables are loaded parents first; missing files are skipped. Images are stored before the patch notes that refer to them.
+    counts = {}
+    stored = import_attachments(controller, directory)
+    counts["attachments"] = len(stored)
+    hash_index = TABLE_COLUMNS["Patch_Notes"].index("image_hash")
+
+    def restore_hash(row):
+        if row[hash_index] in stored:
+            row = row[:hash_index] + (stored[row[hash_index]],) + row[hash_index + 1:]
+        return row
+
+    for table, name in ENTITY_FILES.items():
+        for fmt in FORMATS:
+            path = os.path.join(directory, f"{name}.{fmt}")
+            if os.path.exists(path):
+                counts[table] = import_table(controller, table, path, restore_hash if table == "Patch_Notes" else None)
+                break
+    return counts
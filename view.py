@@ -1,15 +1,117 @@
 import customtkinter as ctk
-from db import VersionController
+from db import (DEPLOYMENT_STATUSES, PENDING_DEPLOYMENT_STATUS, TIMELINE_LEVELS, TIMELINE_TILE, VersionController, date_key,
+                version_sort_key)
 import os
-from tkinter import filedialog
-from PIL import Image, ImageTk
 from tkinter import messagebox
+from widgets import ImageViewer, TimelineCanvas, VirtualList
+from worker import DatabaseWorker, show_error
+from thumbnails import ThumbnailService, load_pyramid, thumbnail_cache_dir
+from collections import OrderedDict
+
+MAX_CACHED_VIEWS = 4
+
+
+def date_errback(method):
+    #Writes go through the worker, whose errback gets the controller's ValueError for a date it could not read
+    def errback(error):
+        if isinstance(error, ValueError):
+            messagebox.showerror("Invalid Date", str(error))
+        else:
+            show_error(method, error)
+    return errback
+
+
+def image_errback(path):
+    #Adding a patch note hashes and copies its image on the worker; a file that cannot be read or stored fails it
+    def errback(error):
+        if isinstance(error, OSError):
+            messagebox.showerror("Attach Image", f"Could not store {os.path.basename(path)}: {error.strerror or error}")
+        else:
+            show_error("add_patch_note", error)
+    return errback
+
+
+class SearchBar(ctk.CTkFrame):
+    #Full-text search entry; while a query is typed its ranked hits replace list_widget
+    DEBOUNCE_MS = 150
+
+    def __init__(self, master, controller, worker, kinds, list_widget, on_select=None):
+        super().__init__(master, fg_color="transparent")
+        self.controller = controller
+        self.worker = worker
+        self.kinds = kinds
+        self.list_widget = list_widget
+        self.on_select = on_select
+        self.pending = None
+        self.query = ""
+        self.showing_results = False
+
+        self.entry = ctk.CTkEntry(self, placeholder_text="🔍 Search")
+        self.entry.pack(fill="x")
+        self.entry.bind("<KeyRelease>", self.schedule_search)
+
+        self.results = VirtualList(master, row_height=56, create_row=self.create_hit_row,
+                                   bind_row=self.bind_hit_row, key=lambda hit: (hit.kind, hit.row_id))
+
+    def schedule_search(self, event=None):
+        if self.pending:
+            self.after_cancel(self.pending)
+        self.pending = self.after(self.DEBOUNCE_MS, self.run_search)
+
+    def run_search(self):
+        self.pending = None
+        self.query = self.entry.get().strip()
+        if not self.query:
+            self.show_results(False)
+            return
+
+        query = self.query
+        software_id = self.controller.get_active_software()
+        self.worker.call("search", query, software_id, self.kinds, callback=lambda hits: self.search_done(query, hits),
+                         errback=lambda error: self.search_failed(query, error))
+
+    def search_done(self, query, hits):
+        #Drop results for a query the user has already typed past
+        if query != self.query:
+            return
+        self.results.set_rows(hits)
+        self.show_results(True)
+
+    def search_failed(self, query, error):
+        if query != self.query:
+            return
+        self.results.set_rows([])
+        self.results.show_error(f"Search failed: {error}", self.run_search)
+        self.show_results(True)
+
+    def show_results(self, visible):
+        if visible and not self.showing_results:
+            self.list_pack = {key: value for key, value in self.list_widget.pack_info().items() if key != "in"}
+            self.list_widget.pack_forget()
+            self.results.pack(**self.list_pack)
+        elif not visible and self.showing_results:
+            self.results.pack_forget()
+            self.list_widget.pack(**self.list_pack)
+        self.showing_results = visible
+
+    def create_hit_row(self, parent):
+        return ctk.CTkButton(parent, text="", anchor="w", height=52)
+
+    def bind_hit_row(self, btn, hit):
+        kind, row_id, title, snippet, version_number = hit
+        command = (lambda: self.on_select(kind, row_id)) if self.on_select else None
+        btn.configure(text=f"[{version_number}] {title}\n{snippet}", command=command)
 
 
 class DashboardView(ctk.CTkFrame):
-    def __init__(self, master, controller):
+    #Tables whose changes make this view stale while it is hidden
+    depends_on = {"Softwares", "Software_Versions", "Bugs", "Deployments", "Patch_Notes"}
+
+    def __init__(self, master, controller, worker):
         super().__init__(master)
         self.controller = controller
+        self.worker = worker
+        self.stale = False
 
         ctk.CTkLabel(self, text="📊 Dashboard", font=("Arial", 20)).pack(pady=10)
 
@@ -19,92 +121,216 @@ class DashboardView(ctk.CTkFrame):
         self.add_button = ctk.CTkButton(self, text="Add Software", command=self.add_software)
         self.add_button.pack(pady=5)
 
+        self.archived_button = ctk.CTkButton(self, text="📦 Archived Software", command=self.show_archived)
+        self.archived_button.pack(pady=5)
+
         self.software_dropdown = ctk.CTkOptionMenu(self, values=["Loading..."], command=self.change_selected_software)
         self.software_dropdown.pack(pady=10, fill="x", padx=10)
 
         self.summary_label = ctk.CTkLabel(self, text="Loading recent activity...", justify="left", anchor="w")
         self.summary_label.pack(pady=10, padx=10, fill="x")
-        
-        self.software_list_frame = ctk.CTkScrollableFrame(self)
-        self.software_list_frame.pack(pady=5, fill="both", expand=True, padx=10)
+
+        self.stats_label = ctk.CTkLabel(self, text="", justify="left", anchor="w")
+        self.stats_label.pack(pady=(0, 10), padx=10, fill="x")
+
+        self.software_list = VirtualList(self, row_height=36, create_row=self.create_software_row,
+                                         bind_row=self.bind_software_row, fetch_page=self.fetch_softwares_page)
+        self.software_list.pack(pady=5, fill="both", expand=True, padx=10)
 
         self.load_softwares()
 
+    def refresh(self):
+        self.update_summary()
+
     def add_software(self):
         name = self.software_entry.get().strip()
         if name:
-            self.controller.add_software(name)
-            self.software_entry.delete(0, ctk.END)
-            self.load_softwares()
+            self.worker.call("add_software", name, callback=self.software_added)
+
+    def software_added(self, software_id):
+        self.software_entry.delete(0, ctk.END)
+        self.worker.call("get_software", software_id, callback=self.show_added_software)
+
+    def show_added_software(self, software):
+        self.software_map[software.name] = software.software_id
+        self.software_dropdown.configure(values=list(self.software_map.keys()))
+        self.software_list.upsert(software)
+        self.select_software(software)
 
     def load_softwares(self):
-        softwares = self.controller.get_softwares()
-        self.software_map = {name: sid for sid, name in softwares}
+        self.software_map = {}
+        self.select_software(None)
+        self.software_list.reset()
 
+    def fetch_softwares_page(self, after, done, failed):
+        self.worker.call("get_softwares_page", after, callback=lambda page: self.softwares_loaded(after, *page, done), errback=failed)
+
+    def softwares_loaded(self, after, softwares, next_cursor, done):
+        for software in softwares:
+            self.software_map[software.name] = software.software_id
         self.software_dropdown.configure(values=list(self.software_map.keys()))
-        if softwares:
-            first = softwares[0][1]
-            self.software_dropdown.set(first)
-            self.controller.set_active_software(self.software_map[first])
 
-        #Refresh software display
-        for widget in self.software_list_frame.winfo_children():
-            widget.destroy()
+        if softwares and after is None:
+            self.select_software(softwares[0])
+        done(softwares, next_cursor)
 
-        for sid, name in softwares:
-            row = ctk.CTkFrame(self.software_list_frame)
-            row.pack(fill="x", pady=2)
+    def select_software(self, software):
+        if software:
+            software_id, name = software
+            self.software_dropdown.set(name)
+            self.controller.set_active_software(software_id)
+        else:
+            self.software_dropdown.set("")
+            self.controller.set_active_software(None)
+        self.update_summary()
 
-            label = ctk.CTkLabel(row, text=name, anchor="w")
-            label.pack(side="left", fill="x", expand=True)
+    def create_software_row(self, parent):
+        row = ctk.CTkFrame(parent, height=32)
+        row.pack_propagate(False)
 
-            edit_btn = ctk.CTkButton(row, text="✏️ rename", width=30, command=lambda sid=sid, n=name: self.edit_software_prompt(sid, n))
-            edit_btn.pack(side="right", padx=2)
+        row.label = ctk.CTkLabel(row, text="", anchor="w")
+        row.label.pack(side="left", fill="x", expand=True)
 
-            del_btn = ctk.CTkButton(row, text="🗑️ delete", width=30, fg_color="red", command=lambda sid=sid: self.delete_software(sid))
-            del_btn.pack(side="right", padx=2)
-            self.update_summary()
+        row.edit_btn = ctk.CTkButton(row, text="✏️ rename", width=30)
+        row.edit_btn.pack(side="right", padx=2)
+
+        row.del_btn = ctk.CTkButton(row, text="🗑️ delete", width=30, fg_color="red")
+        row.del_btn.pack(side="right", padx=2)
+
+        row.archive_btn = ctk.CTkButton(row, text="📦 archive", width=30)
+        row.archive_btn.pack(side="right", padx=2)
+        return row
+
+    def bind_software_row(self, row, software):
+        sid, name = software
+        row.label.configure(text=name)
+        row.edit_btn.configure(command=lambda: self.edit_software_prompt(sid, name))
+        row.del_btn.configure(command=lambda: self.delete_software(sid))
+        row.archive_btn.configure(command=lambda: self.archive_software(sid))
 
     def edit_software_prompt(self, software_id, current_name):
         new_name = ctk.CTkInputDialog(text=f"Rename software '{current_name}' to:", title="Edit Software").get_input()
         if new_name and new_name.strip():
-            self.controller.update_software(software_id, new_name.strip())
-            self.load_softwares()
+            self.worker.call("update_software", software_id, new_name.strip(),
+                             callback=lambda _: self.software_renamed(software_id, current_name))
+
+    def software_renamed(self, software_id, current_name):
+        self.worker.call("get_software", software_id, callback=lambda software: self.show_renamed_software(current_name, software))
+
+    def show_renamed_software(self, current_name, software):
+        self.software_map.pop(current_name, None)
+        self.software_map[software.name] = software.software_id
+        self.software_dropdown.configure(values=list(self.software_map.keys()))
+        if self.software_dropdown.get() == current_name:
+            self.software_dropdown.set(software.name)
+        self.software_list.upsert(software)
 
     def update_summary(self):
         software_id = self.controller.get_active_software()
         if not software_id:
             self.summary_label.configure(text="No software selected.")
+            self.stats_label.configure(text="")
             return
 
-        #Get latest
-        versions = self.controller.get_versions(software_id)
-        latest_version = versions[0] if versions else None
-        version_text = f"Latest Version: v{latest_version[1]} ({latest_version[3]})" if latest_version else "No versions yet."
+        self.summary_label.configure(text="Loading recent activity...")
+        self.worker.call("get_software_summary", software_id, callback=lambda latest: self.show_summary(software_id, latest),
+                         errback=lambda error: self.summary_failed(software_id, self.summary_label, error))
+        self.worker.call("get_stats", software_id, callback=lambda stats: self.show_stats(software_id, stats),
+                         errback=lambda error: self.summary_failed(software_id, self.stats_label, error))
 
-        #Get latest patch
-        patches = self.controller.get_patch_notes_by_software(software_id)
-        latest_patch = patches[0] if patches else None
-        patch_text = f"Latest Patch: {latest_patch[1]}" if latest_patch else "No patch notes yet."
+    def summary_failed(self, software_id, label, error):
+        #The summary is loaded again on the next refresh or software change
+        if software_id == self.controller.get_active_software():
+            label.configure(text=f"Could not load: {error}")
 
-        #Get latest bug
-        bugs = self.controller.get_bugs_by_software(software_id)
-        latest_bug = bugs[0] if bugs else None
-        bug_text = f"Latest Bug: {latest_bug[1]}" if latest_bug else "No bugs reported."
+    def show_summary(self, software_id, latest):
+        #Ignore summaries that arrive after the selection moved on
+        if software_id != self.controller.get_active_software():
+            return
+
+        latest_version = latest["version"]
+        version_text = f"Latest Version: v{latest_version[0]} ({latest_version[1]})" if latest_version else "No versions yet."
+
+        latest_patch = latest["patch"]
+        patch_text = f"Latest Patch: {latest_patch[0]}" if latest_patch else "No patch notes yet."
+
+        latest_bug = latest["bug"]
+        bug_text = f"Latest Bug: {latest_bug[0]}" if latest_bug else "No bugs reported."
 
-        #Get latest deployment
-        deployments = self.controller.get_deployments(software_id)
-        latest_deployment = deployments[0] if deployments else None
-        deploy_text = f"Last Deployment: {latest_deployment[1]} - {latest_deployment[2]} ({latest_deployment[3]})" if latest_deployment else "No deployments yet."
+        latest_deployment = latest["deployment"]
+        deploy_text = f"Last Deployment: {latest_deployment[0]} - {latest_deployment[1]} ({latest_deployment[2]})" if latest_deployment else "No deployments yet."
 
         summary = f"{version_text}\n{patch_text}\n{bug_text}\n{deploy_text}"
         self.summary_label.configure(text=summary)
 
+    def show_stats(self, software_id, stats):
+        if software_id != self.controller.get_active_software():
+            return
+
+        def counts(buckets):
+            return " · ".join(f"{name or '-'} {count}" for name, count in sorted(buckets.items())) or "none"
+
+        def success(environment, statuses):
+            rate = stats["deployment_success_rate"].get(environment)
+            if rate is None:
+                return f"{environment or '-'} none completed"
+            return f"{environment or '-'} {rate:.0%} of {sum(statuses.values()) - statuses.get(PENDING_DEPLOYMENT_STATUS, 0)}"
+
+        deployments = " · ".join(success(environment, statuses)
+                                 for environment, statuses in sorted(stats["deployments"].items())) or "none"
+        self.stats_label.configure(text=f"Bugs by severity: {counts(stats['bugs_by_severity'])}\n"
+                                        f"Bugs by status: {counts(stats['bugs_by_status'])}\n"
+                                        f"Deployment success: {deployments}")
+
 
     def delete_software(self, software_id):
         if messagebox.askyesno("Delete Software", "Are you sure you want to delete this software and all its data?"):
-            self.controller.delete_software(software_id)
-            self.load_softwares()
+            self.worker.call("delete_software", software_id, callback=lambda _: self.drop_software(software_id))
+
+    def archive_software(self, software_id):
+        #Archived software keeps its data but leaves the list until restored from "Archived Software"
+        if messagebox.askyesno("Archive Software", "Archive this software? It can be restored from Archived Software."):
+            self.worker.call("archive_software", software_id, callback=lambda _: self.drop_software(software_id))
+
+    def show_archived(self):
+        top = ctk.CTkToplevel(self)
+        top.title("Archived Software")
+        top.geometry("400x300")
+        body = ctk.CTkScrollableFrame(top)
+        body.pack(fill="both", expand=True, padx=10, pady=10)
+        status = ctk.CTkLabel(body, text="Loading...")
+        status.pack(pady=10)
+
+        def loaded(softwares):
+            if not top.winfo_exists():
+                return
+            status.configure(text="" if softwares else "No archived software.")
+            for software in softwares:
+                row = ctk.CTkFrame(body, height=32)
+                row.pack(fill="x", pady=2)
+                ctk.CTkLabel(row, text=software.name, anchor="w").pack(side="left", fill="x", expand=True)
+                ctk.CTkButton(row, text="♻️ restore", width=30,
+                              command=lambda software=software, row=row: self.restore_software(software, row)).pack(side="right", padx=2)
+
+        self.worker.call("get_archived_softwares", callback=loaded,
+                         errback=lambda error: top.winfo_exists() and status.configure(text=f"Could not load: {error}"))
+
+    def restore_software(self, software, row):
+        self.worker.call("restore_software", software.software_id, callback=lambda _: self.software_restored(software, row))
+
+    def software_restored(self, software, row):
+        if row.winfo_exists():
+            row.destroy()
+        self.software_map[software.name] = software.software_id
+        self.software_dropdown.configure(values=list(self.software_map.keys()))
+        self.software_list.upsert(software)
+
+    def drop_software(self, software_id):
+        self.software_map = {name: sid for name, sid in self.software_map.items() if sid != software_id}
+        self.software_dropdown.configure(values=list(self.software_map.keys()))
+        self.software_list.remove(software_id)
+        if self.controller.get_active_software() == software_id:
+            self.select_software(self.software_list.rows[0] if self.software_list.rows else None)
         
 
 
@@ -115,9 +341,13 @@ class DashboardView(ctk.CTkFrame):
             self.update_summary()
 
 class VersionDetailsView(ctk.CTkFrame):
-    def __init__(self, master, controller):
+    depends_on = {"Software_Versions", "active_software"}
+
+    def __init__(self, master, controller, worker):
         super().__init__(master)
         self.controller = controller
+        self.worker = worker
+        self.stale = False
         self.selected_version_id = None
 
         ctk.CTkLabel(self, text="📜 Version Details", font=("Arial", 20)).pack(pady=10)
@@ -141,35 +371,55 @@ class VersionDetailsView(ctk.CTkFrame):
         self.delete_button = ctk.CTkButton(self, text="Delete Version", command=self.delete_version, fg_color="red")
         self.delete_button.pack(pady=2, padx=10, fill="x")
 
-        self.version_list_frame = ctk.CTkScrollableFrame(self)
-        self.version_list_frame.pack(pady=10, fill="both", expand=True)
-
         #Header row
-        ctk.CTkLabel(self.version_list_frame, text="Version", anchor="w", width=100).grid(row=0, column=0, sticky="w", padx=5)
-        ctk.CTkLabel(self.version_list_frame, text="Release Date", anchor="w", width=120).grid(row=0, column=1, sticky="w", padx=5)
-        ctk.CTkLabel(self.version_list_frame, text="Status", anchor="w", width=100).grid(row=0, column=2, sticky="w", padx=5)
-        ctk.CTkLabel(self.version_list_frame, text="Notes", anchor="w", width=200).grid(row=0, column=3, sticky="w", padx=5)
-
+        header = ctk.CTkFrame(self, fg_color="transparent")
+        header.pack(pady=(10, 0), fill="x")
+        ctk.CTkLabel(header, text="Version", anchor="w", width=100).pack(side="left", padx=5)
+        ctk.CTkLabel(header, text="Release Date", anchor="w", width=120).pack(side="left", padx=5)
+        ctk.CTkLabel(header, text="Status", anchor="w", width=100).pack(side="left", padx=5)
+        ctk.CTkLabel(header, text="Notes", anchor="w", width=200).pack(side="left", padx=5)
+
+        self.version_list = VirtualList(self, row_height=32, create_row=self.create_version_row,
+                                        bind_row=self.bind_version_row, fetch_page=self.fetch_versions_page,
+                                        sort_key=lambda version: (version_sort_key(version.version_number), version.version_id))
+        self.version_list.pack(pady=(0, 10), fill="both", expand=True)
+        self.version_list.reset()
+
+    def refresh(self):
+        self.clear_form()
         self.refresh_version_list()
 
     def refresh_version_list(self):
-        for widget in self.version_list_frame.winfo_children()[4:]:  # Skip the headers
-            widget.destroy()
+        self.version_list.reset()
 
+    def fetch_versions_page(self, after, done, failed):
         software_id = self.controller.get_active_software()
-        if software_id:
-            versions = self.controller.get_versions(software_id)
-            for i, (version_id, version_number, release_date, status, notes) in enumerate(versions, start=1):
-                ctk.CTkButton(
-                    self.version_list_frame,
-                    text=version_number,
-                    command=lambda v=(version_id, version_number, release_date, status, notes): self.load_version_for_edit(v),
-                    anchor="w"
-                ).grid(row=i, column=0, sticky="w", padx=5)
-
-                ctk.CTkLabel(self.version_list_frame, text=release_date, anchor="w").grid(row=i, column=1, sticky="w", padx=5)
-                ctk.CTkLabel(self.version_list_frame, text=status, anchor="w").grid(row=i, column=2, sticky="w", padx=5)
-                ctk.CTkLabel(self.version_list_frame, text=notes, anchor="w").grid(row=i, column=3, sticky="w", padx=5)
+        if not software_id:
+            done([], None)
+            return
+        self.worker.call("get_versions_page", software_id, after, callback=lambda page: done(*page), errback=failed)
+
+    def create_version_row(self, parent):
+        row = ctk.CTkFrame(parent, height=30, fg_color="transparent")
+        row.pack_propagate(False)
+
+        row.number_btn = ctk.CTkButton(row, text="", anchor="w", width=100)
+        row.number_btn.pack(side="left", padx=5)
+
+        row.date_label = ctk.CTkLabel(row, text="", anchor="w", width=120)
+        row.date_label.pack(side="left", padx=5)
+        row.status_label = ctk.CTkLabel(row, text="", anchor="w", width=100)
+        row.status_label.pack(side="left", padx=5)
+        row.notes_label = ctk.CTkLabel(row, text="", anchor="w", width=200)
+        row.notes_label.pack(side="left", padx=5)
+        return row
+
+    def bind_version_row(self, row, version):
+        version_id, version_number, release_date, status, notes = version
+        row.number_btn.configure(text=version_number, command=lambda: self.load_version_for_edit(version))
+        row.date_label.configure(text=release_date)
+        row.status_label.configure(text=status)
+        row.notes_label.configure(text=notes)
 
     def load_version_for_edit(self, version):
         self.selected_version_id, number, date, status, notes = version
@@ -193,18 +443,35 @@ class VersionDetailsView(ctk.CTkFrame):
             return
 
         if self.selected_version_id:
-            self.controller.update_version(self.selected_version_id, version, date, status, notes)
+            version_id = self.selected_version_id
+            self.worker.call("update_version", version_id, version, date, status, notes,
+                             callback=lambda _: self.version_saved(version_id), errback=date_errback("update_version"))
         else:
-            self.controller.add_version(software_id, version, date, status, notes)
+            self.worker.call("add_version", software_id, version, date, status, notes,
+                             callback=self.version_saved, errback=date_errback("add_version"))
 
+    def version_saved(self, version_id):
         self.clear_form()
-        self.refresh_version_list()
+        self.worker.call("get_version", version_id, callback=self.show_saved_version)
+
+    def show_saved_version(self, version):
+        if version:
+            self.version_list.upsert(version)
 
     def delete_version(self):
         if self.selected_version_id:
-            self.controller.delete_version(self.selected_version_id)
+            version_id = self.selected_version_id
+            index = self.version_list.index_of(version_id)
+            name = f"version {self.version_list.rows[index].version_number}" if index is not None else "this version"
+            #Deleting a version cascades to everything recorded against it
+            if not messagebox.askyesno("Delete Version", f"Are you sure you want to delete {name} and all its bugs, deployments and patch notes?"):
+                return
+            self.worker.call("delete_version", version_id, callback=lambda _: self.version_deleted(version_id))
+
+    def version_deleted(self, version_id):
+        if self.selected_version_id == version_id:
             self.clear_form()
-            self.refresh_version_list()
+        self.version_list.remove(version_id)
 
     def clear_form(self):
         self.selected_version_id = None
@@ -215,10 +482,15 @@ class VersionDetailsView(ctk.CTkFrame):
         self.add_version_button.configure(text="Add Version")
 
 class BugTrackingView(ctk.CTkFrame):
-    def __init__(self, master, controller):
+    depends_on = {"Bugs", "Software_Versions", "active_software"}
+
+    def __init__(self, master, controller, worker):
         super().__init__(master)
         self.controller = controller
+        self.worker = worker
+        self.stale = False
         self.selected_bug_id = None
+        self.version_map = {}
 
         ctk.CTkLabel(self, text="🐞 Bug Tracking", font=("Arial", 20)).pack(pady=10)
 
@@ -253,59 +525,79 @@ class BugTrackingView(ctk.CTkFrame):
         self.delete_bug_button.pack(pady=2, padx=10, fill="x")
 
         #Bug List
-        self.bug_list_frame = ctk.CTkScrollableFrame(self)
-        self.bug_list_frame.pack(pady=10, fill="both", expand=True)
+        self.bug_list = VirtualList(self, row_height=72, create_row=self.create_bug_row,
+                                    bind_row=self.bind_bug_row, fetch_page=self.fetch_bugs_page,
+                                    sort_key=lambda bug: (date_key(bug.date_reported), bug.bug_id))
+
+        self.search_bar = SearchBar(self, self.controller, self.worker, ("bug",), self.bug_list,
+                                    on_select=lambda kind, bug_id: self.worker.call("get_bug", bug_id, callback=self.load_found_bug))
+        self.search_bar.pack(pady=(10, 0), padx=10, fill="x")
+        self.bug_list.pack(pady=10, fill="both", expand=True)
 
+        self.refresh_bug_versions()
+        self.bug_list.reset()
+
+    def refresh(self):
+        self.clear_form()
         self.refresh_bug_versions()
         self.refresh_bug_list()
+        self.search_bar.run_search()
 
     def refresh_bug_versions(self):
         software_id = self.controller.get_active_software()
         if not software_id:
             return
 
-        versions = self.controller.get_versions(software_id)
-        self.version_map = {f"{v[1]} ({v[2]})": v[0] for v in versions}
+        self.version_dropdown.configure(values=["Loading..."])
+        self.worker.call("get_versions", software_id, callback=self.show_bug_versions)
+
+    def show_bug_versions(self, versions):
+        self.version_map = {f"{v.version_number} ({v.release_date})": v.version_id for v in versions}
         self.version_dropdown.configure(values=list(self.version_map.keys()))
         if versions:
             self.version_dropdown.set(list(self.version_map.keys())[0])
 
     def refresh_bug_list(self):
-        for widget in self.bug_list_frame.winfo_children():
-            widget.destroy()
+        self.bug_list.reset()
 
+    def fetch_bugs_page(self, after, done, failed):
         software_id = self.controller.get_active_software()
         if not software_id:
+            done([], None)
             return
+        self.worker.call("get_bugs_page", software_id, after, callback=lambda page: done(*page), errback=failed)
 
-        bugs = self.controller.get_bugs_by_software(software_id)
+    def create_bug_row(self, parent):
+        return ctk.CTkButton(parent, text="", anchor="w", height=68)
 
-        for bug in bugs:
-            bug_id, title, description, severity, status, assigned_to, date_reported, version_number = bug
-            text = f"[{version_number}] {title} | {severity} | {status}\nAssigned to: {assigned_to} | Reported: {date_reported}\n{description}"
-            btn = ctk.CTkButton(
-                self.bug_list_frame,
-                text=text,
-                command=lambda b=bug: self.load_bug_for_edit(b),
-                anchor="w"
-            )
-            btn.pack(fill="x", padx=5, pady=2)
+    def bind_bug_row(self, btn, bug):
+        bug_id, title, description, severity, status, assigned_to, date_reported, version_number, _ = bug
+        text = f"[{version_number}] {title} | {severity} | {status}\nAssigned to: {assigned_to} | Reported: {date_reported}\n{description}"
+        btn.configure(text=text, command=lambda: self.load_bug_for_edit(bug))
 
     def load_bug_for_edit(self, bug):
-        self.selected_bug_id, title, description, severity, status, assigned_to, date_reported, version_number = bug
-        self.version_dropdown.set(f"{version_number}")
+        self.selected_bug_id = bug.bug_id
+        #version_map keys also carry the release date, so look the bug's version up by id
+        version_key = next((key for key, version_id in self.version_map.items() if version_id == bug.version_id), None)
+        if version_key:
+            self.version_dropdown.set(version_key)
         self.title_entry.delete(0, ctk.END)
-        self.title_entry.insert(0, title)
+        self.title_entry.insert(0, bug.title)
         self.description_entry.delete(0, ctk.END)
-        self.description_entry.insert(0, description)
-        self.severity_menu.set(severity)
-        self.status_menu.set(status)
+        self.description_entry.insert(0, bug.description)
+        self.severity_menu.set(bug.severity)
+        self.status_menu.set(bug.status)
         self.assigned_to_entry.delete(0, ctk.END)
-        self.assigned_to_entry.insert(0, assigned_to)
+        self.assigned_to_entry.insert(0, bug.assigned_to)
         self.date_reported_entry.delete(0, ctk.END)
-        self.date_reported_entry.insert(0, date_reported)
+        self.date_reported_entry.insert(0, bug.date_reported)
         self.add_bug_button.configure(text="Update Bug")
 
+    def load_found_bug(self, bug):
+        #A search hit may have been deleted since the search ran
+        if bug:
+            self.load_bug_for_edit(bug)
+
     def clear_form(self):
         self.selected_bug_id = None
         self.title_entry.delete(0, ctk.END)
@@ -320,7 +612,8 @@ class BugTrackingView(ctk.CTkFrame):
     def add_or_update_bug(self):
         version_key = self.version_dropdown.get()
         version_id = self.version_map.get(version_key)
-        if not version_id:
+        #Updates keep the bug's version, so only a new bug needs one picked
+        if not version_id and not self.selected_bug_id:
             return
 
         title = self.title_entry.get()
@@ -334,24 +627,40 @@ class BugTrackingView(ctk.CTkFrame):
             return
 
         if self.selected_bug_id:
-            self.controller.update_bug(self.selected_bug_id, title, description, severity, status, assigned_to, date_reported)
+            bug_id = self.selected_bug_id
+            self.worker.call("update_bug", bug_id, title, description, severity, status, assigned_to, date_reported,
+                             callback=lambda _: self.bug_saved(bug_id), errback=date_errback("update_bug"))
         else:
-            self.controller.add_bug(version_id, title, description, severity, status, assigned_to, date_reported)
+            self.worker.call("add_bug", version_id, title, description, severity, status, assigned_to, date_reported,
+                             callback=self.bug_saved, errback=date_errback("add_bug"))
 
+    def bug_saved(self, bug_id):
         self.clear_form()
-        self.refresh_bug_list()
+        self.worker.call("get_bug", bug_id, callback=self.show_saved_bug)
+
+    def show_saved_bug(self, bug):
+        if bug:
+            self.bug_list.upsert(bug)
 
 
     def delete_bug(self):
         if self.selected_bug_id:
-            self.controller.delete_bug(self.selected_bug_id)
+            bug_id = self.selected_bug_id
+            self.worker.call("delete_bug", bug_id, callback=lambda _: self.bug_deleted(bug_id))
+
+    def bug_deleted(self, bug_id):
+        if self.selected_bug_id == bug_id:
             self.clear_form()
-            self.refresh_bug_list()
+        self.bug_list.remove(bug_id)
 
 class ReleaseManagementView(ctk.CTkFrame):
-    def __init__(self, master, controller):
+    depends_on = {"Deployments", "Software_Versions", "active_software"}
+
+    def __init__(self, master, controller, worker):
         super().__init__(master)
         self.controller = controller
+        self.worker = worker
+        self.stale = False
         self.selected_deployment_id = None
 
         ctk.CTkLabel(self, text="🚀 Release Management", font=("Arial", 20)).pack(pady=10)
@@ -363,8 +672,8 @@ class ReleaseManagementView(ctk.CTkFrame):
         self.deployment_date_entry = ctk.CTkEntry(self, placeholder_text="Deployment Date (YYYY-MM-DD)")
         self.deployment_date_entry.pack(pady=2, padx=10, fill="x")
 
-        self.status_entry = ctk.CTkOptionMenu(self, values=["Pending", "Successful", "Failed"])
-        self.status_entry.set("Pending")
+        self.status_entry = ctk.CTkOptionMenu(self, values=list(DEPLOYMENT_STATUSES))
+        self.status_entry.set(PENDING_DEPLOYMENT_STATUS)
         self.status_entry.pack(pady=2, padx=10, fill="x")
 
         self.add_deployment_button = ctk.CTkButton(self, text="Add Deployment", command=self.add_or_update_deployment)
@@ -373,33 +682,50 @@ class ReleaseManagementView(ctk.CTkFrame):
         self.delete_button = ctk.CTkButton(self, text="Delete Deployment", command=self.delete_deployment, fg_color="red")
         self.delete_button.pack(pady=2, padx=10, fill="x")
 
-        self.deployment_list_frame = ctk.CTkScrollableFrame(self)
-        self.deployment_list_frame.pack(pady=10, fill="both", expand=True)
-
         # Header row
-        ctk.CTkLabel(self.deployment_list_frame, text="Environment", anchor="w", width=120).grid(row=0, column=0, sticky="w", padx=5)
-        ctk.CTkLabel(self.deployment_list_frame, text="Date", anchor="w", width=120).grid(row=0, column=1, sticky="w", padx=5)
-        ctk.CTkLabel(self.deployment_list_frame, text="Status", anchor="w", width=100).grid(row=0, column=2, sticky="w", padx=5)
-
+        header = ctk.CTkFrame(self, fg_color="transparent")
+        header.pack(pady=(10, 0), fill="x")
+        ctk.CTkLabel(header, text="Environment", anchor="w", width=120).pack(side="left", padx=5)
+        ctk.CTkLabel(header, text="Date", anchor="w", width=120).pack(side="left", padx=5)
+        ctk.CTkLabel(header, text="Status", anchor="w", width=100).pack(side="left", padx=5)
+
+        self.deployment_list = VirtualList(self, row_height=32, create_row=self.create_deployment_row,
+                                           bind_row=self.bind_deployment_row, fetch_page=self.fetch_deployments_page)
+        self.deployment_list.pack(pady=(0, 10), fill="both", expand=True)
+        self.deployment_list.reset()
+
+    def refresh(self):
+        self.clear_form()
         self.refresh_deployment_list()
 
     def refresh_deployment_list(self):
-        for widget in self.deployment_list_frame.winfo_children()[3:]:
-            widget.destroy()
+        self.deployment_list.reset()
 
+    def fetch_deployments_page(self, after, done, failed):
         software_id = self.controller.get_active_software()
-        if software_id:
-            deployments = self.controller.get_deployments(software_id)
-            for i, (deployment_id, env, date, status) in enumerate(deployments, start=1):
-                ctk.CTkButton(
-                    self.deployment_list_frame,
-                    text=env,
-                    command=lambda d=(deployment_id, env, date, status): self.load_deployment_for_edit(d),
-                    anchor="w"
-                ).grid(row=i, column=0, sticky="w", padx=5)
-
-                ctk.CTkLabel(self.deployment_list_frame, text=date, anchor="w").grid(row=i, column=1, sticky="w", padx=5)
-                ctk.CTkLabel(self.deployment_list_frame, text=status, anchor="w").grid(row=i, column=2, sticky="w", padx=5)
+        if not software_id:
+            done([], None)
+            return
+        self.worker.call("get_deployments_page", software_id, after, callback=lambda page: done(*page), errback=failed)
+
+    def create_deployment_row(self, parent):
+        row = ctk.CTkFrame(parent, height=30, fg_color="transparent")
+        row.pack_propagate(False)
+
+        row.env_btn = ctk.CTkButton(row, text="", anchor="w", width=120)
+        row.env_btn.pack(side="left", padx=5)
+
+        row.date_label = ctk.CTkLabel(row, text="", anchor="w", width=120)
+        row.date_label.pack(side="left", padx=5)
+        row.status_label = ctk.CTkLabel(row, text="", anchor="w", width=100)
+        row.status_label.pack(side="left", padx=5)
+        return row
+
+    def bind_deployment_row(self, row, deployment):
+        deployment_id, env, date, status = deployment
+        row.env_btn.configure(text=env, command=lambda: self.load_deployment_for_edit(deployment))
+        row.date_label.configure(text=date)
+        row.status_label.configure(text=status)
 
     def load_deployment_for_edit(self, deployment):
         self.selected_deployment_id, env, date, status = deployment
@@ -419,60 +745,87 @@ class ReleaseManagementView(ctk.CTkFrame):
             return
 
         if self.selected_deployment_id:
-            self.controller.update_deployment(self.selected_deployment_id, env, date, status)
+            deployment_id = self.selected_deployment_id
+            self.worker.call("update_deployment", deployment_id, env, date, status,
+                             callback=lambda _: self.deployment_saved(deployment_id), errback=date_errback("update_deployment"))
         else:
-            self.controller.add_deployment(software_id, env, date, status)
+            self.worker.call("add_deployment", software_id, env, date, status,
+                             callback=self.deployment_saved, errback=date_errback("add_deployment"))
 
+    def deployment_saved(self, deployment_id):
         self.clear_form()
-        self.refresh_deployment_list()
+        self.worker.call("get_deployment", deployment_id, callback=self.show_saved_deployment)
+
+    def show_saved_deployment(self, deployment):
+        if deployment:
+            self.deployment_list.upsert(deployment)
 
     def delete_deployment(self):
         if self.selected_deployment_id:
-            self.controller.delete_deployment(self.selected_deployment_id)
+            deployment_id = self.selected_deployment_id
+            self.worker.call("delete_deployment", deployment_id, callback=lambda _: self.deployment_deleted(deployment_id))
+
+    def deployment_deleted(self, deployment_id):
+        if self.selected_deployment_id == deployment_id:
             self.clear_form()
-            self.refresh_deployment_list()
+        self.deployment_list.remove(deployment_id)
 
     def clear_form(self):
         self.selected_deployment_id = None
         self.environment_entry.set("Production")
         self.deployment_date_entry.delete(0, ctk.END)
-        self.status_entry.set("Pending")
+        self.status_entry.set(PENDING_DEPLOYMENT_STATUS)
         self.add_deployment_button.configure(text="Add Deployment")
 
 class VersionTimelineView(ctk.CTkFrame):
-    def __init__(self, master, controller):
+    depends_on = {"Software_Versions", "Bugs", "Deployments", "active_software"}
+
+    def __init__(self, master, controller, worker):
         super().__init__(master)
         self.controller = controller
+        self.worker = worker
+        self.stale = False
+        self.software_id = None
 
         ctk.CTkLabel(self, text="🕒 Version History Timeline", font=("Arial", 20)).pack(pady=10)
 
-        self.timeline_frame = ctk.CTkScrollableFrame(self)
-        self.timeline_frame.pack(expand=True, fill="both", padx=10, pady=10)
+        self.timeline = TimelineCanvas(self, TIMELINE_LEVELS, TIMELINE_TILE, fetch_tile=self.fetch_tile,
+                                       on_hover=lambda text: self.hover_label.configure(text=text),
+                                       bg="#2b2b2b", highlightthickness=0)
+        self.timeline.pack(expand=True, fill="both", padx=10, pady=(10, 0))
+
+        self.hover_label = ctk.CTkLabel(self, text="", anchor="w")
+        self.hover_label.pack(fill="x", padx=10)
+        ctk.CTkLabel(self, text="Scroll to zoom, drag to pan", text_color="gray", anchor="w").pack(fill="x", padx=10, pady=(0, 10))
 
         self.refresh_timeline()
 
+    def refresh(self):
+        self.refresh_timeline()
+
     def refresh_timeline(self):
-        for widget in self.timeline_frame.winfo_children():
-            widget.destroy()
+        self.software_id = self.controller.get_active_software()
+        if not self.software_id:
+            self.timeline.set_extent(None)
+            return
+        software_id = self.software_id
+        self.worker.call("get_timeline_extent", software_id, callback=lambda extent: self.extent_loaded(software_id, extent))
 
-        software_id = self.controller.get_active_software()
-        if software_id:
-            versions = self.controller.get_versions(software_id)
-            for version_id, number, date, status, notes in versions:
-                color = {
-                    "Stable": "🟢",
-                    "Beta": "🟡",
-                    "Deprecated": "🔴"
-                }.get(status, "⬜")
-
-                display = f"{color} {number} ({date})\nStatus: {status}\nNotes: {notes}\n"
-                label = ctk.CTkLabel(self.timeline_frame, text=display, anchor="w", justify="left")
-                label.pack(anchor="w", pady=4, fill="x")
+    def extent_loaded(self, software_id, extent):
+        if software_id == self.software_id:
+            self.timeline.set_extent(extent)
+
+    def fetch_tile(self, days, tile, done, failed):
+        self.worker.call("get_timeline_tile", self.software_id, days, tile, callback=done, errback=failed)
 
 class PatchNotesView(ctk.CTkFrame):
-    def __init__(self, master, controller):
+    depends_on = {"Patch_Notes", "Software_Versions", "active_software"}
+
+    def __init__(self, master, controller, worker):
         super().__init__(master)
         self.controller = controller
+        self.worker = worker
+        self.stale = False
         self.selected_image_path = None
 
         ctk.CTkLabel(self, text="📘 Patch Notes", font=("Arial", 20)).pack(pady=10)
@@ -492,27 +845,44 @@ class PatchNotesView(ctk.CTkFrame):
         self.add_button = ctk.CTkButton(self, text="Add Patch Note", command=self.add_patch_note)
         self.add_button.pack(pady=5, padx=10, fill="x")
 
-        self.notes_frame = ctk.CTkScrollableFrame(self)
-        self.notes_frame.pack(pady=10, fill="both", expand=True)
+        self.thumbnails = ThumbnailService(self, thumbnail_cache_dir(self.controller.db_path))
+        self.notes_list = VirtualList(self, row_height=84, create_row=self.create_note_row,
+                                      bind_row=self.bind_note_row, fetch_page=self.fetch_notes_page)
+
+        self.search_bar = SearchBar(self, self.controller, self.worker, ("patch_note",), self.notes_list)
+        self.search_bar.pack(pady=(10, 0), padx=10, fill="x")
+        self.notes_list.pack(pady=10, fill="both", expand=True)
+        self.notes_list.reset()
 
+    def refresh(self):
         self.refresh_notes()
+        self.search_bar.run_search()
 
     def browse_image(self):
+        from tkinter import filedialog
         path = filedialog.askopenfilename(filetypes=[("Image Files", "*.png *.jpg *.jpeg *.gif")])
         if path:
             self.selected_image_path = path
             self.preview_label.configure(text=os.path.basename(path))
 
     def add_patch_note(self):
-        version_id = self.controller.get_latest_version_id_for_active_software()
         title = self.title_entry.get()
-        desc = self.desc_entry.get()
-        image_path = self.selected_image_path
+        if title:
+            self.worker.call("get_latest_version_id_for_active_software",
+                             callback=lambda version_id: self.add_patch_note_to(version_id, title, self.desc_entry.get(), self.selected_image_path))
 
-        if version_id and title:
-            self.controller.add_patch_note(version_id, title, desc, image_path)
-            self.clear_form()
-            self.refresh_notes()
+    def add_patch_note_to(self, version_id, title, desc, image_path):
+        if version_id:
+            self.worker.call("add_patch_note", version_id, title, desc, image_path, callback=self.patch_note_added,
+                             errback=image_errback(image_path) if image_path else None)
+
+    def patch_note_added(self, patch_id):
+        self.clear_form()
+        self.worker.call("get_patch_note", patch_id, callback=self.show_added_patch_note)
+
+    def show_added_patch_note(self, note):
+        if note:
+            self.notes_list.upsert(note)
 
     def clear_form(self):
         self.title_entry.delete(0, ctk.END)
@@ -521,123 +891,207 @@ class PatchNotesView(ctk.CTkFrame):
         self.preview_label.configure(text="")
 
     def refresh_notes(self):
-        for widget in self.notes_frame.winfo_children():
-            widget.destroy()
+        self.notes_list.reset()
 
+    def fetch_notes_page(self, after, done, failed):
         software_id = self.controller.get_active_software()
-        if software_id:
-            notes = self.controller.get_patch_notes_by_software(software_id)
-            for patch_id, title, desc, img_path, version_number in notes:
-                frame = ctk.CTkFrame(self.notes_frame)
-                frame.pack(fill="x", padx=10, pady=5)
-
-                text = f"📌 {title} (v{version_number})\n{desc}"
-                ctk.CTkLabel(frame, text=text, anchor="w", justify="left").pack(side="left", fill="both", expand=True)
-
-                if img_path and os.path.exists(img_path):
-                    try:
-                        img = Image.open(img_path)
-                        img.thumbnail((64, 64))
-                        tk_img = ImageTk.PhotoImage(img)
-
-                        def open_image(path=img_path):
-                            if not os.path.exists(path):
-                                return
-
-                            top = ctk.CTkToplevel(self)
-                            top.title(os.path.basename(path))
-                            top.geometry("800x600")
-                            
-                            #Center window
-                            top.update_idletasks()
-                            w = 800
-                            h = 600
-                            x = (top.winfo_screenwidth() // 2) - (w // 2)
-                            y = (top.winfo_screenheight() // 2) - (h // 2)
-                            top.geometry(f"{w}x{h}+{x}+{y}")
-
-                            canvas = ctk.CTkCanvas(top, bg="black", highlightthickness=0)
-                            canvas.pack(fill="both", expand=True)
-
-                            try:
-                                original_img = Image.open(path)
-                            except Exception as e:
-                                ctk.CTkLabel(top, text=f"Error loading image: {e}").pack(pady=10)
-                                return
-                            
-                            zoom_level = [0.5]
-
-                            def render_image():
-                                img = original_img.copy()
-                                scale = zoom_level[0]
-                                img = img.resize((int(original_img.width * scale), int(original_img.height * scale)))
-                                tk_img = ImageTk.PhotoImage(img)
-                                canvas.img = tk_img  # prevent GC
-                                canvas.delete("all")
-                                canvas.create_image(canvas.winfo_width() // 2, canvas.winfo_height() // 2, anchor="center", image=tk_img)
-
-                        #scrol
-                            def zoom(event):
-                                if event.delta > 0:
-                                    zoom_level[0] *= 1.1
-                                else:
-                                    zoom_level[0] /= 1.1
-                                render_image()
-
-                            def save_image():
-                                save_path = filedialog.asksaveasfilename(defaultextension=".png", filetypes=[
-                                    ("PNG", "*.png"),
-                                    ("JPEG", "*.jpg;*.jpeg"),
-                                    ("GIF", "*.gif"),
-                                    ("BMP", "*.bmp"),
-                                    ("All files", "*.*")
-                                ])
-                                if save_path:
-                                    original_img.save(save_path)
-
-                            def close_popup():
-                                top.destroy()
-
-                            #Bind zoom
-                            canvas.bind("<Configure>", lambda e: render_image())
-                            canvas.bind("<MouseWheel>", zoom)
-                            canvas.bind("<Button-4>", lambda e: zoom(type("Event", (), {"delta": 120})))
-                            canvas.bind("<Button-5>", lambda e: zoom(type("Event", (), {"delta": -120})))
-
-                            #Button Row
-                            button_frame = ctk.CTkFrame(top)
-                            button_frame.place(relx=1.0, rely=0.0, anchor="ne", x=-10, y=10)
-
-                            close_btn = ctk.CTkButton(button_frame, text="❌", width=10, command=close_popup, fg_color="red", hover_color="#aa0000")
-                            close_btn.pack(side="right", padx=5)
-
-                            save_btn = ctk.CTkButton(button_frame, text="💾 Save As...", command=save_image)
-                            save_btn.pack(side="right", padx=5)
-
-                            render_image()
-
-
-                        img_label = ctk.CTkLabel(frame, image=tk_img, text="")
-                        img_label.image = tk_img
-                        img_label.pack(side="right", padx=5)
-                        img_label.bind("<Button-1>", lambda e, p=img_path: open_image(p))
-                    except:
-                        pass
-
-                del_btn = ctk.CTkButton(frame, text="❌", width=10, command=lambda pid=patch_id: self.delete_patch_note(pid))
-                del_btn.pack(side="right", padx=5)
+        if not software_id:
+            done([], None)
+            return
+        self.worker.call("get_patch_notes_page", software_id, after, callback=lambda page: done(*page), errback=failed)
+
+    def create_note_row(self, parent):
+        row = ctk.CTkFrame(parent, height=80)
+        row.pack_propagate(False)
 
+        row.text_label = ctk.CTkLabel(row, text="", anchor="w", justify="left")
+        row.text_label.pack(side="left", fill="both", expand=True)
+
+        row.del_btn = ctk.CTkButton(row, text="❌", width=10)
+        row.del_btn.pack(side="right", padx=5)
+
+        row.img_label = ctk.CTkLabel(row, text="")
+        row.img_path = None
+        return row
+
+    def bind_note_row(self, row, note):
+        patch_id, title, desc, img_path, version_number = note
+        row.text_label.configure(text=f"📌 {title} (v{version_number})\n{desc}")
+        row.del_btn.configure(command=lambda: self.delete_patch_note(patch_id))
+
+        row.img_path = img_path
+        if not img_path:
+            row.img_label.pack_forget()
+            return
+
+        row.img_label.unbind("<Button-1>")
+        row.img_label.bind("<Button-1>", lambda e: self.open_image(img_path))
+        hit, tk_img = self.thumbnails.cached(img_path)
+        if hit:
+            self.show_thumbnail(row, tk_img)
+        else:
+            #Decoding happens off the Tk thread; show a placeholder until it finishes
+            self.show_thumbnail(row, self.thumbnails.placeholder())
+            self.thumbnails.request(img_path, lambda tk_img: self.thumbnail_ready(row, img_path, tk_img))
+
+    def thumbnail_ready(self, row, img_path, tk_img):
+        #The pooled row may have been rebound to another note while the image was decoding
+        if row.img_path == img_path and row.winfo_exists():
+            self.show_thumbnail(row, tk_img)
+
+    def show_thumbnail(self, row, tk_img):
+        if tk_img:
+            row.img_label.configure(image=tk_img)
+            row.img_label.image = tk_img
+            row.img_label.pack(side="right", padx=5, before=row.del_btn)
+        else:
+            row.img_label.pack_forget()
+
+    def open_image(self, path):
+        if not os.path.exists(path):
+            return
+
+        top = ctk.CTkToplevel(self)
+        top.title(os.path.basename(path))
+        top.geometry("800x600")
+        
+        #Center window
+        top.update_idletasks()
+        w = 800
+        h = 600
+        x = (top.winfo_screenwidth() // 2) - (w // 2)
+        y = (top.winfo_screenheight() // 2) - (h // 2)
+        top.geometry(f"{w}x{h}+{x}+{y}")
+
+        viewer = ImageViewer(top, bg="black", highlightthickness=0)
+        viewer.pack(fill="both", expand=True)
+        status = ctk.CTkLabel(top, text="Loading...")
+        status.place(relx=0.5, rely=0.5, anchor="center")
+
+        def pyramid_loaded(levels):
+            if not top.winfo_exists():
+                return
+            if levels is None:
+                status.configure(text="Error loading image")
+                return
+            status.destroy()
+            viewer.set_pyramid(levels)
+
+        #Decoding and building the pyramid happens once, off the Tk thread
+        self.thumbnails.run(load_pyramid, path, callback=pyramid_loaded)
+
+        def save_image():
+            from tkinter import filedialog
+            from PIL import Image
+            save_path = filedialog.asksaveasfilename(defaultextension=".png", filetypes=[
+                ("PNG", "*.png"),
+                ("JPEG", "*.jpg;*.jpeg"),
+                ("GIF", "*.gif"),
+                ("BMP", "*.bmp"),
+                ("All files", "*.*")
+            ])
+            if save_path:
+                with Image.open(path) as original_img:
+                    original_img.save(save_path)
+
+        def close_popup():
+            top.destroy()
+
+        #Button Row
+        button_frame = ctk.CTkFrame(top)
+        button_frame.place(relx=1.0, rely=0.0, anchor="ne", x=-10, y=10)
+
+        close_btn = ctk.CTkButton(button_frame, text="❌", width=10, command=close_popup, fg_color="red", hover_color="#aa0000")
+        close_btn.pack(side="right", padx=5)
+
+        save_btn = ctk.CTkButton(button_frame, text="💾 Save As...", command=save_image)
+        save_btn.pack(side="right", padx=5)
 
     def delete_patch_note(self, patch_id):
         if messagebox.askyesno("Confirm Delete", "Are you sure you want to delete this patch note?"):
-            self.controller.delete_patch_note(patch_id)
-            self.refresh_notes()
+            self.worker.call("delete_patch_note", patch_id, callback=lambda _: self.notes_list.remove(patch_id))
+
+    def destroy(self):
+        self.thumbnails.close()
+        super().destroy()
+
+
+class DiagnosticsView(ctk.CTkFrame):
+    #Query statistics of an instrumented controller (see instrumentation.QueryStats), refreshed while the view is shown
+    depends_on = set()
+    REFRESH_MS = 1000
+
+    def __init__(self, master, controller, worker):
+        super().__init__(master)
+        self.controller = controller
+        self.worker = worker
+        self.stale = False
+
+        ctk.CTkLabel(self, text="🩺 Diagnostics", font=("Arial", 20)).pack(pady=10)
+
+        buttons = ctk.CTkFrame(self, fg_color="transparent")
+        buttons.pack(fill="x", padx=10)
+        ctk.CTkButton(buttons, text="Refresh", command=self.refresh).pack(side="left", padx=(0, 5))
+        ctk.CTkButton(buttons, text="Reset", command=self.reset_stats).pack(side="left")
+
+        self.report = ctk.CTkTextbox(self, font=("Courier", 12), wrap="none")
+        self.report.pack(expand=True, fill="both", padx=10, pady=10)
+
+        self.refresh_job = None
+        self.refresh()
+
+    def reset_stats(self):
+        self.controller.reset_query_stats()
+        self.refresh()
+
+    def refresh(self):
+        stats = self.controller.get_query_stats()
+        self.report.configure(state="normal")
+        self.report.delete("1.0", ctk.END)
+        self.report.insert("1.0", self.format_stats(stats) if stats else "Instrumentation is off.")
+        self.report.configure(state="disabled")
+        if self.refresh_job is not None:
+            self.after_cancel(self.refresh_job)
+        self.refresh_job = self.after(self.REFRESH_MS, self.auto_refresh)
+
+    def auto_refresh(self):
+        self.refresh_job = None
+        if self.winfo_ismapped():
+            self.refresh()
+        else:
+            self.stale = True
+
+    def format_stats(self, stats):
+        methods = sorted(stats["methods"].items(), key=lambda item: item[1]["total_ms"], reverse=True)
+        lines = [f"{'method':<40}{'calls':>8}{'total ms':>12}{'mean ms':>10}{'max ms':>10}{'stmts':>8}{'rows':>10}"]
+        for name, method in methods:
+            lines.append(f"{name:<40}{method['calls']:>8}{method['total_ms']:>12.1f}{method['mean_ms']:>10.2f}"
+                         f"{method['max_ms']:>10.1f}{method['statements']:>8}{method['rows']:>10}")
+
+        lines.append("")
+        lines.append(f"Slow queries (>= {stats['slow_ms']} ms), newest first:")
+        for query in reversed(stats["slow_queries"]):
+            lines.append(f"{query['ms']:.1f} ms  {query['rows']} rows  {query['method']}")
+            lines.append(f"    {query['sql']}")
+            for step in query["plan"] or []:
+                lines.append(f"      {step}")
+        return "\n".join(lines)
+
+    def destroy(self):
+        if self.refresh_job is not None:
+            self.after_cancel(self.refresh_job)
+        super().destroy()
 
 
 class MainView(ctk.CTkFrame):
-    def __init__(self, master):
+    #profile (optional) gets mark(phase) calls as startup progresses, see app.StartupProfile.
+    #instrumentation (optional, an instrumentation.QueryStats) is passed to the controller and adds a Diagnostics view.
+    def __init__(self, master, profile=None, instrumentation=None, reencode_format=None):
         super().__init__(master)
-        self.controller = VersionController()
+        self.profile = profile
+        self.controller = VersionController(instrumentation=instrumentation, reencode_format=reencode_format)
+        self.mark("controller opened")
+        self.worker = DatabaseWorker(self, self.controller)
 
         self.sidebar = ctk.CTkFrame(self, width=200)
         self.sidebar.pack(side="left", fill="y")
@@ -654,16 +1108,76 @@ class MainView(ctk.CTkFrame):
             "Patch Notes": PatchNotesView,
             
         }
+        if instrumentation:
+            self.views["Diagnostics"] = DiagnosticsView
 
         for name, view_class in self.views.items():
             btn = ctk.CTkButton(self.sidebar, text=name, command=lambda v=view_class: self.load_view(v))
             btn.pack(pady=5, padx=10, fill="x")
 
+        #Constructed views are kept (least recently used first) and shown or hidden on navigation
+        self.cached_views = OrderedDict()
+        self.controller.add_listener(self.on_data_changed)
+
         self.current_view = None
-        self.load_view(DashboardView)
+        self.mark("sidebar built")
+
+        #The dashboard is built after the window has first been drawn, so the window shows up without waiting for it
+        self.startup_label = ctk.CTkLabel(self.main_area, text="Loading...")
+        self.startup_label.place(relx=0.5, rely=0.5, anchor="center")
+        self.first_map = self.main_area.bind("<Map>", self.on_first_map, add="+")
+
+    def mark(self, phase):
+        if self.profile is not None:
+            self.profile.mark(phase)
+
+    def on_first_map(self, event):
+        self.main_area.unbind("<Map>", self.first_map)
+        self.mark("first paint")
+        self.after_idle(self.load_dashboard)
+
+    def load_dashboard(self):
+        self.startup_label.destroy()
+        if self.current_view is None:
+            self.load_view(DashboardView)
+        self.mark("dashboard built")
+        self.wait_for_data()
+
+    def wait_for_data(self):
+        #The dashboard's queries go through the worker; its data is in once nothing is outstanding
+        if self.worker.dispatcher.outstanding:
+            self.after(self.worker.dispatcher.POLL_MS, self.wait_for_data)
+        else:
+            self.mark("dashboard data loaded")
+
+    def on_data_changed(self, table):
+        #The visible view applies its own edits; hidden views just re-query when shown again
+        #Writes run on the worker, so this is called from its thread: it only sets flags, which load_view reads
+        for view in self.cached_views.values():
+            if view is not self.current_view and table in view.depends_on:
+                view.stale = True
 
     def load_view(self, view_class):
         if self.current_view:
-            self.current_view.destroy()
-        self.current_view = view_class(self.main_area, self.controller)
-        self.current_view.pack(expand=True, fill="both")
\ No newline at end of file
+            self.current_view.pack_forget()
+
+        view = self.cached_views.get(view_class)
+        if view is None:
+            view = view_class(self.main_area, self.controller, self.worker)
+            self.cached_views[view_class] = view
+            while len(self.cached_views) > MAX_CACHED_VIEWS:
+                _, evicted = self.cached_views.popitem(last=False)
+                evicted.destroy()
+        else:
+            self.cached_views.move_to_end(view_class)
+            if view.stale:
+                view.stale = False
+                view.refresh()
+
+        self.current_view = view
+        self.current_view.pack(expand=True, fill="both")
+
+    def destroy(self):
+        self.worker.close()
+        self.controller.close()
+        super().destroy()
\ No newline at end of file
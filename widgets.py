@@ -0,0 +1,593 @@
+import datetime
+import math
+from collections import OrderedDict
+
+import customtkinter as ctk
+
+
+class VirtualList(ctk.CTkFrame):
+    #Scrollable list that only builds enough row widgets to fill the viewport.
+    #Rows are fixed height; scrolling rebinds the pooled widgets to other rows instead of creating new ones.
+    #Rows are kept in descending sort_key order (the order of the pages) and identified by key.
+    #fetch_page(after, done, failed) loads a page asynchronously and calls done(rows, next_cursor) when it arrives,
+    #or failed(exception); paging then stops until the user presses Retry.
+    SCROLL_STEP = 60
+
+    def __init__(self, master, row_height, create_row, bind_row, fetch_page=None,
+                 key=lambda row: row[0], sort_key=lambda row: row[0], **kwargs):
+        super().__init__(master, **kwargs)
+        self.row_height = row_height
+        self.create_row = create_row
+        self.bind_row = bind_row
+        self.fetch_page = fetch_page
+        self.key = key
+        self.sort_key = sort_key
+
+        self.viewport = ctk.CTkFrame(self, fg_color="transparent")
+        self.viewport.pack(side="left", fill="both", expand=True)
+
+        self.scrollbar = ctk.CTkScrollbar(self, command=self.yview)
+        self.scrollbar.pack(side="right", fill="y")
+
+        self.pool = []
+        self.bound = []
+        self.rows = []
+        self.offset = 0
+        self.next_cursor = None
+        self.exhausted = True
+        self.pending = False
+        self.loading = False
+        self.failed = None
+        self.generation = 0
+
+        self.loading_label = ctk.CTkLabel(self.viewport, text="Loading...")
+        self.retry_button = ctk.CTkButton(self.viewport, text="", command=self.retry)
+
+        self.viewport.bind("<Configure>", lambda e: self.redraw())
+        self.bind_wheel(self.viewport)
+
+    def bind_wheel(self, widget):
+        widget.bind("<MouseWheel>", self.on_wheel, add="+")
+        widget.bind("<Button-4>", self.on_wheel, add="+")
+        widget.bind("<Button-5>", self.on_wheel, add="+")
+        for child in widget.winfo_children():
+            self.bind_wheel(child)
+
+    def on_wheel(self, event):
+        direction = -1 if event.num == 4 or event.delta > 0 else 1
+        self.scroll_to(self.offset + direction * self.SCROLL_STEP)
+
+    def yview(self, action, amount, unit=None):
+        if action == "moveto":
+            self.scroll_to(float(amount) * self.content_height())
+        elif unit == "pages":
+            self.scroll_to(self.offset + int(amount) * self.viewport_height())
+        else:
+            self.scroll_to(self.offset + int(amount) * self.row_height)
+
+    def viewport_height(self):
+        #Row heights and place() offsets are in unscaled units, winfo_height() is in real pixels
+        return int(self.viewport.winfo_height() / self._get_widget_scaling())
+
+    def content_height(self):
+        return len(self.rows) * self.row_height
+
+    def scroll_to(self, offset):
+        max_offset = max(0, self.content_height() - self.viewport_height())
+        offset = int(min(max(offset, 0), max_offset))
+        if offset != self.offset:
+            self.offset = offset
+            self.redraw()
+
+    def reset(self):
+        #Drop all rows and start again from the first page; pages still in flight are ignored
+        self.generation += 1
+        self.rows = []
+        self.offset = 0
+        self.next_cursor = None
+        self.exhausted = self.fetch_page is None
+        self.loading = False
+        self.failed = None
+        self.load_more()
+
+    def set_rows(self, rows):
+        #Show a fixed list of rows instead of paging
+        self.generation += 1
+        self.rows = list(rows)
+        self.offset = 0
+        self.exhausted = True
+        self.loading = False
+        self.failed = None
+        self.redraw()
+
+    def index_of(self, row_key):
+        for index, row in enumerate(self.rows):
+            if self.key(row) == row_key:
+                return index
+        return None
+
+    def upsert(self, row):
+        #Insert or replace a single row; only the pooled widgets whose row changed get rebound
+        index = self.index_of(self.key(row))
+        if index is not None:
+            if self.sort_key(self.rows[index]) == self.sort_key(row):
+                self.rows[index] = row
+                self.redraw()
+                return
+            del self.rows[index]
+
+        position = self.insertion_point(self.sort_key(row))
+        #A row sorting past the loaded pages arrives with a later page instead
+        if position < len(self.rows) or self.exhausted:
+            self.rows.insert(position, row)
+        self.redraw()
+
+    def remove(self, row_key):
+        index = self.index_of(row_key)
+        if index is not None:
+            del self.rows[index]
+            self.scroll_to(self.offset)
+            self.redraw()
+
+    def insertion_point(self, sort_key):
+        lo, hi = 0, len(self.rows)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self.sort_key(self.rows[mid]) > sort_key:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def request_more(self):
+        if not self.exhausted and not self.loading and not self.pending and not self.failed:
+            self.pending = True
+            self.after_idle(self.load_more)
+
+    def load_more(self):
+        self.pending = False
+        if not self.exhausted and not self.loading and not self.failed:
+            self.loading = True
+            generation = self.generation
+            self.fetch_page(self.next_cursor, lambda rows, next_cursor: self.page_loaded(generation, rows, next_cursor),
+                            lambda error: self.page_failed(generation, error))
+        self.redraw()
+
+    def page_loaded(self, generation, rows, next_cursor):
+        if generation != self.generation:
+            return
+        self.loading = False
+        self.rows.extend(rows)
+        self.next_cursor = next_cursor
+        self.exhausted = next_cursor is None
+        self.redraw()
+
+    def page_failed(self, generation, error):
+        if generation != self.generation:
+            return
+        self.loading = False
+        self.show_error(f"Could not load: {error}", self.load_more)
+
+    def show_error(self, message, retry):
+        #Replaces the loading state with a Retry button that calls retry(); nothing is fetched until it is pressed
+        self.failed = retry
+        self.retry_button.configure(text=f"{message} - Retry")
+        self.redraw()
+
+    def retry(self):
+        retry, self.failed = self.failed, None
+        if retry:
+            retry()
+
+    def redraw(self):
+        height = max(self.viewport_height(), self.row_height)
+        visible = height // self.row_height + 2
+
+        while len(self.pool) < visible:
+            widget = self.create_row(self.viewport)
+            self.bind_wheel(widget)
+            self.pool.append(widget)
+            self.bound.append(None)
+
+        first = self.offset // self.row_height
+        for slot, widget in enumerate(self.pool):
+            index = first + slot
+            if slot < visible and index < len(self.rows):
+                row = self.rows[index]
+                if self.bound[slot] is not row:
+                    self.bind_row(widget, row)
+                    self.bound[slot] = row
+                widget.place(x=0, y=index * self.row_height - self.offset, relwidth=1.0)
+            else:
+                widget.place_forget()
+                self.bound[slot] = None
+
+        if self.loading and not self.rows:
+            self.loading_label.place(relx=0.5, rely=0.5, anchor="center")
+        else:
+            self.loading_label.place_forget()
+        if self.failed:
+            self.retry_button.place(relx=0.5, rely=1.0 if self.rows else 0.5, anchor="s" if self.rows else "center")
+            self.retry_button.lift()
+        else:
+            self.retry_button.place_forget()
+
+        total = self.content_height()
+        if total <= height:
+            self.scrollbar.set(0.0, 1.0)
+        else:
+            self.scrollbar.set(self.offset / total, (self.offset + height) / total)
+
+        #Fetch the next page once the viewport gets within a screen of the loaded rows
+        if first + 2 * visible >= len(self.rows):
+            self.request_more()
+
+
+def build_pyramid(img, min_size=256):
+    #Level 0 is the full image, each further level is half the size of the previous one
+    if img.mode not in ("RGB", "RGBA", "L", "LA"):
+        img = img.convert("RGBA")
+    img.load()
+    levels = [img]
+    while max(levels[-1].size) > min_size:
+        levels.append(levels[-1].reduce(2))
+    return levels
+
+
+class ImageViewer(ctk.CTkCanvas):
+    #Zoomable, pannable image canvas backed by a mip pyramid.
+    #Each render only resamples the part of the closest pyramid level that is inside the viewport, so its cost depends on the window size rather than the image size.
+    #Wheel and drag events only update the zoom/center; the actual render is coalesced into one after_idle call.
+    ZOOM_STEP = 1.1
+    MAX_ZOOM = 8.0
+    REFINE_MS = 120
+
+    def __init__(self, master, **kwargs):
+        super().__init__(master, **kwargs)
+        self.levels = None
+        self.zoom = None
+        self.center = (0.0, 0.0)
+        self.drag_from = None
+        self.render_pending = False
+        self.refine_job = None
+        self.photo = None
+        self.item = self.create_image(0, 0, anchor="nw")
+
+        self.bind("<Configure>", lambda e: self.schedule_render())
+        self.bind("<MouseWheel>", lambda e: self.zoom_at(e.x, e.y, 1 if e.delta > 0 else -1))
+        self.bind("<Button-4>", lambda e: self.zoom_at(e.x, e.y, 1))
+        self.bind("<Button-5>", lambda e: self.zoom_at(e.x, e.y, -1))
+        self.bind("<ButtonPress-1>", self.start_drag)
+        self.bind("<B1-Motion>", self.drag)
+
+    def set_pyramid(self, levels):
+        self.levels = levels
+        self.zoom = None
+        width, height = levels[0].size
+        self.center = (width / 2, height / 2)
+        self.schedule_render()
+
+    def fit_zoom(self):
+        width, height = self.levels[0].size
+        return min(self.winfo_width() / width, self.winfo_height() / height, 1.0)
+
+    def zoom_at(self, x, y, steps):
+        if not self.levels:
+            return
+        #Keep the image point under the cursor fixed while zooming
+        min_zoom = self.fit_zoom() / 2
+        zoom = min(max(self.zoom * self.ZOOM_STEP ** steps, min_zoom), self.MAX_ZOOM)
+        cx, cy = self.center
+        px = cx + (x - self.winfo_width() / 2) / self.zoom
+        py = cy + (y - self.winfo_height() / 2) / self.zoom
+        self.center = (px - (px - cx) * self.zoom / zoom, py - (py - cy) * self.zoom / zoom)
+        self.zoom = zoom
+        self.schedule_render()
+
+    def start_drag(self, event):
+        self.drag_from = (event.x, event.y)
+
+    def drag(self, event):
+        if not self.levels or self.drag_from is None:
+            return
+        dx, dy = event.x - self.drag_from[0], event.y - self.drag_from[1]
+        self.drag_from = (event.x, event.y)
+        self.center = (self.center[0] - dx / self.zoom, self.center[1] - dy / self.zoom)
+        self.schedule_render()
+
+    def schedule_render(self):
+        if not self.render_pending:
+            self.render_pending = True
+            self.after_idle(self.render)
+
+    def render(self, refine=False):
+        #Interactive renders use a cheap filter; a smooth one follows once input stops
+        #PIL is imported here rather than at module level so startup does not load it
+        from PIL import Image, ImageTk
+        self.render_pending = False
+        if not self.levels:
+            return
+        view_w, view_h = self.winfo_width(), self.winfo_height()
+        if view_w <= 1 or view_h <= 1:
+            return
+        if self.zoom is None:
+            self.zoom = self.fit_zoom()
+
+        width, height = self.levels[0].size
+        cx, cy = self.center
+        left = max(cx - view_w / 2 / self.zoom, 0)
+        top = max(cy - view_h / 2 / self.zoom, 0)
+        right = min(cx + view_w / 2 / self.zoom, width)
+        bottom = min(cy + view_h / 2 / self.zoom, height)
+        out_w, out_h = int((right - left) * self.zoom), int((bottom - top) * self.zoom)
+        if out_w < 1 or out_h < 1:
+            self.itemconfigure(self.item, image="")
+            return
+
+        #Smallest level that is still at least as detailed as the zoom asks for
+        level = 0
+        while level + 1 < len(self.levels) and self.levels[level + 1].width >= width * self.zoom:
+            level += 1
+        img = self.levels[level]
+        ratio = img.width / width
+        box = (left * ratio, top * ratio, right * ratio, bottom * ratio)
+        resample = Image.BILINEAR if refine else Image.NEAREST
+        self.photo = ImageTk.PhotoImage(img.resize((out_w, out_h), resample, box=box))
+        self.itemconfigure(self.item, image=self.photo)
+        self.coords(self.item, int((left - cx) * self.zoom + view_w / 2), int((top - cy) * self.zoom + view_h / 2))
+
+        if self.refine_job is not None:
+            self.after_cancel(self.refine_job)
+            self.refine_job = None
+        if not refine:
+            self.refine_job = self.after(self.REFINE_MS, self.refine)
+
+    def refine(self):
+        self.refine_job = None
+        self.render(refine=True)
+
+
+#Julian day number of date.fromordinal(1); the timeline works in julian days like SQLite's julianday()
+JULIAN_ORDINAL_OFFSET = 1721424
+#Axis tick spacings as (approximate days, unit, units per tick), finest first
+TICK_STEPS = ((1, "day", 1), (7, "day", 7), (30, "month", 1), (91, "month", 3), (365, "year", 1), (365 * 5, "year", 5), (365 * 25, "year", 25))
+
+
+class TimelineCanvas(ctk.CTkCanvas):
+    #Date axis with one lane per event kind, drawn from pre-aggregated buckets (see VersionController.get_timeline_tile).
+    #The level is picked so a bucket is at least MIN_BUCKET_PX wide, buckets closer than CLUSTER_PX are drawn as one cluster,
+    #and only the tiles overlapping the viewport are fetched, so the cost of a redraw depends on the window width, not the number of events.
+    #fetch_tile(days, tile, done, failed) loads a tile asynchronously and calls done((buckets, versions)) when it arrives,
+    #or failed(exception); no further tiles are fetched until the canvas is clicked (or given a new extent).
+    ZOOM_STEP = 1.2
+    MIN_BUCKET_PX = 6
+    CLUSTER_PX = 12
+    MIN_DAYS_PER_PX = 1 / 200
+    MAX_TILES = 256
+    LABEL_PX = 70
+    AXIS_HEIGHT = 30
+    LANES = (("version", "Versions", "#4aa3ff"), ("deployment", "Deployments", "#5cc46a"), ("bug", "Bugs", "#e0604f"))
+
+    def __init__(self, master, levels, tile_size, fetch_tile, on_hover=None, **kwargs):
+        super().__init__(master, **kwargs)
+        self.levels = levels
+        self.tile_size = tile_size
+        self.fetch_tile = fetch_tile
+        self.on_hover = on_hover
+        self.start = 0.0
+        self.days_per_px = 1.0
+        self.extent = None
+        self.fit_pending = False
+        self.tiles = OrderedDict()
+        self.generation = 0
+        self.error = None
+        self.drag_from = None
+        self.render_pending = False
+        self.descriptions = {}
+
+        self.bind("<Configure>", lambda e: self.schedule_render())
+        self.bind("<MouseWheel>", lambda e: self.zoom_at(e.x, 1 if e.delta > 0 else -1))
+        self.bind("<Button-4>", lambda e: self.zoom_at(e.x, 1))
+        self.bind("<Button-5>", lambda e: self.zoom_at(e.x, -1))
+        self.bind("<ButtonPress-1>", self.start_drag)
+        self.bind("<B1-Motion>", self.drag)
+        self.bind("<Motion>", self.hover)
+
+    def set_extent(self, extent):
+        #extent is (first_day, last_day) or None; drops all loaded tiles and fits the view to it
+        self.extent = extent
+        self.generation += 1
+        self.tiles.clear()
+        self.error = None
+        self.fit_pending = extent is not None
+        self.schedule_render()
+
+    def fit(self, width):
+        first, last = self.extent
+        self.days_per_px = max((last - first + 1) * 1.1 / width, self.MIN_DAYS_PER_PX)
+        self.start = (first + last + 1) / 2 - width * self.days_per_px / 2
+        self.fit_pending = False
+
+    def zoom_at(self, x, steps):
+        day = self.start + x * self.days_per_px
+        days_per_px = self.days_per_px / self.ZOOM_STEP ** steps
+        if self.extent:
+            #Never zoom out further than a few times the whole history
+            span = self.extent[1] - self.extent[0] + 1
+            days_per_px = min(days_per_px, span * 4 / max(self.winfo_width(), 1) + 1)
+        self.days_per_px = max(days_per_px, self.MIN_DAYS_PER_PX)
+        self.start = day - x * self.days_per_px
+        self.schedule_render()
+
+    def start_drag(self, event):
+        self.drag_from = event.x
+        if self.error:
+            self.error = None
+            self.schedule_render()
+
+    def drag(self, event):
+        if self.drag_from is None:
+            return
+        self.start -= (event.x - self.drag_from) * self.days_per_px
+        self.drag_from = event.x
+        self.schedule_render()
+
+    def schedule_render(self):
+        if not self.render_pending:
+            self.render_pending = True
+            self.after_idle(self.render)
+
+    def level(self):
+        for days in self.levels:
+            if days / self.days_per_px >= self.MIN_BUCKET_PX:
+                return days
+        return self.levels[-1]
+
+    def visible_tiles(self, days):
+        width = self.winfo_width()
+        first = int(self.start // days) // self.tile_size
+        last = int((self.start + width * self.days_per_px) // days) // self.tile_size
+        return [(days, tile) for tile in range(first, last + 1)]
+
+    def tile(self, key):
+        #Loaded tile data, or None while it is still being fetched
+        if key in self.tiles:
+            self.tiles.move_to_end(key)
+            return self.tiles[key]
+        if self.error:
+            return None
+        self.tiles[key] = None
+        while len(self.tiles) > self.MAX_TILES:
+            self.tiles.popitem(last=False)
+        generation = self.generation
+        self.fetch_tile(*key, lambda data: self.tile_loaded(generation, key, data),
+                        lambda error: self.tile_failed(generation, key, error))
+        #Tiles may also arrive synchronously
+        return self.tiles.get(key)
+
+    def tile_loaded(self, generation, key, data):
+        if generation != self.generation:
+            return
+        self.tiles[key] = data
+        if key in self.visible_tiles(key[0]):
+            self.schedule_render()
+
+    def tile_failed(self, generation, key, error):
+        if generation != self.generation:
+            return
+        self.tiles.pop(key, None)
+        self.error = str(error)
+        self.schedule_render()
+
+    def render(self):
+        self.render_pending = False
+        self.delete("all")
+        self.descriptions = {}
+        width, height = self.winfo_width(), self.winfo_height()
+        if width <= 1 or height <= 1:
+            return
+        if not self.extent:
+            self.create_text(width / 2, height / 2, text="No dated versions, deployments or bugs", fill="gray")
+            return
+        if self.fit_pending:
+            self.fit(width)
+
+        days = self.level()
+        lane_height = (height - self.AXIS_HEIGHT) / len(self.LANES)
+        lanes = {kind: (index, color) for index, (kind, _, color) in enumerate(self.LANES)}
+        for index, (_, title, _) in enumerate(self.LANES):
+            y = index * lane_height
+            self.create_line(0, y + lane_height, width, y + lane_height, fill="#3a3a3a")
+            self.create_text(6, y + 4, text=title, anchor="nw", fill="gray")
+
+        #Buckets are merged per CLUSTER_PX column and lane; versions are labelled when the finest level is shown
+        clusters = {}
+        labels = []
+        loading = False
+        for key in self.visible_tiles(days):
+            data = self.tile(key)
+            if data is None:
+                loading = True
+                continue
+            buckets, versions = data
+            for bucket, kind, count in buckets:
+                x = (bucket * days + days / 2 - self.start) / self.days_per_px
+                if -self.CLUSTER_PX <= x <= width + self.CLUSTER_PX and kind in lanes:
+                    cluster = clusters.setdefault((kind, int(x // self.CLUSTER_PX)), [0, 0.0, bucket * days, bucket * days + days - 1])
+                    cluster[0] += count
+                    cluster[1] += x * count
+                    cluster[2] = min(cluster[2], bucket * days)
+                    cluster[3] = max(cluster[3], bucket * days + days - 1)
+            labels.extend(versions)
+
+        for (kind, _), (count, weighted_x, first, last) in clusters.items():
+            index, color = lanes[kind]
+            x = weighted_x / count
+            y = index * lane_height + lane_height / 2
+            radius = min(3 + 2 * math.log2(count), lane_height / 2 - 2)
+            item = self.create_oval(x - radius, y - radius, x + radius, y + radius, fill=color, outline="")
+            if count > 1 and radius >= 8:
+                self.create_text(x, y, text=str(count), fill="white", font=("Arial", 9))
+            span = _day_text(first) if first == last else f"{_day_text(first)} - {_day_text(last)}"
+            self.descriptions[item] = f"{count} {kind}{'s' if count != 1 else ''}, {span}"
+
+        if days == self.levels[0]:
+            index = lanes["version"][0]
+            y = index * lane_height + lane_height / 2
+            last_x = None
+            for day, _, number, status in labels:
+                x = (day + 0.5 - self.start) / self.days_per_px
+                if 0 <= x <= width and (last_x is None or x - last_x >= self.LABEL_PX):
+                    self.create_text(x, y - 14, text=number, fill="white", anchor="s", font=("Arial", 9))
+                    last_x = x
+
+        self.render_axis(width, height)
+        if self.error:
+            self.create_text(width - 6, 4, text=f"Could not load: {self.error} - click to retry", anchor="ne", fill="#e0604f")
+        elif loading:
+            self.create_text(width - 6, 4, text="Loading...", anchor="ne", fill="gray")
+
+    def render_axis(self, width, height):
+        #Ticks fall on calendar boundaries (day, month or year) at least 80px apart
+        y = height - self.AXIS_HEIGHT
+        self.create_line(0, y, width, y, fill="gray")
+        _, unit, every = next((step for step in TICK_STEPS if step[0] / self.days_per_px >= 80), TICK_STEPS[-1])
+        date = _day_date(self.start)
+        if unit == "year":
+            date = date.replace(year=max(date.year // every * every, 1), month=1, day=1)
+        elif unit == "month":
+            date = date.replace(month=(date.month - 1) // every * every + 1, day=1)
+        end = _day_date(self.start + width * self.days_per_px)
+        while date <= end:
+            x = (date.toordinal() + JULIAN_ORDINAL_OFFSET - self.start) / self.days_per_px
+            if 0 <= x <= width:
+                text = date.strftime("%Y" if unit == "year" else "%b %Y" if unit == "month" else "%Y-%m-%d")
+                self.create_line(x, y, x, y + 5, fill="gray")
+                self.create_text(x, y + 7, text=text, anchor="n", fill="gray", font=("Arial", 9))
+            try:
+                if unit == "year":
+                    date = date.replace(year=date.year + every)
+                elif unit == "month":
+                    months = date.month - 1 + every
+                    date = date.replace(year=date.year + months // 12, month=months % 12 + 1)
+                else:
+                    date += datetime.timedelta(days=every)
+            except (ValueError, OverflowError):
+                break
+
+    def hover(self, event):
+        if self.on_hover is None:
+            return
+        for item in reversed(self.find_overlapping(event.x - 2, event.y - 2, event.x + 2, event.y + 2)):
+            if item in self.descriptions:
+                self.on_hover(self.descriptions[item])
+                return
+        self.on_hover("")
+
+
+def _day_date(day):
+    return datetime.date.fromordinal(min(max(int(day) - JULIAN_ORDINAL_OFFSET, 1), datetime.date.max.toordinal()))
+
+
+def _day_text(day):
+    return _day_date(day).isoformat()
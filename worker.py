@@ -0,0 +1,95 @@
+import queue
+import threading
+from concurrent.futures import Future
+from tkinter import messagebox
+
+
+class TkDispatcher:
+    #Tk is not thread-safe, so completed futures are queued and their callbacks are run from after() on the Tk thread.
+    POLL_MS = 8
+
+    def __init__(self, tk_widget):
+        self.tk_widget = tk_widget
+        self.completed = queue.Queue()
+        self.outstanding = 0
+        self.polling = False
+
+    def dispatch(self, future, callback, errback=None):
+        #callback(result) is run on the Tk thread once future finishes, or errback(exception) if it raised.
+        #Without an errback the exception goes to Tk's callback error report.
+        future.add_done_callback(lambda f: self.completed.put((callback, errback, f)))
+        self.outstanding += 1
+        if not self.polling:
+            self.polling = True
+            self.tk_widget.after(self.POLL_MS, self.poll)
+        return future
+
+    def poll(self):
+        try:
+            while True:
+                try:
+                    callback, errback, future = self.completed.get_nowait()
+                except queue.Empty:
+                    break
+                self.outstanding -= 1
+                if future.cancelled():
+                    continue
+                error = future.exception()
+                if error is None:
+                    callback(future.result())
+                elif errback is not None:
+                    errback(error)
+                else:
+                    raise error
+        finally:
+            #Only keep polling while there are calls in flight
+            if self.outstanding:
+                self.tk_widget.after(self.POLL_MS, self.poll)
+            else:
+                self.polling = False
+
+
+def show_error(method, error):
+    messagebox.showerror("Database Error", f"{method} failed: {error}")
+
+
+class DatabaseWorker:
+    #Runs VersionController calls on a dedicated thread so the Tk mainloop never waits on SQLite: reads go through the controller's
+    #read pool, and writes (and the lookups that follow them) queue here too, so a locked database delays them instead of freezing the window.
+    def __init__(self, tk_widget, controller):
+        self.controller = controller
+        self.dispatcher = TkDispatcher(tk_widget)
+        self.requests = queue.Queue()
+
+        self.thread = threading.Thread(target=self.run, name="versionary-db", daemon=True)
+        self.thread.start()
+
+    def run(self):
+        while True:
+            item = self.requests.get()
+            if item is None:
+                break
+
+            future, method, args, kwargs = item
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                future.set_result(getattr(self.controller, method)(*args, **kwargs))
+            except Exception as e:
+                future.set_exception(e)
+
+    def submit(self, method, *args, **kwargs):
+        future = Future()
+        self.requests.put((future, method, args, kwargs))
+        return future
+
+    def call(self, method, *args, callback, errback=None, **kwargs):
+        #Like submit(), but callback(result) is run on the Tk thread once the query finishes.
+        #A failed query (e.g. "database is locked" after the busy timeout) goes to errback(exception), by default an error dialog.
+        if errback is None:
+            errback = lambda error: show_error(method, error)
+        return self.dispatcher.dispatch(self.submit(method, *args, **kwargs), callback, errback)
+
+    def close(self):
+        self.requests.put(None)
+        self.thread.join()